@@ -0,0 +1,198 @@
+"""
+Parser micro-benchmarks.
+
+Times parsing, every Profile/Company attribute and to_dict() on the bundled
+html fixtures, and on synthetic profiles of increasing size to show how the
+extractors scale. Peak memory of parse + to_dict() is measured separately with
+tracemalloc.
+
+Usage:
+    python benchmarks/bench_parsers.py                      # print results
+    python benchmarks/bench_parsers.py --save baseline.json # save a baseline
+    python benchmarks/bench_parsers.py --compare baseline.json
+
+With --compare, exits with status 1 if any time or peak memory is more than
+--threshold (default 25%) worse than the baseline. Times below --min-time are
+too noisy to compare and are ignored. Baselines are only comparable on the same
+machine.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from os import path
+
+from scrape_linkedin import Company, Profile
+from scrape_linkedin.utils import DEFAULT_PARSER
+from synthetic import synthetic_profile
+
+HTML_DIR = path.join(path.dirname(path.abspath(__file__)),
+                     '..', 'test', 'html_files')
+FIXTURES = [
+    ('profile.html', Profile),
+    ('otherProfile.html', Profile),
+    ('facebook_overview.html', Company),
+]
+SYNTHETIC_SIZES = [10, 100, 1000, 5000]
+
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(fn):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_case(html, results_type, repeat, attributes=True):
+    """Returns {measurement name: {'time': s, 'peak': bytes}}"""
+    results = {}
+    results['parse'] = {'time': best_time(lambda: results_type(html), repeat)}
+
+    if attributes:
+        times = {attr: float('inf') for attr in results_type.attributes}
+        for _ in range(repeat):
+            # Attributes are memoized, so each run needs a fresh object. Parse
+            # it outside of the timed region.
+            obj = results_type(html)
+            for attr in results_type.attributes:
+                start = time.perf_counter()
+                obj._get_attr_or_none(attr)
+                times[attr] = min(times[attr], time.perf_counter() - start)
+        for attr, t in times.items():
+            results[attr] = {'time': t}
+
+    results['to_dict'] = {
+        'time': best_time(lambda: results_type(html).to_dict(), repeat),
+        'peak': peak_memory(lambda: results_type(html).to_dict())
+    }
+    return results
+
+
+def check_synthetic(html, size):
+    """Make sure the synthetic markup is still understood by the extractors,
+    otherwise the scaling numbers are meaningless."""
+    data = Profile(html).to_dict()
+    assert data['personal_info']['name'] == 'Synthetic Person', 'personal_info'
+    counts = {
+        'jobs': len(data['experiences']['jobs']),
+        'education': len(data['experiences']['education']),
+        'volunteering': len(data['experiences']['volunteering']),
+        'skills': len(data['skills']),
+        'accomplishments': sum(len(v) for v in data['accomplishments'].values()),
+        'interests': len(data['interests']),
+        'recommendations.received': len(data['recommendations']['received']),
+        'recommendations.given': len(data['recommendations']['given'])
+    }
+    expected = dict.fromkeys(counts, size)
+    expected.update(volunteering=0, accomplishments=0, interests=0)
+    assert counts == expected, 'counts {} != {}'.format(counts, expected)
+
+
+def run(repeat, sizes, attributes):
+    cases = {}
+    for fname, results_type in FIXTURES:
+        with open(path.join(HTML_DIR, fname), 'r') as f:
+            html = f.read()
+        print('benchmarking', fname, file=sys.stderr)
+        cases[fname] = bench_case(html, results_type, repeat, attributes)
+    for size in sizes:
+        html = synthetic_profile(size)
+        check_synthetic(html, size)
+        print('benchmarking synthetic profile of size', size, file=sys.stderr)
+        # Big profiles take seconds per run, don't repeat them as often
+        cases['synthetic-{}'.format(size)] = bench_case(
+            html, Profile, max(1, repeat * 100 // max(size, 100)), attributes)
+    return {
+        'python': platform.python_version(),
+        'parser': DEFAULT_PARSER,
+        'cases': cases
+    }
+
+
+def print_results(results, baseline=None):
+    row = '{:<24} {:<16} {:>12} {:>12} {:>10}'
+    print(row.format('case', 'measurement', 'time (ms)', 'peak (KB)', 'change'))
+    for case, measurements in results['cases'].items():
+        for name, m in measurements.items():
+            change = ''
+            if baseline:
+                base = baseline['cases'].get(case, {}).get(name)
+                if base:
+                    change = '{:+.0%}'.format(m['time'] / base['time'] - 1)
+            peak = m['peak'] // 1024 if 'peak' in m else ''
+            print(row.format(case, name, '{:.2f}'.format(
+                m['time'] * 1000), peak, change))
+
+
+def find_regressions(results, baseline, threshold, min_time=0):
+    """Return a list of (case, measurement, metric, baseline, current) for every
+    metric that got worse by more than threshold"""
+    regressions = []
+    for case, measurements in results['cases'].items():
+        for name, m in measurements.items():
+            base = baseline['cases'].get(case, {}).get(name, {})
+            for metric in ('time', 'peak'):
+                if metric == 'time' and base.get(metric, 0) < min_time:
+                    continue
+                if metric in m and base.get(metric) and m[metric] > base[metric] * (1 + threshold):
+                    regressions.append(
+                        (case, name, metric, base[metric], m[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--repeat', type=int, default=5,
+                        help='runs per measurement, the fastest is kept')
+    parser.add_argument('--sizes', type=int, nargs='*', default=SYNTHETIC_SIZES,
+                        help='synthetic profile sizes (positions, skills and recommendations each)')
+    parser.add_argument('--no-attributes', action='store_true',
+                        help='only time parsing and to_dict()')
+    parser.add_argument('--save', metavar='FILE', help='save results as a baseline')
+    parser.add_argument('--compare', metavar='FILE', help='baseline to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown/memory growth before flagging a regression')
+    parser.add_argument('--min-time', type=float, default=0.001,
+                        help='ignore measurements faster than this (s) when comparing')
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.sizes, not args.no_attributes)
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print('Saved baseline to', args.save)
+
+    if baseline:
+        regressions = find_regressions(
+            results, baseline, args.threshold, args.min_time)
+        for case, name, metric, before, after in regressions:
+            print('REGRESSION {} {} {}: {:.4g} -> {:.4g}'.format(case,
+                                                                 name, metric, before, after))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
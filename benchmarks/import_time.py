@@ -0,0 +1,77 @@
+"""
+Measure cold-start import time of scrape_linkedin, each in a fresh interpreter.
+
+The parse-only path (`from scrape_linkedin import Profile, Company`, as used by
+ParallelParser workers) must not import selenium or joblib, which only the
+scrapers need. Their cost is shown for comparison.
+
+Usage: python benchmarks/import_time.py [-n REPEAT] [--max-ms MS]
+
+With --max-ms, exits with status 1 if the parse-only import takes longer, or
+if it imports selenium or joblib.
+"""
+import argparse
+import subprocess
+import sys
+
+STATEMENTS = [
+    ('python', 'pass'),
+    ('parse-only', 'from scrape_linkedin import Profile, Company'),
+    ('parallel parser', 'import scrape_linkedin.ParallelParser'),
+    ('scrapers', 'from scrape_linkedin import ProfileScraper, scrape_in_parallel'),
+]
+HEAVY_MODULES = ['selenium', 'joblib']
+
+TIMER = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed, ','.join(m for m in {heavy!r} if m in sys.modules), sep='|')
+"""
+
+
+def cold_import(statement):
+    """Returns (seconds, heavy modules imported) for running statement in a
+    new interpreter"""
+    output = subprocess.check_output([sys.executable, '-c', TIMER.format(
+        statement=statement, heavy=HEAVY_MODULES)], universal_newlines=True)
+    elapsed, heavy = output.strip().split('|')
+    return float(elapsed), [m for m in heavy.split(',') if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--repeat', type=int, default=5,
+                        help='interpreters started per statement, the fastest is kept')
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='fail if the parse-only import is slower than this')
+    args = parser.parse_args()
+
+    row = '{:<16} {:>10}  {}'
+    print(row.format('import', 'time (ms)', 'heavy modules imported'))
+    results = {}
+    for name, statement in STATEMENTS:
+        runs = [cold_import(statement) for _ in range(args.repeat)]
+        best = min(elapsed for elapsed, _ in runs)
+        results[name] = (best, runs[0][1])
+        print(row.format(name, '{:.1f}'.format(best * 1000),
+                         ', '.join(runs[0][1]) or '-'))
+
+    if args.max_ms is not None:
+        elapsed, heavy = results['parse-only']
+        failed = False
+        if heavy:
+            print('REGRESSION parse-only import pulls in', ', '.join(heavy))
+            failed = True
+        if elapsed * 1000 > args.max_ms:
+            print('REGRESSION parse-only import took {:.1f}ms > {}ms'.format(
+                elapsed * 1000, args.max_ms))
+            failed = True
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Compare full and partial (SoupStrainer) parsing of the bundled profile
+fixtures.
+
+Usage: python benchmarks/partial_parse.py [-n REPEAT] [--fields skills ...]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from os import path
+
+from scrape_linkedin import Profile
+
+HTML_DIR = path.join(path.dirname(path.abspath(__file__)),
+                    '..', 'test', 'html_files')
+FIXTURES = [path.join(HTML_DIR, f) for f in ['profile.html', 'otherProfile.html']]
+
+
+def measure(html, repeat, **kwargs):
+    """Returns (best time (s), retained bytes, peak bytes) for parsing html
+    and calling to_dict()"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        Profile(html, **kwargs).to_dict()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    profile = Profile(html, **kwargs)
+    retained, _ = tracemalloc.get_traced_memory()
+    profile.to_dict()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--repeat', type=int, default=5)
+    parser.add_argument('--fields', nargs='+', default=None,
+                        choices=Profile.attributes)
+    args = parser.parse_args()
+
+    row = '{:<20} {:>8} {:>10} {:>10} {:>10}'
+    print(row.format('fixture', 'mode', 'time (ms)', 'soup (KB)', 'peak (KB)'))
+    for fixture in FIXTURES:
+        with open(fixture, 'r') as f:
+            html = f.read()
+        full = measure(html, args.repeat, fields=args.fields)
+        partial = measure(html, args.repeat, fields=args.fields, partial=True)
+        name = path.basename(fixture)
+        for mode, (t, retained, peak) in [('full', full), ('partial', partial)]:
+            print(row.format(name, mode, '{:.1f}'.format(t * 1000),
+                             retained // 1024, peak // 1024))
+        print(row.format(name, 'saved', '{:.0%}'.format(1 - partial[0] / full[0]),
+                         '{:.0%}'.format(1 - partial[1] / full[1]),
+                         '{:.0%}'.format(1 - partial[2] / full[2])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Measure the memory retained per results object, with and without release().
+
+Usage: python benchmarks/release_memory.py [-n OBJECTS]
+"""
+import argparse
+import gc
+import tracemalloc
+from os import path
+
+from scrape_linkedin import Company, Profile
+
+HTML_DIR = path.join(path.dirname(path.abspath(__file__)),
+                     '..', 'test', 'html_files')
+FIXTURES = [
+    ('profile.html', Profile),
+    ('otherProfile.html', Profile),
+    ('facebook_overview.html', Company),
+]
+
+
+def retained_per_object(html, results_type, n, release):
+    """Average bytes held by each of n live objects after to_dict()"""
+    gc.collect()
+    tracemalloc.start()
+    objects = []
+    for _ in range(n):
+        obj = results_type(html)
+        obj.to_dict()
+        if release:
+            obj.release()
+        objects.append(obj)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return retained / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--objects', type=int, default=10)
+    args = parser.parse_args()
+
+    row = '{:<24} {:>14} {:>14} {:>8}'
+    print(row.format('fixture', 'kept (KB)', 'released (KB)', 'saved'))
+    for fname, results_type in FIXTURES:
+        with open(path.join(HTML_DIR, fname), 'r') as f:
+            html = f.read()
+        kept = retained_per_object(html, results_type, args.objects, False)
+        released = retained_per_object(html, results_type, args.objects, True)
+        print(row.format(fname, '{:.0f}'.format(kept / 1024),
+                         '{:.0f}'.format(released / 1024),
+                         '{:.0%}'.format(1 - released / kept)))
+
+
+if __name__ == '__main__':
+    main()
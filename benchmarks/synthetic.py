@@ -0,0 +1,94 @@
+"""
+Generate synthetic profile html of arbitrary size, using the markup the Profile
+extractors expect.
+"""
+
+TOP_CARD = """
+<section class="pv-top-card">
+  <h1>Synthetic Person</h1>
+  <div class="text-body-medium break-words">Engineer at Company 0</div>
+  <div aria-label="Current company">Company 0</div>
+  <div aria-label="Education">University 0</div>
+  <span class="text-body-small inline break-words">Toronto, Canada</span>
+  <img class="pv-top-card__photo" src="https://example.com/photo.jpg"/>
+</section>
+<section class="pv-about-section">About A synthetic profile</section>
+<section class="pv-recent-activity-section-v2">Activity 1,234 followers</section>
+"""
+
+POSITION = """
+<li class="pv-position-entity">
+  <a data-control-name="background_details_company" href="/company/{i}/">
+    <div class="pv-entity__summary-info">
+      <h3>Title {i}</h3>
+      <p class="pv-entity__secondary-title">Company {i}</p>
+      <h4 class="pv-entity__date-range"><span>Dates Employed</span><span>Jan 2000 – Dec 2001</span></h4>
+      <h4 class="pv-entity__location"><span>Location</span><span>City {i}</span></h4>
+    </div>
+  </a>
+  <div class="pv-entity__description">Description of position {i}... See more</div>
+</li>
+"""
+
+SCHOOL = """
+<li class="pv-education-entity">
+  <h3 class="pv-entity__school-name">University {i}</h3>
+  <p class="pv-entity__degree-name"><span>Degree Name</span><span>BSc</span></p>
+  <p class="pv-entity__fos"><span>Field Of Study</span><span>Field {i}</span></p>
+  <p class="pv-entity__dates"><span>Dates attended</span><span>2000 – 2004</span></p>
+</li>
+"""
+
+SKILL = """
+<li class="pv-skill-category-entity__skill-wrapper">
+  <span class="pv-skill-category-entity__name">Skill {i}</span>
+  <span class="pv-skill-category-entity__endorsement-count">{endorsements}</span>
+</li>
+"""
+
+RECOMMENDATION = """
+<li class="pv-recommendation-entity">
+  <a class="pv-recommendation-entity__member" href="/in/person-{i}/">
+    <div class="pv-recommendation-entity__detail">
+      <h3>Person {i}</h3>
+      <p>Title at Company</p>
+      <p>January 5, 2019, Person {i} managed Synthetic directly</p>
+    </div>
+  </a>
+  <div class="pv-recommendation-entity__highlights">Recommendation text {i}</div>
+</li>
+"""
+
+
+def _repeat(template, n, **kwargs):
+    return ''.join(template.format(i=i, **kwargs) for i in range(n))
+
+
+def synthetic_profile(n_positions=10, n_skills=None, n_recommendations=None, n_schools=None):
+    """Return html for a profile with the given number of positions, skills,
+    recommendations (in each tab) and schools. Counts other than n_positions
+    default to n_positions."""
+    n_skills = n_positions if n_skills is None else n_skills
+    n_recommendations = n_positions if n_recommendations is None else n_recommendations
+    n_schools = n_positions if n_schools is None else n_schools
+    skills = ''.join(SKILL.format(i=i, endorsements=i % 99)
+                     for i in range(n_skills))
+    return """
+<main class="scaffold-layout__main">
+  {top_card}
+  <section class="background-section">
+    <section id="experience-section"><ul>{positions}</ul></section>
+    <section id="education-section"><ul>{schools}</ul></section>
+  </section>
+  <section class="pv-skill-categories-section"><ol>{skills}</ol></section>
+  <section class="pv-recommendations-section">
+    <div class="artdeco-tabpanel"><ul>{received}</ul></div>
+    <div class="artdeco-tabpanel"><ul>{given}</ul></div>
+  </section>
+</main>
+""".format(top_card=TOP_CARD,
+           positions=_repeat(POSITION, n_positions),
+           schools=_repeat(SCHOOL, n_schools),
+           skills=skills,
+           received=_repeat(RECOMMENDATION, n_recommendations),
+           given=_repeat(RECOMMENDATION, n_recommendations))
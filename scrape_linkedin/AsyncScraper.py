@@ -0,0 +1,217 @@
+import asyncio
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .CompanyScraper import CompanyScraper
+from .DriverPool import DriverPool
+from .ProfileScraper import ProfileScraper
+
+logger = logging.getLogger(__name__)
+
+
+class _Lease(object):
+    """The browser an item is being scraped with, so that cancelling the item
+    from the event loop can stop it"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.session = None
+        self.cancelled = False
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            session = self.session
+        if session:
+            # Selenium calls can't be interrupted, but fail as soon as the
+            # browser is gone. The pool replaces it when it's returned.
+            try:
+                session.driver.quit()
+            except Exception as e:
+                logger.debug("Error quitting a cancelled browser: %s", e)
+
+
+class AsyncScraper(object):
+    """
+    asyncio interface to a scraper, scraping with a pool of up to size
+    browsers from worker threads:
+
+        async with AsyncProfileScraper(size=4) as scraper:
+            profile = await scraper.scrape(user='austinoboyle')
+            async for user, profile in scraper.scrape_many(users):
+                ...
+
+    Results are extracted (see ResultsObject.release) in the worker threads,
+    so no html is parsed on the event loop. Cancelling an item, or it timing
+    out, quits the browser scraping it so the slot is freed straight away;
+    the pool starts a new one when it's next needed.
+
+    Params:
+        - size {int}: maximum number of browsers, and items scraped at once
+        - warm {bool}: start the browsers in `async with` rather than on
+        first use
+        - scraper_options {dict}: other scraper_type constructor arguments,
+        eg. ProfileScraper's contact_info, see DriverPool.lease
+        - **scraper_kwargs: cookie, driver, driver_options and any other
+        Scraper constructor arguments, see DriverPool
+    """
+    scraper_type = None
+    # Keyword argument of scraper_type.scrape that scrape_many's items are
+    item_argument = None
+
+    def __init__(self, size=2, warm=False, scraper_options=None, **scraper_kwargs):
+        if self.scraper_type is None:
+            raise Exception(
+                'AsyncScraper is an abstract class, use AsyncProfileScraper or AsyncCompanyScraper')
+        self.size = size
+        self.warm = warm
+        self.scraper_options = scraper_options or {}
+        self.pool = DriverPool(size=size, warm=False, **scraper_kwargs)
+        self._executor = ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix='scrape_linkedin')
+
+    async def start(self):
+        """Start every browser, without blocking the event loop"""
+        loop = asyncio.get_event_loop()
+        sessions = await asyncio.gather(*[
+            loop.run_in_executor(self._executor, self.pool.acquire)
+            for _ in range(self.size)])
+        for session in sessions:
+            self.pool.release(session)
+
+    def _scrape(self, lease, kwargs):
+        # Items cancelled while queued for a thread mustn't start a browser
+        if lease.cancelled:
+            raise asyncio.CancelledError()
+        session = self.pool.acquire()
+        # or be cancelled while waiting for one
+        with lease.lock:
+            if lease.cancelled:
+                self.pool.release(session)
+                raise asyncio.CancelledError()
+            lease.session = session
+        try:
+            scraper = self.scraper_type(scraperInstance=session, **self.scraper_options)
+            result = scraper.scrape(**kwargs)
+            if hasattr(result, 'release'):
+                result.release()
+            return result
+        finally:
+            with lease.lock:
+                lease.session = None
+            self.pool.release(session)
+
+    async def scrape(self, timeout=None, **kwargs):
+        """Scrape an item, waiting for a free browser if they're all in use
+
+        Params:
+            - timeout {float}: seconds to wait for the result, including any
+            wait for a browser (default: no limit)
+            - **kwargs: arguments of scraper_type.scrape, eg. user and fields
+        Raises:
+            asyncio.TimeoutError: if it took longer than timeout
+        """
+        loop = asyncio.get_event_loop()
+        lease = _Lease()
+        future = loop.run_in_executor(self._executor, self._scrape, lease, kwargs)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            lease.cancel()
+            raise
+
+    async def _scrape_item(self, item, timeout, kwargs):
+        try:
+            result = await self.scrape(timeout=timeout, **dict(kwargs, **{self.item_argument: item}))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("%s could not be scraped: %s", item, e, exc_info=e)
+            result = e
+        return item, result
+
+    async def scrape_many(self, items, timeout=None, **kwargs):
+        """Scrape items, size of them at once, yielding results as they finish
+
+        Params:
+            - items {iterable}: eg. usernames for AsyncProfileScraper
+            - timeout {float}: seconds each item may take, see scrape
+            - **kwargs: other arguments of scraper_type.scrape, eg. fields
+
+        Yields:
+            {tuple}: (item, result), where result is the exception raised if
+            item could not be scraped (including asyncio.TimeoutError)
+        """
+        items = iter(items)
+        pending = set()
+
+        def schedule(count):
+            for item in itertools.islice(items, count):
+                pending.add(asyncio.ensure_future(
+                    self._scrape_item(item, timeout, kwargs)))
+
+        schedule(self.size)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                schedule(len(done))
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def close(self):
+        """Quit every browser once the items being scraped are done"""
+        # Items still queued fail as soon as they find the pool closed
+        self._executor.shutdown(wait=False)
+        await asyncio.get_event_loop().run_in_executor(None, self.pool.close)
+
+    async def __aenter__(self):
+        if self.warm:
+            await self.start()
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        await self.close()
+
+
+class AsyncProfileScraper(AsyncScraper):
+    """asyncio interface to ProfileScraper, see AsyncScraper"""
+    scraper_type = ProfileScraper
+    item_argument = 'user'
+
+
+class AsyncCompanyScraper(AsyncScraper):
+    """asyncio interface to CompanyScraper, see AsyncScraper"""
+    scraper_type = CompanyScraper
+    item_argument = 'company'
+
+
+ASYNC_SCRAPERS = {ProfileScraper: AsyncProfileScraper,
+                  CompanyScraper: AsyncCompanyScraper}
+
+
+async def async_scrape_many(scraper_type, items, size=2, timeout=None, fields=None,
+                            scraper_options=None, **scraper_kwargs):
+    """Scrape items with a new pool of up to size browsers, yielding
+    (item, result) as each finishes, see AsyncScraper.scrape_many
+
+    Params:
+        - scraper_type {Scraper}: ProfileScraper or CompanyScraper
+        - items {iterable}: usernames or company ids
+        - size {int}: number of browsers
+        - timeout {float}: seconds each item may take
+        - fields {list}: attributes to scrape (default: all)
+        - scraper_options {dict}: see AsyncScraper
+        - **scraper_kwargs: Scraper constructor arguments
+    """
+    if scraper_type not in ASYNC_SCRAPERS:
+        raise ValueError('scraper_type must be ProfileScraper or CompanyScraper')
+    async with ASYNC_SCRAPERS[scraper_type](size=size, scraper_options=scraper_options,
+                                            **scraper_kwargs) as scraper:
+        async for item, result in scraper.scrape_many(items, timeout=timeout, fields=fields):
+            yield item, result
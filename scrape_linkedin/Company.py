@@ -2,10 +2,9 @@ import logging
 import re
 from typing import Optional
 
-from bs4 import BeautifulSoup
-
-from .ResultsObject import ResultsObject
-from .utils import all_or_default, get_info, one_or_default, text_or_default
+from .ResultsObject import ResultsObject, memoized_property
+from .utils import (all_or_default, get_info, make_soup, one_or_default,
+                    text_or_default)
 
 RE_DUPLICATE_WHITESPACE = re.compile(r"[\s]{2,}")
 COMPANY_SIZE_KEY = 'company_size'
@@ -60,16 +59,23 @@ class Company(ResultsObject):
 
     attributes = ['overview', 'jobs', 'life', 'insights']
     # KD adds insights attribute
+    soup_attributes = ['overview_soup', 'jobs_soup',
+                       'life_soup', 'insights_soup']
+    snapshot_sections = ['overview', 'overview.metadata',
+                         'jobs', 'life', 'insights']
 
-    def __init__(self, overview, jobs, life, insights):
+    def __init__(self, overview, jobs='', life='', insights='', parser=None, fields=None, release=False):
         # KD fixed attributes making jobs and life undefined as they are defined in CompanyScraper, and this allows insights to work
-        self.overview_soup = BeautifulSoup(overview, 'html.parser')
-        self.jobs_soup = BeautifulSoup(jobs, 'html.parser')
-        self.life_soup = BeautifulSoup(life, 'html.parser')
-        self.insights_soup = BeautifulSoup(insights, 'html.parser')
+        self.overview_soup = make_soup(overview, parser)
+        self.jobs_soup = make_soup(jobs, parser)
+        self.life_soup = make_soup(life, parser)
+        self.insights_soup = make_soup(insights, parser)
         # KD adds insights soup
+        self._init_results(fields)
+        if release:
+            self.release()
 
-    @property
+    @memoized_property
     def overview(self):
         """Return dict of the overview section of the Linkedin Page"""
 
@@ -103,16 +109,16 @@ class Company(ResultsObject):
 
         return overview
 
-    @property
+    @memoized_property
     def jobs(self):
         return None
 
-    @property
+    @memoized_property
     def life(self):
         return None
 
     # KD added property for Insights
-    @property
+    @memoized_property
     def insights(self):
 
         # summary table containing the Insights data for % change in headcount at 6m, 1y and 2y
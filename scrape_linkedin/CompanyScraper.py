@@ -1,10 +1,12 @@
 import logging
+from contextlib import closing
 
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from . import voyager
 from .Company import Company
 from .Scraper import Scraper
 from .utils import AnyEC
@@ -13,30 +15,142 @@ logger = logging.getLogger(__name__)
 
 
 class CompanyScraper(Scraper):
-    def scrape(self, company, overview=True, jobs=False, life=False, insights=False):
+    READY_SELECTORS = ['.organization-outlet', '.error-container']
+    # Company fields and the subpages they're scraped from
+    SUBPAGES = [('overview', 'about'), ('life', 'life'),
+                ('jobs', 'jobs'), ('insights', 'insights')]
+
+    def scrape(self, company, overview=True, jobs=False, life=False, insights=False, fields=None):
+        """Scrape a company
+
+        Params:
+            - company {str}: id of the company
+            - overview, jobs, life, insights {bool}: subpages to scrape
+            - fields {list}: Company attributes to scrape, instead of the
+            subpage flags
+        """
         self.url = 'https://www.linkedin.com/company/{}'.format(company)
         self.company = company
+        if fields is not None:
+            overview, jobs, life, insights = self.subpages_for(fields)
+        if self.capture:
+            self.start_capture()
+            self.get(self.url + '/about')
+            return self.finish_capture(overview, jobs, life, insights, fields)
+
+        if not (overview or jobs or life or insights):
+            # Only the root page can tell whether the company exists
+            self.load_initial()
+        return self.scrape_pages(overview, jobs, life, insights, fields=fields)
 
-        self.load_initial()
+    def subpages_for(self, fields=None):
+        """Return the (overview, jobs, life, insights) subpage flags needed
+        for fields (default: only overview, like scrape)"""
+        if fields is None:
+            return True, False, False, False
+        if isinstance(fields, str):
+            fields = [fields]
+        names = ('overview', 'jobs', 'life', 'insights')
+        unknown = [f for f in fields if f not in names]
+        if unknown:
+            raise ValueError("Unknown field(s) {}. Must be one of: {}".format(
+                ', '.join(unknown), ', '.join(names)))
+        return tuple(name in fields for name in names)
 
-        jobs_html = life_html = insights_html = overview_html = ''
+    def _first_subpage(self, fields=None):
+        wanted = dict(zip(('overview', 'jobs', 'life', 'insights'),
+                          self.subpages_for(fields)))
+        return next((page for name, page in self.SUBPAGES if wanted[name]), None)
 
+    def finish_capture(self, overview=True, jobs=False, life=False, insights=False, fields=None):
+        """Build the Company from the responses captured while its about page
+        loaded in the current tab, see Scraper(capture=True). They don't hold
+        insights, so those are still parsed from the insights page."""
+        self.wait_for_company()
+        data = {'overview': None, 'jobs': None, 'life': None, 'insights': None}
         if overview:
-            overview_html = self.fetch_page_html('about')
-        if life:
-            life_html = self.fetch_page_html('life')
-        if jobs:
-            jobs_html = self.fetch_page_html('jobs')
+            data['overview'] = self.capture_data(
+                lambda responses: voyager.company_from_voyager(responses, self.company))
         if insights:
-            insights_html = self.fetch_page_html('insights')
-        return Company(overview_html, jobs_html, life_html, insights_html)
+            data['insights'] = Company(
+                '', insights=self.fetch_page_html('insights')).insights
+        return Company.from_dict(data, fields)
+
+    def start_item(self, company, fields=None):
+        if self.capture:
+            self.start_capture()
+            self.start_loading(
+                'https://www.linkedin.com/company/{}/about'.format(company))
+            return
+        # With no subpage needed, the root page shows whether the company exists
+        page = self._first_subpage(fields)
+        self.start_loading('https://www.linkedin.com/company/{}{}'.format(
+            company, '/' + page if page else ''))
+
+    def finish_item(self, company, fields=None):
+        self.url = 'https://www.linkedin.com/company/{}'.format(company)
+        self.company = company
+        if self.capture:
+            return self.finish_capture(*self.subpages_for(fields), fields=fields)
+        page = self._first_subpage(fields)
+        if not page:
+            self.wait_for_company()
+        return self.scrape_pages(*self.subpages_for(fields), loaded=page, fields=fields)
+
+    def scrape_pages(self, overview=True, jobs=False, life=False, insights=False, loaded=None, fields=None):
+        """Load the requested subpages of self.url all at once, in separate
+        tabs, and return them as a Company
+
+        The first requested subpage (in SUBPAGES order) confirms the company
+        exists, so the root page is never loaded. Other subpages that fail to
+        load are left empty.
+
+        Params:
+            - loaded {str}: subpage already loading in the current tab
+            - fields {list}: attributes of the Company returned by to_dict
+        Raises:
+            ValueError: if the first subpage times out or the company doesn't
+            exist
+        """
+        wanted = {'overview': overview, 'jobs': jobs,
+                  'life': life, 'insights': insights}
+        pages = [page for name, page in self.SUBPAGES if wanted[name]]
+        fetched = {}
+
+        def start(page):
+            if page != loaded:
+                self.start_loading(f"{self.url}/{page}")
+
+        with closing(self.scrape_in_tabs(pages, start, self.read_page, len(pages))) as results:
+            for page, result in results:
+                if not isinstance(result, Exception):
+                    fetched[page] = result
+                elif page == pages[0]:
+                    raise result
+                else:
+                    logger.warning(
+                        f"Unable to fetch '{page}' page for {self.company}: {result}")
+        overview_html, life_html, jobs_html, insights_html = (
+            fetched.get(page, '') for _, page in self.SUBPAGES)
+        if self.archive:
+            pages = {'overview': overview_html, 'jobs': jobs_html,
+                     'life': life_html, 'insights': insights_html}
+            self.archive.add('company', {name: html for name, html in pages.items() if html},
+                             url=self.url)
+        return Company(overview_html, jobs_html, life_html, insights_html, fields=fields)
+
+    def read_page(self, page):
+        """Return the html of the company page loaded in the current tab"""
+        self.wait_for_company()
+        return self.driver.find_element_by_css_selector(
+            '.organization-outlet').get_attribute('outerHTML')
 
     def fetch_page_html(self, page):
         """
         Navigates to a company subpage and returns the entire HTML contents of the page.
         """
         try:
-            self.driver.get(f"{self.url}/{page}")
+            self.get(f"{self.url}/{page}")
             return self.driver.find_element_by_css_selector(
                 '.organization-outlet').get_attribute('outerHTML')
         except Exception as e:
@@ -45,7 +159,10 @@ class CompanyScraper(Scraper):
             return ''
 
     def load_initial(self):
-        self.driver.get(self.url)
+        self.get(self.url)
+        self.wait_for_company()
+
+    def wait_for_company(self):
         try:
             myElem = WebDriverWait(self.driver, self.timeout).until(AnyEC(
                 EC.presence_of_element_located(
@@ -39,7 +39,7 @@ class ConnectionScraper(Scraper):
         if 'com/in/' not in url:
             raise ValueError("Url must look like ...linkedin.com/in/NAME")
         self.current_profile = url.split(r'com/in/')[1]
-        self.driver.get(url)
+        self.get(url)
         # Wait for page to load dynamically via javascript
         try:
             myElem = WebDriverWait(self.driver, self.timeout).until(AnyEC(
@@ -127,7 +127,7 @@ scrape the connections of someone you aren't connected to.""")
             return
         new_url = re.sub(r'&facetNetwork=(.*?)&',
                          r'&facetNetwork=%5B"F"%5D&', self.driver.current_url)
-        self.driver.get(new_url)
+        self.get(new_url)
         self.wait(EC.text_to_be_present_in_element(
             (By.CSS_SELECTOR, '.search-s-facet--facetNetwork'), '1st'
         ))
@@ -0,0 +1,199 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .Scraper import Scraper
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSession(Scraper):
+    """A logged in browser kept warm by a DriverPool. Lease one and pass it to
+    any Scraper as its scraperInstance."""
+
+    def __init__(self, *args, **kwargs):
+        super(PooledSession, self).__init__(*args, **kwargs)
+        self.leases = 0
+
+    def scrape(self):
+        raise NotImplementedError(
+            "A pooled session can't scrape directly, lease a scraper with "
+            "DriverPool.lease(scraper_type) or pass the session to a Scraper as its scraperInstance")
+
+
+class DriverPool(object):
+    """
+    Pool of logged in browsers, so that scrapers don't each pay for starting a
+    browser, loading linkedin and setting the session cookie.
+
+    Scrapers lease a browser and give it back when they're done:
+
+        with DriverPool(size=4, driver_options=HEADLESS_OPTIONS) as pool:
+            with pool.lease(ProfileScraper) as scraper:
+                profile = scraper.scrape(user='austinoboyle')
+
+    Returned browsers are health checked, and replaced if they have crashed.
+    The pool is thread safe, but its browsers can't be shared with other
+    processes; see scrape_in_parallel(pool=...) for scraping with several.
+
+    Params:
+        - size {int}: maximum number of browsers
+        - warm {bool}: start every browser now, in parallel, rather than on
+        first use
+        - max_leases {int}: replace a browser after this many leases, to bound
+        the memory a long running browser accumulates (default: never)
+        - **scraper_kwargs: cookie, driver, driver_options and any other
+        Scraper constructor arguments, used for every browser
+    """
+
+    def __init__(self, size=2, warm=True, max_leases=None, **scraper_kwargs):
+        if size < 1:
+            raise ValueError('size must be at least 1')
+        self.size = size
+        self.max_leases = max_leases
+        self.scraper_kwargs = scraper_kwargs
+        # Most recently returned first: the warmest browser is reused. None
+        # stands for a discarded browser, which the next acquirer replaces.
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        # Browsers started (or starting) and not yet discarded
+        self._count = 0
+        self._closed = False
+        if warm:
+            with ThreadPoolExecutor(max_workers=size) as executor:
+                futures = [executor.submit(self._start_session)
+                           for _ in range(size)]
+            errors = []
+            for future in futures:
+                try:
+                    self._idle.put(future.result())
+                except Exception as e:
+                    errors.append(e)
+            if errors:
+                self.close()
+                raise errors[0]
+
+    def _start_session(self):
+        with self._lock:
+            if self._count >= self.size:
+                return None
+            self._count += 1
+        try:
+            return PooledSession(**self.scraper_kwargs)
+        except Exception:
+            with self._lock:
+                self._count -= 1
+            raise
+
+    def _discard(self, session):
+        with self._lock:
+            self._count -= 1
+        try:
+            session.driver.quit()
+        except Exception as e:
+            logger.debug("Error quitting a pooled browser: %s", e)
+
+    def is_healthy(self, session):
+        """Check that a browser still responds and has a usable window,
+        closing any windows a scraper opened besides the first"""
+        try:
+            driver = session.driver
+            handles = driver.window_handles
+            if not handles:
+                raise Exception('No windows are open')
+            if len(handles) > 1:
+                for handle in handles[1:]:
+                    driver.switch_to.window(handle)
+                    driver.close()
+                driver.switch_to.window(handles[0])
+            if driver.current_url.startswith('chrome-error://'):
+                raise Exception('The window shows an error page')
+            driver.execute_script('return 1')
+            return True
+        except Exception as e:
+            logger.warning("Discarding an unresponsive pooled browser: %s", e)
+            return False
+
+    def acquire(self, timeout=None):
+        """Take a browser from the pool, starting one if the pool isn't full.
+        Blocks for up to timeout seconds (default: forever) for one to be
+        returned otherwise.
+
+        Returns:
+            {PooledSession}: give it back with release()
+        Raises:
+            TimeoutError: if no browser became available in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._closed:
+                raise RuntimeError('DriverPool is closed')
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                session = self._start_session()
+                if session:
+                    return session
+                remaining = None if deadline is None else max(0, deadline - time.monotonic())
+                try:
+                    session = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError(
+                        'No browser was returned to the pool within {}s'.format(timeout))
+            session = session or self._start_session()
+            if session:
+                return session
+            # Another acquirer started the discarded browser's replacement
+
+    def release(self, session):
+        """Return a browser to the pool, replacing it if it is unhealthy or
+        has reached max_leases"""
+        session.leases += 1
+        if self._closed or (self.max_leases and session.leases >= self.max_leases) \
+                or not self.is_healthy(session):
+            self._discard(session)
+            if not self._closed:
+                self._idle.put(None)
+        else:
+            self._idle.put(session)
+
+    @contextmanager
+    def lease(self, scraper_type=None, timeout=None, **scraper_kwargs):
+        """Context manager leasing a browser for the duration of the block
+
+        Params:
+            - scraper_type {Scraper}: scraper class to wrap the browser in
+            (default: yield the PooledSession itself)
+            - timeout {float}: see acquire()
+            - **scraper_kwargs: other scraper_type constructor arguments, eg.
+            ProfileScraper's contact_info. The browser's are the pool's.
+        """
+        session = self.acquire(timeout)
+        try:
+            if scraper_type:
+                yield scraper_type(scraperInstance=session, **scraper_kwargs)
+            else:
+                yield session
+        finally:
+            self.release(session)
+
+    def close(self):
+        """Quit every idle browser. Browsers still leased are quit when
+        they're returned."""
+        self._closed = True
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if session:
+                self._discard(session)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
@@ -0,0 +1,199 @@
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Modules whose source determines parse output. Editing any of them changes
+# the parser version, so stale cached results are never returned.
+PARSER_MODULES = ('utils', 'records', 'ResultsObject', 'Profile', 'Company')
+# Libraries whose version determines parse output
+PARSER_LIBRARIES = ('bs4', 'lxml')
+
+
+def _library_version(name):
+    import importlib
+    try:
+        return importlib.import_module(name).__version__
+    except ImportError:
+        return None
+
+
+def parser_version():
+    """Return a short hash of the source of the parsing modules, and the
+    versions of the html parsing libraries"""
+    import importlib
+    digest = hashlib.sha256()
+    for name in PARSER_MODULES:
+        module = importlib.import_module('.' + name, __package__)
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    for name in PARSER_LIBRARIES:
+        digest.update('{}={}'.format(name, _library_version(name)).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def html_hash(html):
+    return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+
+def _write_atomic(path, data):
+    """Write bytes to path via a temp file, so readers (and other processes
+    writing the same content) never see a partial file"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class HtmlArchive(object):
+    """
+    Content-addressed store of raw scraped html, with a cache of parse results.
+
+    Pages are stored gzipped under objects/, keyed by the sha256 of their
+    html, so identical pages are only stored once. Every capture is recorded
+    as a line of index.jsonl: {'kind': 'profile'|'company', 'url', 'captured',
+    'pages': {page name: hash}}. Profiles have one page ('profile'), companies
+    one per scraped subpage ('overview', 'jobs', 'life', 'insights').
+
+    Parse results are cached under cache/<parser version>/, keyed by the kind,
+    bs4 parser and page hashes, so re-parsing the archive only parses pages
+    that have not been parsed by the current parser code before.
+
+    Params:
+        - directory {str}: archive root, created if necessary
+        - parser_version {str}: parse cache version (default: a hash of the
+        parsing modules' source, see parser_version())
+
+    Instances only hold paths, so they can be shared between processes.
+    """
+
+    def __init__(self, directory, parser_version=None):
+        self.directory = directory
+        self._parser_version = parser_version
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def parser_version(self):
+        if self._parser_version is None:
+            self._parser_version = parser_version()
+        return self._parser_version
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, 'index.jsonl')
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], digest + '.html.gz')
+
+    def _cache_path(self, key):
+        return os.path.join(self.directory, 'cache', self.parser_version, key[:2], key + '.json')
+
+    def __contains__(self, digest):
+        return os.path.exists(self._object_path(digest))
+
+    def put(self, html):
+        """Store a page, unless it is already stored
+
+        Returns:
+            {str}: the page's hash
+        """
+        digest = html_hash(html)
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            _write_atomic(path, gzip.compress(html.encode('utf-8')))
+        return digest
+
+    def get(self, digest):
+        """Return the html of a stored page"""
+        with gzip.open(self._object_path(digest), 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def add(self, kind, pages, url=None):
+        """Store the pages of one capture and record it in the index
+
+        Params:
+            - kind {str}: 'profile' or 'company'
+            - pages {dict}: page name -> html, eg. {'profile': html}
+            - url {str}: url the pages were scraped from
+
+        Returns:
+            {dict}: the index entry
+        """
+        entry = {
+            'kind': kind,
+            'url': url,
+            'captured': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'pages': {name: self.put(html) for name, html in pages.items()}
+        }
+        # One short write per line, so concurrent appenders don't interleave
+        with open(self.index_path, 'a') as index:
+            index.write(json.dumps(entry) + '\n')
+        return entry
+
+    def entries(self, kind=None):
+        """Yield the index entries, oldest first, optionally only of one kind"""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r') as index:
+            for line in index:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if kind is None or entry['kind'] == kind:
+                    yield entry
+
+    def parse(self, entry, parser=None):
+        """Return to_dict() of an index entry's pages, from the parse cache if
+        they have been parsed by the current parser version before"""
+        from .Company import Company
+        from .Profile import Profile
+        from .utils import DEFAULT_PARSER
+
+        # The default differs between hosts with and without lxml
+        parser = parser or DEFAULT_PARSER
+        key = hashlib.sha256(json.dumps(
+            [entry['kind'], parser, sorted(entry['pages'].items())]).encode('utf-8')).hexdigest()
+        path = self._cache_path(key)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return json.load(f)
+
+        pages = {name: self.get(digest)
+                 for name, digest in entry['pages'].items()}
+        if entry['kind'] == 'profile':
+            result = Profile(pages['profile'], parser=parser, release=True)
+        elif entry['kind'] == 'company':
+            # Empty pages aren't stored, and overview is Company's only
+            # required page
+            result = Company(pages.pop('overview', ''), parser=parser, release=True, **pages)
+        else:
+            raise ValueError("Unknown archive entry kind: {}".format(entry['kind']))
+        data = result.to_dict()
+        _write_atomic(path, json.dumps(data).encode('utf-8'))
+        return data
+
+    def parse_all(self, kind=None, parser=None):
+        """Re-parse every capture in the archive
+
+        Yields:
+            {dict}: the index entry, with the parse result under 'data', or
+            the error message under 'error' if it could not be parsed
+        """
+        for entry in self.entries(kind):
+            try:
+                entry['data'] = self.parse(entry, parser=parser)
+            except Exception as e:
+                logger.exception("%s could not be parsed: %s", entry['url'], e)
+                entry['error'] = '{}: {}'.format(type(e).__name__, e)
+            yield entry
@@ -1,6 +1,5 @@
 import logging
 import re
-import time
 
 from .Scraper import Scraper
 
@@ -11,7 +10,7 @@ logger = logging.getLogger(__name__)
 
 class MyConnectionScraper(Scraper):
     def scrape(self):
-        self.driver.get(MY_CONNECTIONS_LINK)
+        self.get(MY_CONNECTIONS_LINK)
         self.wait_for_el('.mn-connection-card')
         total_connections_text = self.driver.find_element_by_css_selector(
             '.mn-connections > h2').text
@@ -38,7 +37,9 @@ class MyConnectionScraper(Scraper):
     def scroll_to_bottom(self):
         num_visible_connections = 0
         consecutive_same_num = 1
-        MAX_CONSECUTIVE = 20
+        # Adaptive waits only return early once the page has stopped loading,
+        # so fewer retries are needed to be sure the list is complete
+        MAX_CONSECUTIVE = 3 if self.wait_strategy == 'adaptive' else 20
         while num_visible_connections < self.total_connections and consecutive_same_num < MAX_CONSECUTIVE:
             prev_visible_connections = num_visible_connections
             num_visible_connections = len(self.visible_connections)
@@ -48,7 +49,7 @@ class MyConnectionScraper(Scraper):
                 consecutive_same_num = 1
             self.driver.execute_script(
                 'window.scrollTo(0, document.body.scrollHeight)')
-            time.sleep(self.scroll_pause)
+            self.pause()
 
     @property
     def visible_connections(self):
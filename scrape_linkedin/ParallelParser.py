@@ -0,0 +1,153 @@
+import glob
+import logging
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from . import instrumentation
+from .Company import Company
+from .Profile import Profile
+
+logger = logging.getLogger(__name__)
+
+RESULT_TYPES = {
+    'profile': Profile,
+    'company': Company
+}
+HTML_EXTENSIONS = ('.html', '.htm')
+
+
+def find_html_files(source):
+    """Expand a source into a list of html file paths
+
+    Params:
+        - source {str}: one of
+            - a directory, which is searched recursively for .html/.htm files
+            - a glob pattern, eg. 'archive/2020-*/*.html'
+            - a single html file
+            - a manifest: a text file listing one path per line. Relative
+            paths are relative to the manifest's directory, blank lines and
+            lines starting with '#' are ignored
+
+    Returns:
+        {list}: sorted list of paths
+    """
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            paths += [os.path.join(root, f) for f in files
+                      if f.lower().endswith(HTML_EXTENSIONS)]
+        return sorted(paths)
+    if os.path.isfile(source):
+        if source.lower().endswith(HTML_EXTENSIONS):
+            return [source]
+        base_dir = os.path.dirname(source)
+        with open(source, 'r') as manifest:
+            lines = [line.strip() for line in manifest]
+        return [os.path.join(base_dir, line) for line in lines
+                if line and not line.startswith('#')]
+    paths = sorted(glob.glob(source, recursive=True))
+    if not paths:
+        raise ValueError(
+            "'{}' is not a directory, file, manifest or matching glob".format(source))
+    return paths
+
+
+def parse_file(path, page_type='profile', fields=None, parser=None, partial=False):
+    """Parse one stored html file
+
+    Returns:
+        {dict}: {'file': path, 'data': to_dict() output}, or
+        {'file': path, 'error': message} if the file could not be parsed
+    """
+    try:
+        with open(path, 'r') as html:
+            if page_type == 'profile':
+                result = Profile(html, parser=parser,
+                                 fields=fields, partial=partial)
+            else:
+                result = RESULT_TYPES[page_type](
+                    html, parser=parser, fields=fields)
+            return {'file': path, 'data': result.to_dict()}
+    except Exception as e:
+        logger.exception("%s could not be parsed: %s", path, e)
+        return {'file': path, 'error': '{}: {}'.format(type(e).__name__, e)}
+
+
+def _parse_file_with_stats(path, **parse_kwargs):
+    """parse_file in a worker process, also returning the instrumentation stats
+    recorded while parsing"""
+    instrumentation.enable()
+    instrumentation.reset()
+    result = parse_file(path, **parse_kwargs)
+    return result, instrumentation.snapshot()
+
+
+def parse_in_parallel(paths, num_workers=None, ordered=True, max_pending=None, collect_stats=False,
+                      **parse_kwargs):
+    """Parse stored html files across a pool of worker processes, yielding
+    each result as soon as it is available.
+
+    Params:
+        - paths {iterable}: html file paths. Consumed lazily.
+        - num_workers {int}: number of worker processes (default: cpu count).
+        With 1 worker, files are parsed in this process.
+        - ordered {bool}: yield results in the order of paths. Otherwise
+        results are yielded as they finish.
+        - max_pending {int}: maximum files submitted but not yet yielded,
+        which bounds memory use (default: 4 per worker)
+        - collect_stats {bool}: record selector instrumentation in the workers
+        and merge it into this process's stats (see instrumentation.report)
+        - **parse_kwargs: page_type, fields, parser and partial, passed to
+        parse_file
+
+    Yields:
+        {dict}: parse_file result for each path
+    """
+    page_type = parse_kwargs.get('page_type', 'profile')
+    if page_type not in RESULT_TYPES:
+        raise ValueError("page_type must be one of: {}".format(
+            ', '.join(RESULT_TYPES)))
+    # Fail fast on bad fields rather than once per file
+    RESULT_TYPES[page_type]('', fields=parse_kwargs.get('fields'))
+
+    num_workers = num_workers or os.cpu_count() or 1
+    if num_workers == 1:
+        if collect_stats:
+            instrumentation.enable()
+        for path in paths:
+            yield parse_file(path, **parse_kwargs)
+        return
+
+    def get_result(future):
+        if not collect_stats:
+            return future.result()
+        result, stats = future.result()
+        instrumentation.merge(stats)
+        return result
+
+    target = _parse_file_with_stats if collect_stats else parse_file
+
+    max_pending = max_pending or num_workers * 4
+    paths = iter(paths)
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        def fill():
+            while len(pending) < max_pending:
+                try:
+                    path = next(paths)
+                except StopIteration:
+                    return
+                pending.append(executor.submit(
+                    target, path, **parse_kwargs))
+
+        fill()
+        while pending:
+            if ordered:
+                yield get_result(pending.popleft())
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield get_result(future)
+            fill()
@@ -1,7 +1,10 @@
+import glob
 import json
 import logging
 import os
 import shutil
+import threading
+import time
 
 from joblib import Parallel, delayed
 from selenium.webdriver import Chrome
@@ -9,55 +12,309 @@ from selenium.webdriver import Chrome
 from .CompanyScraper import CompanyScraper
 from .ConnectionScraper import ConnectionScraper
 from .ProfileScraper import ProfileScraper
+from .SnapshotStore import SnapshotStore
 from .utils import HEADLESS_OPTIONS, split_lists
+from .WorkQueue import WorkQueue, worker_name
 
 logger = logging.getLogger(__name__)
 
+# Seconds between fsyncs of a job's results file. Every result is flushed as
+# it's written, so a crashed worker's results survive; an fsync also makes
+# them survive the host crashing.
+FSYNC_INTERVAL = 5
+
 
 def scrape_in_parallel(
     scraper_type,
     items,
     output_file,
-    num_instances,
+    num_instances=None,
     temp_dir='tmp_data',
     driver=Chrome,
     driver_options=HEADLESS_OPTIONS,
+    pool=None,
+    queue=None,
+    return_data=True,
     **kwargs
 ):
-    chunked_items = split_lists(items, num_instances)
-    os.mkdir(temp_dir)
-    Parallel(n_jobs=num_instances)(delayed(scrape_job)(
-        scraper_type=scraper_type,
-        output_file=temp_dir + '/{}.json'.format(i),
-        items=chunked_items[i],
-        driver=driver,
-        driver_options=driver_options,
-        **kwargs
-    ) for i in range(num_instances))
-
-    all_data = {}
-    for i in range(num_instances):
-        with open(temp_dir + '/{}.json'.format(i), 'r') as data:
-            all_data.update(json.load(data))
-    if output_file:
-        with open(output_file, 'w') as out:
-            json.dump(all_data, out)
+    if pool:
+        # Pooled browsers live in this process, so scrape from threads. The
+        # browsers do the heavy lifting either way. Browser options are the
+        # pool's; other scraper options apply to each leased scraper.
+        num_instances = num_instances or pool.size
+        job_kwargs = dict(kwargs, pool=pool)
+        backend = 'threading'
+    elif not num_instances:
+        raise ValueError('num_instances is required without a pool')
+    else:
+        job_kwargs = dict(driver=driver, driver_options=driver_options, **kwargs)
+        backend = None
+    if queue is not None:
+        return _scrape_queue(scraper_type, items, output_file, num_instances,
+                             queue, backend, job_kwargs, return_data)
+    os.makedirs(temp_dir, exist_ok=True)
+    # Results left by a run that stopped before merging them. Their snapshots
+    # may already be committed, so they're merged rather than scraped again.
+    stale = sorted(glob.glob(os.path.join(temp_dir, '*.jsonl')), key=os.path.getmtime)
+    wanted = set(_json_key(item) for item in items)
+    resumed = set(_json_key(item) for item, _ in read_results(stale)) & wanted
+    if resumed:
+        logger.info("Resuming with %s results left in %s", len(resumed), temp_dir)
+        items = [item for item in items if _json_key(item) not in resumed]
+    # Named apart from any stale files, whose last line may be incomplete
+    paths = [os.path.join(temp_dir, '{}-{}.jsonl'.format(worker_name(), i))
+             for i in range(num_instances)]
+    if items:
+        chunked_items = split_lists(items, num_instances)
+        Parallel(n_jobs=num_instances, backend=backend)(delayed(scrape_job)(
+            scraper_type=scraper_type,
+            output_file=paths[i],
+            items=chunked_items[i],
+            **job_kwargs
+        ) for i in range(num_instances))
+
+    paths = stale + [path for path in paths if os.path.exists(path)]
+
+    def read():
+        return ((item, data) for item, data in read_results(paths)
+                if _json_key(item) in wanted)
+    all_data = _merge_results(read, output_file, return_data)
     shutil.rmtree(temp_dir)
     return all_data
 
 
-def scrape_job(scraper_type, items, output_file, **scraper_kwargs):
+def read_results(paths):
+    """Iterate over (item, data) in the JSON lines results files written by
+    scrape_job, skipping a last line left incomplete by a crash"""
+    for path in paths:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    logger.warning("Skipping an incomplete result in %s", path)
+                    continue
+                yield result['item'], result['data']
+
+
+def _json_key(item):
+    """The item as a JSON object key: strings as they are, anything else as
+    its JSON, eg. 1 -> '1' and ('a', 1) -> '["a", 1]'"""
+    return item if isinstance(item, str) else json.dumps(item)
+
+
+def _merge_results(read, output_file=None, return_data=True):
+    """Merge (item, data) pairs into output_file as one JSON object, one
+    result at a time. Of an item seen more than once, the last result is
+    kept, as updating a dict would.
+
+    Params:
+        - read {function}: returns an iterator over the pairs. It is read
+        twice, first to find the last result of each item.
+
+    Returns:
+        {dict}: the merged results (keyed as in output_file), or None if
+        return_data is False and there's an output_file
+    """
+    last = {}
+    for i, (item, _) in enumerate(read()):
+        last[_json_key(item)] = i
+    all_data = {} if return_data or not output_file else None
+    out = open(output_file, 'w') if output_file else None
+    try:
+        if out:
+            out.write('{')
+        written = False
+        for i, (item, data) in enumerate(read()):
+            key = _json_key(item)
+            if last[key] != i:
+                continue
+            if out:
+                out.write((', ' if written else '') + json.dumps(key) + ': ' + json.dumps(data))
+            written = True
+            if all_data is not None:
+                all_data[key] = data
+        if out:
+            out.write('}')
+    finally:
+        if out:
+            out.close()
+    return all_data
+
+
+def _scrape_queue(scraper_type, items, output_file, num_instances, queue, backend, job_kwargs,
+                  return_data=True):
+    """Add items to a WorkQueue, and scrape it with num_instances local
+    workers alongside any on other hosts"""
+    if isinstance(queue, str):
+        queue = WorkQueue(queue)
+    if items:
+        queue.put(items)
+    Parallel(n_jobs=num_instances, backend=backend)(delayed(scrape_from_queue)(
+        scraper_type=scraper_type,
+        queue=queue,
+        **job_kwargs
+    ) for _ in range(num_instances))
+
+    return _merge_results(queue.results, output_file, return_data)
+
+
+def _extract(result, snapshots=None, key=None):
+    """Return result's data, freeing its parsed html straight away. With a
+    SnapshotStore, only return the sections that changed since the last
+    snapshot of key.
+
+    Returns:
+        {tuple}: (data, snapshot), where snapshot is the (key, hashes) to
+        commit to the store once data is safely stored, or None
+    """
+    result.release()
+    if snapshots:
+        delta, hashes = snapshots.diff(key, result)
+        return delta, (key, hashes) if hashes else None
+    return result.to_dict(), None
+
+
+def scrape_job(scraper_type, items, output_file, snapshots=None, pool=None, fields=None, **scraper_kwargs):
+    """Scrape items, appending each result to output_file as a JSON line,
+    {"item": item, "data": data}, see read_results"""
+    if isinstance(snapshots, str):
+        snapshots = SnapshotStore(snapshots)
+    if pool:
+        with pool.lease(scraper_type, **scraper_kwargs) as scraper:
+            return _scrape_items(scraper, scraper_type, items, output_file, snapshots, fields)
     scraper = scraper_type(**scraper_kwargs)
-    data = {}
+    return _scrape_items(scraper, scraper_type, items, output_file, snapshots, fields)
+
+
+def _scrape_item(scraper, scraper_type, item, snapshots, fields=None):
+    if scraper_type == CompanyScraper:
+        return _extract(scraper.scrape(company=item, fields=fields),
+                        snapshots, 'company/' + item)
+    if scraper_type == ConnectionScraper:
+        return scraper.scrape(user=item), None
+    if scraper_type == ProfileScraper:
+        return _extract(scraper.scrape(user=item, fields=fields),
+                        snapshots, 'profile/' + item)
+    raise ValueError('Unsupported scraper type {}'.format(scraper_type.__name__))
+
+
+def _scrape_batch(scraper, scraper_type, items, snapshots, fields=None):
+    """Yield (item, data or the exception raised, snapshot) for each item,
+    see _extract"""
+    if scraper.tabs > 1 and scraper_type in (CompanyScraper, ProfileScraper):
+        prefix = 'company/' if scraper_type == CompanyScraper else 'profile/'
+        for item, result in scraper.scrape_many(items, fields):
+            if isinstance(result, Exception):
+                yield item, result, None
+            else:
+                yield (item,) + _extract(result, snapshots, prefix + item)
+        return
     for item in items:
         try:
-            if scraper_type == CompanyScraper:
-                data[item] = scraper.scrape(company=item).to_dict()
-            elif scraper_type == ConnectionScraper:
-                data[item] = scraper.scrape(user=item)
-            elif scraper_type == ProfileScraper:
-                data[item] = scraper.scrape(user=item).to_dict()
+            yield (item,) + _scrape_item(scraper, scraper_type, item, snapshots, fields)
         except Exception as e:
-            logger.exception("%s could not be scraped: %s", item, e)
-        with open(output_file, 'w') as out:
-            json.dump(data, out)
+            yield item, e, None
+
+
+def _commit_snapshots(snapshots, pending):
+    for key, hashes in pending:
+        snapshots.commit(key, hashes)
+    del pending[:]
+
+
+def _scrape_items(scraper, scraper_type, items, output_file, snapshots, fields=None):
+    # Snapshots are only committed once their deltas are fsynced
+    pending = []
+    with open(output_file, 'a') as out:
+        synced = time.time()
+        for item, result, snapshot in _scrape_batch(scraper, scraper_type, items, snapshots, fields):
+            if isinstance(result, Exception):
+                logger.error("%s could not be scraped: %s", item, result,
+                             exc_info=result)
+                continue
+            out.write(json.dumps({'item': item, 'data': result}) + '\n')
+            out.flush()
+            if snapshot:
+                pending.append(snapshot)
+            if time.time() - synced >= FSYNC_INTERVAL:
+                os.fsync(out.fileno())
+                _commit_snapshots(snapshots, pending)
+                synced = time.time()
+        os.fsync(out.fileno())
+        _commit_snapshots(snapshots, pending)
+
+
+def _heartbeat(queue, worker, stop):
+    while not stop.wait(queue.lease_seconds / 3):
+        try:
+            queue.heartbeat(worker)
+        except Exception as e:
+            logger.warning("Could not renew the leases of %s: %s", worker, e)
+
+
+def scrape_from_queue(scraper_type, queue, worker=None, batch=None, wait=True, poll_interval=5,
+                      snapshots=None, pool=None, fields=None, **scraper_kwargs):
+    """Scrape items claimed from a WorkQueue until it is finished, storing
+    each result in the queue. Run it on as many hosts as the queue's storage
+    is shared with.
+
+    Params:
+        - scraper_type {Scraper}: ProfileScraper, CompanyScraper or
+        ConnectionScraper
+        - queue {WorkQueue|str}: queue (or its database file)
+        - worker {str}: name this worker's leases are held under (default:
+        unique to the host and process)
+        - batch {int}: items to claim at once (default: the scraper's tabs)
+        - wait {bool}: once no items are pending, keep polling for leases of
+        other workers to expire rather than returning
+        - poll_interval {float}: seconds between polls while waiting
+        - snapshots, pool, fields, **scraper_kwargs: see scrape_job
+
+    Returns:
+        {int}: the number of items this worker scraped
+    """
+    if isinstance(queue, str):
+        queue = WorkQueue(queue)
+    if isinstance(snapshots, str):
+        snapshots = SnapshotStore(snapshots)
+    worker = worker or worker_name()
+    if queue.finished():
+        return 0
+    if pool:
+        with pool.lease(scraper_type, **scraper_kwargs) as scraper:
+            return _scrape_queue_items(scraper, scraper_type, queue, worker, batch,
+                                       wait, poll_interval, snapshots, fields)
+    with scraper_type(**scraper_kwargs) as scraper:
+        return _scrape_queue_items(scraper, scraper_type, queue, worker, batch,
+                                   wait, poll_interval, snapshots, fields)
+
+
+def _scrape_queue_items(scraper, scraper_type, queue, worker, batch, wait, poll_interval,
+                        snapshots, fields):
+    scraped = 0
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(queue, worker, stop), daemon=True)
+    heartbeat.start()
+    try:
+        while True:
+            items = queue.claim(worker, batch or scraper.tabs)
+            if not items:
+                if wait and not queue.finished():
+                    time.sleep(poll_interval)
+                    continue
+                return scraped
+            for item, result, snapshot in _scrape_batch(scraper, scraper_type, items,
+                                                        snapshots, fields):
+                if isinstance(result, Exception):
+                    logger.error("%s could not be scraped: %s", item, result,
+                                 exc_info=result)
+                    queue.fail(worker, item, result)
+                elif queue.complete(worker, item, result):
+                    if snapshot:
+                        snapshots.commit(*snapshot)
+                    scraped += 1
+    finally:
+        stop.set()
+        # Hand back anything claimed but not scraped, eg. on KeyboardInterrupt
+        queue.release(worker)
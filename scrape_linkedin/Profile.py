@@ -1,11 +1,21 @@
 import logging
 from typing import List
 
-from .ResultsObject import ResultsObject
+from .ResultsObject import ResultsObject, memoized_property
 from .utils import *
 
 logger = logging.getLogger(__name__)
 
+TOP_CARD_SELECTOR = '.pv-top-card'
+CONTACT_INFO_SELECTOR = '.pv-contact-info'
+ABOUT_SELECTOR = '.pv-about-section'
+ACTIVITY_SELECTOR = '.pv-recent-activity-section-v2'
+BACKGROUND_SELECTOR = '.background-section'
+SKILL_SELECTOR = '.pv-skill-category-entity__skill-wrapper'
+ACCOMPLISHMENTS_SELECTOR = '.pv-accomplishments-section'
+INTERESTS_SELECTOR = '.pv-interests-section'
+RECOMMENDATIONS_SELECTOR = 'section.pv-recommendations-section'
+
 
 class Profile(ResultsObject):
     """Linkedin User Profile Object"""
@@ -13,15 +23,30 @@ class Profile(ResultsObject):
     attributes = ['personal_info', 'experiences',
                   'skills', 'accomplishments', 'interests', 'recommendations']
 
-    @property
+    # Top level containers each attribute reads from, used for partial parsing
+    section_selectors = {
+        'personal_info': [TOP_CARD_SELECTOR, CONTACT_INFO_SELECTOR,
+                          ABOUT_SELECTOR, ACTIVITY_SELECTOR],
+        'experiences': [BACKGROUND_SELECTOR],
+        'skills': [SKILL_SELECTOR],
+        'accomplishments': [ACCOMPLISHMENTS_SELECTOR],
+        'interests': [INTERESTS_SELECTOR],
+        'recommendations': [RECOMMENDATIONS_SELECTOR]
+    }
+
+    snapshot_sections = ['personal_info', 'experiences.jobs', 'experiences.education',
+                         'experiences.volunteering', 'skills', 'accomplishments', 'interests',
+                         'recommendations.received', 'recommendations.given']
+
+    @memoized_property
     def personal_info(self):
         logger.info("Trying to determine the 'personal_info' property")
         """Return dict of personal info about the user"""
         personal_info = dict.fromkeys(['name', 'headline', 'company', 'school', 'location',
                                       'summary', 'image', 'followers', 'email', 'phone', 'connected', 'websites'])
         try:
-            top_card = one_or_default(self.soup, '.pv-top-card')
-            contact_info = one_or_default(self.soup, '.pv-contact-info')
+            top_card = one_or_default(self.soup, TOP_CARD_SELECTOR)
+            contact_info = one_or_default(self.soup, CONTACT_INFO_SELECTOR)
 
             # Note that some of these selectors may have multiple selections, but
             # get_info takes the first match
@@ -34,7 +59,7 @@ class Profile(ResultsObject):
             })}
 
             summary = text_or_default(
-                self.soup, '.pv-about-section', '').replace('... see more', '')
+                self.soup, ABOUT_SELECTOR, '').replace('... see more', '')
 
             personal_info['summary'] = re.sub(
                 r"^About", "", summary, flags=re.IGNORECASE).strip()
@@ -56,8 +81,7 @@ class Profile(ResultsObject):
 
             personal_info['image'] = image_url
 
-            activity_section = one_or_default(self.soup,
-                                              '.pv-recent-activity-section-v2')
+            activity_section = one_or_default(self.soup, ACTIVITY_SELECTOR)
 
             followers_text = ''
             if activity_section:
@@ -95,7 +119,7 @@ class Profile(ResultsObject):
         finally:
             return personal_info
 
-    @property
+    @memoized_property
     def experiences(self):
         """
         Returns:
@@ -108,7 +132,7 @@ class Profile(ResultsObject):
         experiences = dict.fromkeys(
             ['jobs', 'education', 'volunteering'], [])
         try:
-            container = one_or_default(self.soup, '.background-section')
+            container = one_or_default(self.soup, BACKGROUND_SELECTOR)
 
             jobs = all_or_default(
                 container, '#experience-section ul .pv-position-entity')
@@ -132,7 +156,7 @@ class Profile(ResultsObject):
         finally:
             return experiences
 
-    @property
+    @memoized_property
     def skills(self):
         """
         Returns:
@@ -140,7 +164,7 @@ class Profile(ResultsObject):
             endorsement quantity.
         """
         logger.info("Trying to determine the 'skills' property")
-        skills = self.soup.select('.pv-skill-category-entity__skill-wrapper')
+        skills = all_or_default(self.soup, SKILL_SELECTOR)
         skills = list(map(get_skill_info, skills))
 
         # Sort skills based on endorsements.  If the person has no endorsements
@@ -148,7 +172,7 @@ class Profile(ResultsObject):
             x['endorsements'].replace('+', '')) if x['endorsements'] else 0
         return sorted(skills, key=sort_skills, reverse=True)
 
-    @property
+    @memoized_property
     def accomplishments(self):
         """
         Returns:
@@ -170,8 +194,7 @@ class Profile(ResultsObject):
             'test_scores', 'languages', 'organizations'
         ])
         try:
-            container = one_or_default(
-                self.soup, '.pv-accomplishments-section')
+            container = one_or_default(self.soup, ACCOMPLISHMENTS_SELECTOR)
             for key in accomplishments:
                 accs = all_or_default(
                     container, 'section.' + key + ' ul > li')
@@ -183,7 +206,7 @@ class Profile(ResultsObject):
         finally:
             return accomplishments
 
-    @property
+    @memoized_property
     def interests(self):
         """
         Returns:
@@ -192,7 +215,7 @@ class Profile(ResultsObject):
         logger.info("Trying to determine the 'interests' property")
         interests = []
         try:
-            container = one_or_default(self.soup, '.pv-interests-section')
+            container = one_or_default(self.soup, INTERESTS_SELECTOR)
             interests = all_or_default(container, 'ul > li')
             interests = list(map(lambda i: text_or_default(
                 i, '.pv-entity__summary-title'), interests))
@@ -201,13 +224,13 @@ class Profile(ResultsObject):
         finally:
             return interests
 
-    @property
+    @memoized_property
     def recommendations(self):
         logger.info("Trying to determine the 'recommendations' property")
-        recs = dict.fromkeys(['received', 'given'], [])
+        # Separate lists: dict.fromkeys would share one between both keys
+        recs = {'received': [], 'given': []}
         try:
-            rec_block = one_or_default(
-                self.soup, 'section.pv-recommendations-section')
+            rec_block = one_or_default(self.soup, RECOMMENDATIONS_SELECTOR)
             received, given = all_or_default(
                 rec_block, 'div.artdeco-tabpanel')
             for rec_received in all_or_default(received, "li.pv-recommendation-entity"):
@@ -221,7 +244,7 @@ class Profile(ResultsObject):
         finally:
             return recs
 
-    def to_dict(self):
+    def to_dict(self, fields=None):
         logger.info(
             "Attempting to turn return a dictionary for the Profile object.")
-        return super(Profile, self).to_dict()
+        return super(Profile, self).to_dict(fields)
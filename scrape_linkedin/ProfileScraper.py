@@ -5,6 +5,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from . import voyager
 from .ConnectionScraper import ConnectionScraper
 from .Profile import Profile
 from .Scraper import Scraper
@@ -16,25 +17,137 @@ logger = logging.getLogger(__name__)
 class ProfileScraper(Scraper):
     """
     Scraper for Personal LinkedIn Profiles. See inherited Scraper class for
-    details about the constructor.
+    details about the other constructor arguments.
+
+    Params:
+        - contact_info {str}: how the contact info overlay is loaded
+            - 'click': click the profile's 'Contact info' link (default)
+            - 'overlay': load the overlay's own url once the profile has
+            been scraped, without looking for the link
+            - 'tab': load the overlay's url in a background tab while the
+            profile is scrolled through, so it's ready when needed
+            - 'skip': don't load it. The e-mail, phone, connection date and
+            websites in personal_info are then empty, but refreshing just the
+            top card (eg. fields=['personal_info']) loads a single page.
+        - contact_info_timeout {float}: time to wait (s) for the contact info
+        overlay to load from its url, with the 'overlay' and 'tab' strategies.
+        'click' waits for timeout, like the rest of the page.
     """
     MAIN_SELECTOR = '.scaffold-layout__main'
     ERROR_SELECTOR = '.profile-unavailable'
+    CONTACT_INFO_SELECTOR = '.pv-contact-info'
+    READY_SELECTORS = [MAIN_SELECTOR, ERROR_SELECTOR]
+    CONTACT_INFO_STRATEGIES = ('click', 'overlay', 'tab', 'skip')
+    # Work the browser has to do for each Profile attribute to be rendered:
+    #   - 'scroll': scroll to the bottom, expanding sections on the way
+    #   - 'expand': expand the sections in view, without scrolling
+    #   - 'recommendations': open the 'given' recommendations tab
+    #   - 'contact_info': open the contact info overlay, unless the
+    #   contact_info strategy is 'skip'
+    FIELD_ACTIONS = {
+        'personal_info': {'expand', 'contact_info'},
+        'experiences': {'scroll'},
+        'skills': {'scroll'},
+        'accomplishments': {'scroll'},
+        'interests': {'scroll'},
+        'recommendations': {'scroll', 'recommendations'}
+    }
 
-    def scrape_by_email(self, email):
-        self.load_profile_page(
-            'https://www.linkedin.com/sales/gmail/profile/proxy/{}'.format(email))
-        return self.get_profile()
+    def __init__(self, *args, contact_info='click', contact_info_timeout=5, **kwargs):
+        if contact_info not in self.CONTACT_INFO_STRATEGIES:
+            raise ValueError("contact_info must be one of: {}".format(
+                ', '.join(self.CONTACT_INFO_STRATEGIES)))
+        super(ProfileScraper, self).__init__(*args, **kwargs)
+        self.contact_info = contact_info
+        self.contact_info_timeout = contact_info_timeout
+        # Handles of the profile's tab and the background tab the contact
+        # info overlay is loading in, with the 'tab' strategy
+        self._contact_info_tabs = None
 
-    def scrape(self, url='', user=None):
-        self.load_profile_page(url, user)
-        return self.get_profile()
+    def scrape_by_email(self, email, fields=None):
+        url = 'https://www.linkedin.com/sales/gmail/profile/proxy/{}'.format(email)
+        if self.capture:
+            return self.capture_profile(url, fields)
+        self.load_profile_page(url, fields=fields)
+        return self.get_profile(fields)
 
-    def load_profile_page(self, url='', user=None):
-        """Load profile page and all async content
+    def scrape(self, url='', user=None, fields=None):
+        """Scrape a profile
 
         Params:
-            - url {str}: url of the profile to be loaded
+            - url {str}: url of the profile
+            - user {str}: username of the profile, instead of its url
+            - fields {list}: Profile attributes to scrape (default: all).
+            Sections of the page that no field needs aren't loaded or expanded.
+        """
+        if self.capture:
+            return self.capture_profile(self.profile_url(url, user), fields)
+        self.load_profile_page(url, user, fields)
+        return self.get_profile(fields)
+
+    def start_item(self, user, fields=None):
+        url = self.profile_url(user=user)
+        if self.capture:
+            self.start_capture()
+            url = self.capture_url(url, fields)
+        self.actions_for(fields)
+        self.start_loading(url)
+
+    def finish_item(self, user, fields=None):
+        if self.capture:
+            return self.finish_capture(self.profile_url(user=user), fields)
+        self.wait_for_profile(fields)
+        return self.get_profile(fields)
+
+    def capture_profile(self, url, fields=None):
+        """Scrape a profile from the JSON responses its page loads, without
+        scrolling or parsing html, see Scraper(capture=True)"""
+        self.start_capture()
+        self.get(self.capture_url(url, fields))
+        return self.finish_capture(url, fields)
+
+    def capture_url(self, url, fields=None):
+        """Url to load for the data of fields of the profile at url"""
+        if isinstance(fields, str):
+            fields = [fields]
+        uncaptured = [f for f in fields or [] if f in voyager.UNCAPTURED_PROFILE_FIELDS]
+        if uncaptured:
+            raise ValueError("{} can't be scraped in capture mode".format(', '.join(uncaptured)))
+        # The contact info overlay's url loads the profile as well
+        if 'contact_info' in self.actions_for(fields):
+            return self.contact_info_url(url) or url
+        return url
+
+    def finish_capture(self, url, fields=None):
+        """Build the Profile at url from the responses captured while it
+        loaded in the current tab"""
+        self.wait_for_profile(actions=set())
+        public_id = None
+        if 'com/in/' in url:
+            public_id = url.split('com/in/')[1].split('/')[0].split('?')[0]
+        data = self.capture_data(
+            lambda responses: voyager.profile_from_voyager(responses, public_id))
+        return Profile.from_dict(data, fields)
+
+    def actions_for(self, fields=None):
+        """Return the browser work needed to render fields (default: every
+        Profile attribute), see FIELD_ACTIONS"""
+        if isinstance(fields, str):
+            fields = [fields]
+        if fields is None:
+            fields = self.FIELD_ACTIONS
+        unknown = [f for f in fields if f not in self.FIELD_ACTIONS]
+        if unknown:
+            raise ValueError("Unknown field(s) {}. Must be one of: {}".format(
+                ', '.join(unknown), ', '.join(self.FIELD_ACTIONS)))
+        actions = set().union(*(self.FIELD_ACTIONS[f] for f in fields))
+        if self.contact_info == 'skip':
+            actions.discard('contact_info')
+        return actions
+
+    def profile_url(self, url='', user=None):
+        """Return the url of a profile
+
         Raises:
             ValueError: If link doesn't match a typical profile url
         """
@@ -43,10 +156,29 @@ class ProfileScraper(Scraper):
         if 'com/in/' not in url and 'sales/gmail/profile/proxy/' not in url:
             raise ValueError(
                 "Url must look like... .com/in/NAME or... '.com/sales/gmail/profile/proxy/EMAIL")
+        return url
 
+    def load_profile_page(self, url='', user=None, fields=None):
+        """Load profile page and all async content
+
+        Params:
+            - url {str}: url of the profile to be loaded
+            - fields {list}: only load the content needed for these Profile
+            attributes (default: all)
+        Raises:
+            ValueError: If link doesn't match a typical profile url
+        """
+        url = self.profile_url(url, user)
+        actions = self.actions_for(fields)
         logger.debug("Scraping profile for URL %s", url)
+        self.get(url)
+        self.wait_for_profile(fields, actions)
 
-        self.driver.get(url)
+    def wait_for_profile(self, fields=None, actions=None):
+        """Wait for the profile in the current tab to load, then load the
+        async content needed for fields (default: all of it)"""
+        if actions is None:
+            actions = self.actions_for(fields)
         # Wait for page to load dynamically via javascript
         try:
             myElem = WebDriverWait(self.driver, self.timeout).until(AnyEC(
@@ -71,9 +203,15 @@ class ProfileScraper(Scraper):
         except:
             raise ValueError(
                 'Profile Unavailable: Profile link does not match any current Linkedin Profiles')
-        # Scroll to the bottom of the page incrementally to load any lazy-loaded content
-        self.scroll_to_bottom()
-        self.expand_given_recommendations()
+        if self.contact_info == 'tab' and 'contact_info' in actions:
+            self.prefetch_contact_info()
+        if 'scroll' in actions:
+            # Scroll to the bottom of the page incrementally to load any lazy-loaded content
+            self.scroll_to_bottom()
+        elif 'expand' in actions:
+            self.click_expandable_buttons()
+        if 'recommendations' in actions:
+            self.expand_given_recommendations()
 
     def expand_given_recommendations(self):
         try:
@@ -88,7 +226,9 @@ class ProfileScraper(Scraper):
         except:
             pass
 
-    def get_profile(self):
+    def get_profile(self, fields=None):
+        """Return the Profile in the current tab, with its contact info if
+        fields (default: all Profile attributes) need it"""
         try:
             profile = self.driver.find_element_by_css_selector(
                 self.MAIN_SELECTOR).get_attribute("outerHTML")
@@ -96,21 +236,78 @@ class ProfileScraper(Scraper):
             logger.exception(
                 "Could not find profile wrapper html. This sometimes happens for exceptionally long profiles.  Try decreasing scroll-increment. The actual error was: %s", e)
             raise e
-        contact_info = self.get_contact_info()
-        return Profile(profile + contact_info)
+        url = self.driver.current_url
+        contact_info = ''
+        if 'contact_info' in self.actions_for(fields):
+            contact_info = self.get_contact_info()
+        if self.archive:
+            self.archive.add('profile', {'profile': profile + contact_info},
+                             url=url)
+        return Profile(profile + contact_info, fields=fields)
+
+    def contact_info_url(self, url=None):
+        """Url of the contact info overlay of the profile at url (default: in
+        the current tab), or None if it doesn't have one (eg. e-mail lookups)"""
+        url = (url or self.driver.current_url).split('?')[0].split('#')[0]
+        if 'com/in/' not in url:
+            return None
+        return url.rstrip('/') + '/overlay/contact-info/'
+
+    def prefetch_contact_info(self):
+        """Start loading the contact info overlay of the profile in the
+        current tab in a new background tab, see get_contact_info"""
+        self._close_contact_info_tab()
+        url = self.contact_info_url()
+        if not url:
+            return
+        handles = self.open_tabs(2)
+        self.driver.switch_to.window(handles[1])
+        self.start_loading(url)
+        self.driver.switch_to.window(handles[0])
+        self._contact_info_tabs = handles
+
+    def _close_contact_info_tab(self):
+        if self._contact_info_tabs:
+            handles, self._contact_info_tabs = self._contact_info_tabs, None
+            self.close_tabs(handles)
+
+    def _read_contact_info(self, timeout):
+        return WebDriverWait(self.driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, self.CONTACT_INFO_SELECTOR))
+        ).get_attribute('outerHTML')
 
     def get_contact_info(self):
+        """Return the html of the profile's contact info overlay, loaded with
+        the contact_info strategy, or an empty string if it didn't load"""
+        if self.contact_info == 'click':
+            return self.click_contact_info()
+        try:
+            if self._contact_info_tabs:
+                self.driver.switch_to.window(self._contact_info_tabs[1])
+            else:
+                url = self.contact_info_url()
+                if not url:
+                    return self.click_contact_info()
+                self.get(url)
+            return self._read_contact_info(self.contact_info_timeout)
+        except Exception as e:
+            logger.warning(
+                "Failed to load the contact info overlay. Returning an empty string. %s", e)
+            return ""
+        finally:
+            self._close_contact_info_tab()
+
+    def click_contact_info(self):
         try:
             # Scroll to top to put clickable button in view
             self.driver.execute_script("window.scrollTo(0, 0);")
             button = self.driver.find_element_by_partial_link_text(
                 'Contact info')
             button.click()
-            contact_info = self.wait_for_el('.pv-contact-info')
-            return contact_info.get_attribute('outerHTML')
+            return self._read_contact_info(self.timeout)
         except Exception as e:
             logger.warning(
-                "Failed to open/get contact info HTML. Returning an empty string.", e)
+                "Failed to open/get contact info HTML. Returning an empty string. %s", e)
             return ""
 
     def get_mutual_connections(self):
@@ -122,6 +319,6 @@ class ProfileScraper(Scraper):
                 "Could not find a mutual connections link. Returning an empty list.")
             return []
         with ConnectionScraper(scraperInstance=self) as cs:
-            cs.driver.get(link.get_attribute('href'))
+            cs.get(link.get_attribute('href'))
             cs.wait_for_el('.search-s-facet--facetNetwork form button')
             return cs.scrape_all_pages()
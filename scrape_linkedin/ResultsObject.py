@@ -1,15 +1,140 @@
+import functools
 import logging
 
-from bs4 import BeautifulSoup
+from . import instrumentation
+from .records import to_plain
+from .utils import class_strainer, make_soup, release_soup
 
 logger = logging.getLogger(__name__)
 
 
+def memoized_property(fn):
+    """Property that is computed at most once per ResultsObject instance.
+
+    Values are stored in the instance's `_cache` dict keyed by attribute name.
+    An attribute that raises is not cached, so it will be retried on the next
+    access.
+    """
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def getter(self):
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        if self._available_fields is not None and name not in self._available_fields:
+            raise ValueError(
+                "'{}' is unavailable: it was not in the fields given to a partially parsed or released object".format(name))
+        if instrumentation.is_enabled():
+            with instrumentation.attribute(name):
+                value = fn(self)
+        else:
+            value = fn(self)
+        self._cache[name] = value
+        return value
+    return property(getter)
+
+
 class ResultsObject(object):
     attributes = []
+    # attribute -> list of selectors for the top level elements it reads from
+    section_selectors = {}
+    # names of the instance attributes holding parsed soups
+    soup_attributes = ['soup']
+    # dotted paths into to_dict() that are hashed and diffed separately, see
+    # SnapshotStore. A section excludes any of its keys listed separately.
+    snapshot_sections = []
+
+    def __init__(self, body, parser=None, fields=None, partial=False, release=False):
+        """
+        Params:
+            - body {str|file}: html to parse
+            - parser {str}: tree builder to use, see utils.make_soup
+            - fields {list}: attributes returned by to_dict (default: all)
+            - partial {bool}: only build the subtrees needed by `fields`.
+            Other attributes are unavailable on a partially parsed object.
+            - release {bool}: extract `fields` immediately and free the soup,
+            see release()
+        """
+        self._init_results(fields)
+        parse_only = None
+        if partial:
+            self._available_fields = self._default_fields()
+            parse_only = self._strainer(self._available_fields)
+        self.soup = make_soup(body, parser, parse_only)
+        if release:
+            self.release()
+
+    @classmethod
+    def from_dict(cls, data, fields=None):
+        """Build a results object from to_dict() output (eg. captured with
+        Scraper(capture=True)) instead of html. Attributes not in data, or
+        not in fields, are unavailable.
+
+        Params:
+            - data {dict}: attribute name -> value
+            - fields {list}: attributes returned by to_dict (default: those
+            in data)
+        """
+        results = cls.__new__(cls)
+        if fields is None:
+            fields = [a for a in cls.attributes if a in data]
+        results._init_results(fields)
+        results._cache = {a: data[a] for a in results.fields if a in data}
+        results._available_fields = list(results._cache)
+        for attr in cls.soup_attributes:
+            setattr(results, attr, None)
+        return results
 
-    def __init__(self, body):
-        self.soup = BeautifulSoup(body, 'html.parser')
+    def _init_results(self, fields=None):
+        """Set up the attribute cache and the default set of fields returned
+        by to_dict"""
+        self._cache = {}
+        self._available_fields = None
+        self.fields = self._check_fields(fields)
+
+    def _default_fields(self):
+        """The fields given to the constructor, or every attribute if none
+        were. An empty list means no fields."""
+        return self.attributes if self.fields is None else self.fields
+
+    def release(self):
+        """Extract `fields` (every attribute by default) now, then destroy the
+        parsed soups, keeping only the extracted values. Use this when holding on
+        to many results objects.
+
+        Attributes that weren't extracted are unavailable afterwards, and any
+        that failed to extract are None.
+        """
+        fields = self._default_fields()
+        for field in fields:
+            self._cache[field] = self._get_attr_or_none(field)
+        self._available_fields = list(fields)
+        for attr in self.soup_attributes:
+            release_soup(getattr(self, attr, None))
+            setattr(self, attr, None)
+
+    def _strainer(self, fields):
+        selectors = []
+        for field in fields:
+            if field not in self.section_selectors:
+                raise ValueError(
+                    "Partial parsing is not supported for '{}'".format(field))
+            selectors += self.section_selectors[field]
+        return class_strainer(selectors)
+
+    def _check_fields(self, fields):
+        if fields is None:
+            return None
+        if isinstance(fields, str):
+            fields = [fields]
+        fields = list(fields)
+        unknown = [f for f in fields if f not in self.attributes]
+        if unknown:
+            raise ValueError("Unknown field(s) {}. Must be one of: {}".format(
+                ', '.join(unknown), ', '.join(self.attributes)))
+        return fields
 
     def _get_attr_or_none(self, attr):
         try:
@@ -18,10 +143,20 @@ class ResultsObject(object):
             logger.error("Failed to get attribute '%s': %s", attr, e)
             return None
 
-    def to_dict(self):
-        keys = self.attributes
-        vals = map(self._get_attr_or_none, self.attributes)
-        return dict(zip(self.attributes, vals))
+    def to_dict(self, fields=None):
+        """Return a dict of attribute name -> value
+
+        Params:
+            - fields {list}: attributes to evaluate. Defaults to the fields
+            given to the constructor, or every attribute if none were given
+
+        Records (see records.py) in the values are converted to plain dicts
+        on each call, rather than kept alongside the records.
+        """
+        keys = self._check_fields(fields)
+        if keys is None:
+            keys = self._default_fields()
+        return {key: to_plain(self._get_attr_or_none(key)) for key in keys}
 
     def __dict__(self):
         return self.to_dict()
@@ -1,3 +1,4 @@
+import json
 import logging
 import time
 from abc import abstractmethod
@@ -6,12 +7,47 @@ from os import environ
 import selenium.webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from . import scripts, voyager
+from .browser import (LINKEDIN_URL, block_urls, capture_options, export_session,
+                      restore_session, set_cookies)
+from .HtmlArchive import HtmlArchive
+
 logger = logging.getLogger(__name__)
 
 
+class BrowserSession(object):
+    """How a browser gets logged in to linkedin: with LI_EMAIL/LI_PASS, a
+    session exported from another browser, or the li_at cookie. Shared by every
+    scraper using the same driver, so it is only started once."""
+
+    def __init__(self, cookie=None, credentials=None, state=None):
+        self.cookie = cookie
+        self.credentials = credentials
+        self.state = state
+        self.started = False
+
+    def start(self, scraper):
+        if self.started:
+            return
+        if self.credentials:
+            scraper.driver.get(LINKEDIN_URL)
+            scraper.login(*self.credentials)
+        elif self.state:
+            restore_session(scraper.driver, self.state)
+        else:
+            set_cookies(scraper.driver, [{
+                'name': 'li_at',
+                'value': self.cookie,
+                'domain': '.linkedin.com'
+            }])
+        # Only once logged in, so that a failed attempt is retried
+        self.started = True
+
+
 class Scraper(object):
     """
     Wrapper for selenium Chrome driver with methods to scroll through a page and
@@ -20,13 +56,77 @@ class Scraper(object):
     Params:
         - cookie {str}: li_at session cookie required to scrape linkedin profiles
         - driver {webdriver}: driver to be used for scraping
+        - driver_options {dict}: kwargs for the driver constructor. May also
+        hold 'blocked_urls', url patterns the browser should not load (see
+        browser.lean_options)
         - scroll_pause {float}: amount of time to pause (s) while incrementally
-        scrolling through the page
+        scrolling through the page (with the 'fixed' wait_strategy)
         - scroll_increment {int}: pixel increment for scrolling
         - timeout {float}: time to wait for page to load first batch of async content
+        - archive {HtmlArchive|str}: archive (or archive directory) to store
+        the raw html of every scraped page in, see HtmlArchive
+        - scroll_mode {str}: how scroll_to_bottom loads lazy content
+            - 'incremental': scroll and click expanders from python, one
+            webdriver round trip per step (default)
+            - 'async': run the whole scroll-and-expand loop inside the page,
+            in a single execute_async_script call
+        - wait_strategy {str}: how long to wait for content after each scroll
+            - 'fixed': sleep scroll_pause (default)
+            - 'adaptive': wait until no network request is in flight and no
+            element has been added for QUIET_PERIOD, for at most max_wait.
+            Realtime requests, and any that take over a second, are not
+            waited for (see scripts.ACTIVITY_MONITOR)
+        - max_wait {float}: longest time (s) to wait after a scroll with the
+        'adaptive' wait_strategy
+        - lazy_session {bool}: log in on the first get() rather than now, see
+        BrowserSession
+        - session {dict|str}: session from export_session (or a JSON file it
+        was saved to) to log in with instead of the cookie
+        - tabs {int}: number of pages scrape_many loads at once, each in its
+        own tab of the browser
+        - capture {bool}: build results from the JSON responses linkedin's
+        pages load their data from, recorded by Chrome, instead of scrolling
+        through and parsing the rendered html (see voyager)
     """
+    SCROLL_MODES = ('incremental', 'async')
+    WAIT_STRATEGIES = ('fixed', 'adaptive')
+    # Maximum time (s) the 'async' scroll mode may run for
+    ASYNC_SCROLL_TIMEOUT = 120
+    # Time (s) without network requests or DOM changes after which the
+    # 'adaptive' wait_strategy considers a page loaded
+    QUIET_PERIOD = 0.15
+    # Time (s) between checks of whether any tab has finished loading
+    TAB_POLL_INTERVAL = 0.05
+    # Time (s) without new API responses after which capture mode considers
+    # the data of a page loaded
+    CAPTURE_QUIET_PERIOD = 0.5
+    # Elements that show a page has loaded, for scrape_many (default: wait
+    # for the load event)
+    READY_SELECTORS = []
+
+    EXPANDABLE_BUTTON_SELECTORS = [
+        'button[aria-expanded="false"].pv-skills-section__additional-skills',
+        'button[aria-expanded="false"].pv-profile-section__see-more-inline',
+        'button[aria-expanded="false"].pv-top-card-section__summary-toggle-button',
+        'button[aria-expanded="false"].inline-show-more-text__button',
+        'button[data-control-name="contact_see_more"]'
+    ]
+    # Invisible 'see more...' elements, which can only be clicked from javascript
+    LINE_CLAMP_SELECTOR = '.lt-line-clamp__ellipsis:not(.lt-line-clamp__ellipsis--dummy) .lt-line-clamp__more'
 
-    def __init__(self, cookie=None, scraperInstance=None, driver=selenium.webdriver.Chrome, driver_options={}, scroll_pause=0.1, scroll_increment=300, timeout=10):
+    def __init__(self, cookie=None, scraperInstance=None, driver=selenium.webdriver.Chrome, driver_options={}, scroll_pause=0.1, scroll_increment=300, timeout=10, archive=None, scroll_mode='incremental', wait_strategy='fixed', max_wait=2, lazy_session=False, session=None, tabs=1, capture=False):
+        if scroll_mode not in self.SCROLL_MODES:
+            raise ValueError("scroll_mode must be one of: {}".format(
+                ', '.join(self.SCROLL_MODES)))
+        if wait_strategy not in self.WAIT_STRATEGIES:
+            raise ValueError("wait_strategy must be one of: {}".format(
+                ', '.join(self.WAIT_STRATEGIES)))
+        if tabs < 1:
+            raise ValueError('tabs must be at least 1')
+        if capture and isinstance(driver, type) and issubclass(driver, RemoteWebDriver) \
+                and not issubclass(driver, selenium.webdriver.Chrome):
+            raise ValueError('capture mode needs Chrome, whose performance log it reads')
+        self._script_timeout = None
         if type(self) is Scraper:
             raise Exception(
                 'Scraper is an abstract class and cannot be instantiated directly')
@@ -37,29 +137,48 @@ class Scraper(object):
             self.scroll_increment = scraperInstance.scroll_increment
             self.timeout = scraperInstance.timeout
             self.scroll_pause = scraperInstance.scroll_pause
+            self.archive = scraperInstance.archive
+            self.scroll_mode = scraperInstance.scroll_mode
+            self.wait_strategy = scraperInstance.wait_strategy
+            self.max_wait = scraperInstance.max_wait
+            self.session = scraperInstance.session
+            self.tabs = scraperInstance.tabs
+            self.capture = scraperInstance.capture
             return
 
+        if isinstance(session, str):
+            with open(session, 'r') as f:
+                session = json.load(f)
+        if session:
+            self.session = BrowserSession(state=session)
+        elif 'LI_EMAIL' in environ and 'LI_PASS' in environ:
+            self.session = BrowserSession(
+                credentials=(environ['LI_EMAIL'], environ['LI_PASS']))
+        elif not cookie and 'LI_AT' not in environ:
+            raise ValueError(
+                'Must either define LI_AT environment variable, or pass a cookie string to the Scraper')
+        else:
+            self.session = BrowserSession(cookie=cookie or environ['LI_AT'])
+
         self.was_passed_instance = False
+        driver_options = capture_options(driver_options) if capture else dict(driver_options)
+        blocked_urls = driver_options.pop('blocked_urls', None)
         self.driver = driver(**driver_options)
+        if blocked_urls:
+            block_urls(self.driver, blocked_urls)
         self.scroll_pause = scroll_pause
         self.scroll_increment = scroll_increment
         self.timeout = timeout
-        self.driver.get('https://www.linkedin.com')
+        self.scroll_mode = scroll_mode
+        self.wait_strategy = wait_strategy
+        self.max_wait = max_wait
+        self.tabs = tabs
+        self.capture = capture
+        self.archive = HtmlArchive(archive) if isinstance(
+            archive, str) else archive
         self.driver.set_window_size(1920, 1080)
-
-        if 'LI_EMAIL' in environ and 'LI_PASS' in environ:
-            self.login(environ['LI_EMAIL'], environ['LI_PASS'])
-        else:
-            if not cookie and 'LI_AT' not in environ:
-                raise ValueError(
-                    'Must either define LI_AT environment variable, or pass a cookie string to the Scraper')
-            elif not cookie:
-                cookie = environ['LI_AT']
-            self.driver.add_cookie({
-                'name': 'li_at',
-                'value': cookie,
-                'domain': '.linkedin.com'
-            })
+        if not lazy_session:
+            self.session.start(self)
 
     @abstractmethod
     def scrape(self):
@@ -74,6 +193,183 @@ class Scraper(object):
         password_input.send_keys(password)
         password_input.send_keys(Keys.ENTER)
 
+    def get(self, url):
+        """Load url, logging the browser in first if that hasn't happened yet"""
+        self.session.start(self)
+        self.driver.get(url)
+
+    def start_loading(self, url):
+        """Start loading url in the current tab without waiting for it, see
+        page_ready"""
+        self.session.start(self)
+        self.driver.execute_script(scripts.START_NAVIGATION, url)
+
+    def start_capture(self):
+        """Forget the responses captured so far, before loading a page to
+        capture the responses of"""
+        self.driver.get_log('performance')
+
+    def capture_data(self, extract):
+        """Wait for the page in the current tab to load the data of the item
+        being scraped, see start_capture. Once the item itself has arrived,
+        waits for its sections' requests until none has been answered for
+        CAPTURE_QUIET_PERIOD, for at most max_wait.
+
+        Params:
+            - extract {function}: extract(responses) maps the captured
+            responses into results, or returns None if they don't hold them
+        Raises:
+            ValueError: if the data didn't load within timeout
+        """
+        responses = []
+        deadline = time.time() + self.timeout
+        while True:
+            responses += voyager.read_responses(self.driver)
+            data = extract(responses)
+            if data is not None:
+                break
+            if time.time() > deadline:
+                raise ValueError(
+                    'No data was captured within {}s'.format(self.timeout))
+            time.sleep(self.TAB_POLL_INTERVAL)
+        # Sections are often loaded by requests of their own, after the main one
+        deadline = time.time() + self.max_wait
+        last_response = time.time()
+        while time.time() < deadline and \
+                time.time() - last_response < self.CAPTURE_QUIET_PERIOD:
+            time.sleep(self.TAB_POLL_INTERVAL)
+            new_responses = voyager.read_responses(self.driver)
+            if new_responses:
+                responses += new_responses
+                last_response = time.time()
+        return extract(responses)
+
+    def page_ready(self):
+        """Whether the page started by start_loading in the current tab has
+        loaded one of READY_SELECTORS"""
+        selector = ', '.join(self.READY_SELECTORS) or None
+        return bool(self.driver.execute_script(scripts.PAGE_READY, selector))
+
+    def open_tabs(self, count):
+        """Return the handles of count tabs: the current one, and count - 1
+        new ones"""
+        handles = [self.driver.current_window_handle]
+        for _ in range(count - 1):
+            known = set(self.driver.window_handles)
+            self.driver.execute_script('window.open("about:blank", "_blank");')
+            handles += [h for h in self.driver.window_handles if h not in known]
+        return handles
+
+    def close_tabs(self, handles):
+        """Close every tab but the first of handles, and switch back to it"""
+        for handle in handles[1:]:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        self.driver.switch_to.window(handles[0])
+
+    @abstractmethod
+    def start_item(self, item, fields=None):
+        """Start loading an item for scrape_many, see start_loading. Scrapers
+        that support scrape_many override this and finish_item."""
+        raise Exception('Must override abstract method start_item')
+
+    @abstractmethod
+    def finish_item(self, item, fields=None):
+        """Finish scraping an item in the current tab once start_item has
+        loaded it, and return the result with fields"""
+        raise Exception('Must override abstract method finish_item')
+
+    def scrape_many(self, items, fields=None):
+        """Scrape several items, loading up to self.tabs of them at once in
+        separate tabs, so that waiting for one page to download overlaps with
+        scraping the others. Each item is what scrape_in_parallel takes for
+        this scraper, eg. a username for ProfileScraper, and fields are the
+        results' attributes to scrape (default: all).
+
+        Yields:
+            {tuple}: (item, result) in the order pages finish loading, where
+            result is the exception raised if item could not be scraped
+        """
+        # Captured responses can't be told apart by tab
+        tabs = 1 if self.capture else self.tabs
+        return self.scrape_in_tabs(items, lambda item: self.start_item(item, fields),
+                                   lambda item: self.finish_item(item, fields), tabs)
+
+    def scrape_in_tabs(self, items, start, finish, tabs):
+        """Scrape items, loading up to tabs of them at once in separate tabs
+
+        Params:
+            - items {iterable}
+            - start {function}: start(item) starts loading item in the current
+            tab, see start_loading
+            - finish {function}: finish(item) scrapes item in the current tab
+            once its page has loaded (or timed out), and returns the result
+            - tabs {int}: number of tabs to use
+
+        Yields:
+            {tuple}: (item, result), see scrape_many
+        """
+        pending = iter(items)
+        # handle -> (item, time loading started)
+        loading = {}
+        failed = []
+
+        def load_next(handle):
+            for item in pending:
+                self.driver.switch_to.window(handle)
+                try:
+                    start(item)
+                except Exception as e:
+                    failed.append((item, e))
+                    continue
+                loading[handle] = (item, time.time())
+                return
+
+        handles = self.open_tabs(tabs)
+        try:
+            for handle in handles:
+                load_next(handle)
+            while loading or failed:
+                while failed:
+                    yield failed.pop(0)
+                if not loading:
+                    break
+                ready = None
+                for handle, (item, started) in loading.items():
+                    self.driver.switch_to.window(handle)
+                    # Slow pages are finished anyway, which waits for them
+                    # and reports a timeout like scrape() would
+                    if self.page_ready() or time.time() - started > self.timeout:
+                        ready = handle
+                        break
+                if ready is None:
+                    time.sleep(self.TAB_POLL_INTERVAL)
+                    continue
+                item, _ = loading.pop(ready)
+                try:
+                    result = finish(item)
+                except Exception as e:
+                    result = e
+                yield item, result
+                load_next(ready)
+        finally:
+            self.close_tabs(handles)
+
+    def export_session(self, path=None):
+        """Return this browser's linkedin session (cookies and localStorage),
+        which other scrapers can log in with through their `session` argument
+        without loading linkedin first
+
+        Params:
+            - path {str}: also save the session to this JSON file
+        """
+        self.session.start(self)
+        state = export_session(self.driver)
+        if path:
+            with open(path, 'w') as f:
+                json.dump(state, f)
+        return state
+
     def get_html(self, url):
         self.load_profile_page(url)
         return self.driver.page_source
@@ -86,6 +382,8 @@ class Scraper(object):
             - scroll_increment {int}: increment size of page scrolls (pixels)
         """
         # NOTE: this starts scrolling from the current scroll position, not the top of the page.
+        if self.scroll_mode == 'async':
+            return self.scroll_to_bottom_async()
         current_height = self.driver.execute_script(
             "return document.documentElement.scrollTop")
         while True:
@@ -99,24 +397,62 @@ class Scraper(object):
                 "window.scrollTo(0, {});".format(new_height))
             current_height = new_height
             # Wait to load page
+            self.pause()
+
+    def pause(self):
+        """Wait for content loaded by the last scroll/click: scroll_pause
+        seconds, or with the 'adaptive' wait_strategy, until the page is quiet
+        """
+        if self.wait_strategy == 'adaptive':
+            self.wait_until_quiet()
+        else:
             time.sleep(self.scroll_pause)
 
+    def wait_until_quiet(self, max_wait=None):
+        """Wait until no network request is in flight and the DOM hasn't
+        changed for QUIET_PERIOD, or for at most max_wait (default:
+        self.max_wait) seconds
+
+        Returns:
+            {float}: time waited (s)
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        self._ensure_script_timeout(max_wait)
+        waited_ms = self.driver.execute_async_script(
+            scripts.WAIT_FOR_QUIET, int(self.QUIET_PERIOD * 1000), int(max_wait * 1000))
+        return waited_ms / 1000
+
+    def _ensure_script_timeout(self, seconds):
+        """Make sure async scripts may run for seconds, without a round trip
+        when the timeout is already long enough"""
+        if self._script_timeout is None or self._script_timeout < seconds:
+            self._script_timeout = seconds + 5
+            self.driver.set_script_timeout(self._script_timeout)
+
+    def scroll_to_bottom_async(self):
+        """Same as scroll_to_bottom, but scrolls and clicks every expandable
+        button from a script running in the page, which returns once the page
+        stops growing. Saves a few webdriver round trips per scroll increment.
+        """
+        self._ensure_script_timeout(self.ASYNC_SCROLL_TIMEOUT)
+        adaptive = self.wait_strategy == 'adaptive'
+        return self.driver.execute_async_script(
+            scripts.SCROLL_AND_EXPAND,
+            self.EXPANDABLE_BUTTON_SELECTORS + [self.LINE_CLAMP_SELECTOR],
+            self.scroll_increment,
+            self.ASYNC_SCROLL_TIMEOUT * 1000,
+            int(self.QUIET_PERIOD * 1000) if adaptive else None,
+            int((self.max_wait if adaptive else self.scroll_pause) * 1000))
+
     def click_expandable_buttons(self):
-        expandable_button_selectors = [
-            'button[aria-expanded="false"].pv-skills-section__additional-skills',
-            'button[aria-expanded="false"].pv-profile-section__see-more-inline',
-            'button[aria-expanded="false"].pv-top-card-section__summary-toggle-button',
-            'button[aria-expanded="false"].inline-show-more-text__button',
-            'button[data-control-name="contact_see_more"]'
-        ]
-        for name in expandable_button_selectors:
+        for name in self.EXPANDABLE_BUTTON_SELECTORS:
             try:
                 self.driver.find_element_by_css_selector(name).click()
             except:
                 pass
-         # Use JQuery to click on invisible expandable 'see more...' elements
+        # Use JQuery to click on invisible expandable 'see more...' elements
         self.driver.execute_script(
-            'document.querySelectorAll(".lt-line-clamp__ellipsis:not(.lt-line-clamp__ellipsis--dummy) .lt-line-clamp__more").forEach(el => el.click())')
+            'document.querySelectorAll(arguments[0]).forEach(el => el.click())', self.LINE_CLAMP_SELECTOR)
 
     def wait(self, condition):
         return WebDriverWait(self.driver, self.timeout).until(condition)
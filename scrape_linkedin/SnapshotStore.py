@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+
+from .HtmlArchive import _write_atomic
+from .ResultsObject import ResultsObject
+
+_MISSING = object()
+
+
+def hash_value(value):
+    """Return a short, key-order independent hash of a JSON-able value"""
+    encoded = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+def _nested(section, sections):
+    """Keys of section that are sections of their own"""
+    prefix = section + '.'
+    return {s[len(prefix):] for s in sections
+            if s.startswith(prefix) and '.' not in s[len(prefix):]}
+
+
+def get_section(data, section, sections=()):
+    """Return the value at a dotted section path of to_dict() output, without
+    any keys that are sections of their own. Returns _MISSING if the path does
+    not exist (eg. the field was not extracted)."""
+    value = data
+    for key in section.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    nested = _nested(section, sections)
+    if nested and isinstance(value, dict):
+        value = {k: v for k, v in value.items() if k not in nested}
+    return value
+
+
+def section_hashes(data, sections):
+    """Return {section: hash} for every section present in data"""
+    hashes = {}
+    for section in sections:
+        value = get_section(data, section, sections)
+        if value is not _MISSING:
+            hashes[section] = hash_value(value)
+    return hashes
+
+
+def diff(previous_hashes, data, sections):
+    """Compare to_dict() output against the section hashes of a previous
+    snapshot
+
+    Returns:
+        {tuple}: (delta, hashes), where delta is {section: new value} for every
+        section that changed (or is new), and hashes are data's section hashes
+    """
+    hashes = section_hashes(data, sections)
+    delta = {section: get_section(data, section, sections)
+             for section, digest in hashes.items()
+             if previous_hashes.get(section) != digest}
+    return delta, hashes
+
+
+def apply_delta(data, delta, sections):
+    """Update a full to_dict() record in place with a delta from diff(), and
+    return it"""
+    # Parents first, so that nested sections are applied on top of them
+    for section in sorted(delta, key=lambda s: s.count('.')):
+        value = delta[section]
+        *parents, last = section.split('.')
+        target = data
+        for key in parents:
+            target = target.setdefault(key, {})
+        existing = target.get(last)
+        nested = _nested(section, sections)
+        if nested and isinstance(value, dict) and isinstance(existing, dict):
+            value = dict(value, **{k: v for k, v in existing.items() if k in nested})
+        target[last] = value
+    return data
+
+
+class SnapshotStore(object):
+    """
+    Remembers the section hashes of the last snapshot of each entity, so that
+    successive scrapes of it can be reduced to the sections that changed.
+
+    Sections are dotted paths into to_dict() output, eg. 'experiences.jobs';
+    see Profile.snapshot_sections and Company.snapshot_sections. Only hashes
+    are stored, one small JSON file per entity.
+
+    Params:
+        - directory {str}: store root, created if necessary
+
+    Instances only hold a path, so they can be shared between processes as
+    long as each entity is only updated by one process at a time.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + '.json')
+
+    def get(self, key):
+        """Return the stored {section: hash} of an entity, or None"""
+        try:
+            with open(self._path(key), 'r') as f:
+                return json.load(f)['hashes']
+        except FileNotFoundError:
+            return None
+
+    def diff(self, key, result, sections=None):
+        """Diff a new snapshot of an entity against the stored one, without
+        storing anything. Pass the returned hashes to commit() once the delta
+        has been safely written wherever it's going, so that a crash in
+        between reports the changes again rather than losing them.
+
+        Params:
+            - key {str}: entity id, eg. 'profile/austinoboyle'
+            - result {ResultsObject|dict}: Profile/Company, or to_dict() output
+            - sections {list}: section paths (default: the results type's
+            snapshot_sections, required for dicts)
+
+        Returns:
+            {tuple}: (delta, hashes). delta is {section: new value} for every
+            changed section: empty if nothing changed, every section the first
+            time an entity is seen. Sections absent from result (eg. not in its
+            fields) are ignored. hashes are the entity's new hashes, or None if
+            there is nothing to commit.
+        """
+        if isinstance(result, ResultsObject):
+            sections = sections or result.snapshot_sections
+            result = result.to_dict()
+        if not sections:
+            raise ValueError('sections must be given to diff a dict')
+        previous = self.get(key) or {}
+        delta, hashes = diff(previous, result, sections)
+        if not delta:
+            return delta, None
+        return delta, dict(previous, **hashes)
+
+    def commit(self, key, hashes):
+        """Store an entity's hashes from diff()"""
+        _write_atomic(self._path(key), json.dumps(
+            {'key': key, 'hashes': hashes}).encode('utf-8'))
+
+    def update(self, key, result, sections=None):
+        """diff() a new snapshot of an entity against the stored one, then
+        commit() its hashes straight away
+
+        Returns:
+            {dict}: the delta, see diff()
+        """
+        delta, hashes = self.diff(key, result, sections)
+        if hashes:
+            self.commit(key, hashes)
+        return delta
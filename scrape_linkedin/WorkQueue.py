@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS items_state ON items (state, lease_expires);
+"""
+
+
+def worker_name():
+    """Return a name for this process that is unique across hosts"""
+    return '{}-{}-{}'.format(socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+
+
+class WorkQueue(object):
+    """
+    Queue of items to scrape in a SQLite database, which workers on any number
+    of hosts with access to the file claim items from and write results to:
+
+        queue = WorkQueue('/shared/profiles.db')
+        queue.put(usernames)
+
+        # On every host, see scrape_from_queue
+        scrape_from_queue(ProfileScraper, queue)
+
+        results = dict(queue.results())
+
+    A claimed item is leased to its worker for lease_seconds. Workers renew
+    their leases while scraping (see heartbeat), so an item whose lease
+    expires belonged to a worker that died or hung, and is handed out again.
+
+    The file must be on storage with working file locks (a local disk, or a
+    network filesystem that supports them), as every change is a SQLite
+    transaction.
+
+    Params:
+        - path {str}: database file, created if it doesn't exist
+        - lease_seconds {float}: how long a claimed item is held without a
+        heartbeat before it returns to the queue
+        - max_attempts {int}: give up on an item after it has been claimed
+        this many times without success
+    """
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        db = sqlite3.connect(path, timeout=60)
+        try:
+            db.executescript(_SCHEMA)
+        finally:
+            db.close()
+
+    @contextmanager
+    def _transaction(self):
+        # A connection per transaction, so that a queue can be used from
+        # several threads, and pickled for worker processes
+        db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                yield db
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+        finally:
+            db.close()
+
+    def put(self, items):
+        """Add items to the queue, ignoring any it already has
+
+        Returns:
+            {int}: the number of items added
+        """
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany('INSERT OR IGNORE INTO items (item) VALUES (?)',
+                           [(item,) for item in items])
+            return db.total_changes - before
+
+    def _expire(self, db, now):
+        """Return items with expired leases to the queue, or fail them if
+        they're out of attempts"""
+        db.execute(
+            "UPDATE items SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_expires = NULL, "
+            "error = COALESCE(error, 'lease expired') "
+            "WHERE state = 'leased' AND lease_expires < ?", (self.max_attempts, now))
+
+    def claim(self, worker, count=1):
+        """Lease up to count pending items to worker
+
+        Returns:
+            {list}: the claimed items, empty if none are pending
+        """
+        now = time.time()
+        with self._transaction() as db:
+            self._expire(db, now)
+            items = [row[0] for row in db.execute(
+                "SELECT item FROM items WHERE state = 'pending' ORDER BY rowid LIMIT ?",
+                (count,))]
+            db.executemany(
+                "UPDATE items SET state = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE item = ?",
+                [(worker, now + self.lease_seconds, item) for item in items])
+        return items
+
+    def heartbeat(self, worker):
+        """Renew the leases of every item worker holds
+
+        Returns:
+            {int}: the number of leases renewed. Items missing from it were
+            claimed by another worker after their lease expired.
+        """
+        with self._transaction() as db:
+            return db.execute(
+                "UPDATE items SET lease_expires = ? WHERE state = 'leased' AND worker = ?",
+                (time.time() + self.lease_seconds, worker)).rowcount
+
+    def complete(self, worker, item, result):
+        """Store the result of an item. Accepted even if the worker's lease
+        has expired, unless another worker has already completed it.
+
+        Returns:
+            {bool}: whether the result was stored
+        """
+        with self._transaction() as db:
+            return db.execute(
+                "UPDATE items SET state = 'done', worker = ?, lease_expires = NULL, "
+                "error = NULL, result = ? WHERE item = ? AND state != 'done'",
+                (worker, json.dumps(result), item)).rowcount == 1
+
+    def fail(self, worker, item, error):
+        """Give up an item worker holds, returning it to the queue unless it
+        is out of attempts"""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE items SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, lease_expires = NULL, error = ? "
+                "WHERE item = ? AND state = 'leased' AND worker = ?",
+                (self.max_attempts, str(error), item, worker))
+
+    def release(self, worker):
+        """Return every item worker holds to the queue, without counting the
+        attempt, eg. when it is shutting down"""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE items SET state = 'pending', worker = NULL, lease_expires = NULL, "
+                "attempts = MAX(attempts - 1, 0) WHERE state = 'leased' AND worker = ?",
+                (worker,))
+
+    def counts(self):
+        """Return the number of items in each state, after returning expired
+        leases to the queue
+
+        Returns:
+            {dict}: {'pending': int, 'leased': int, 'done': int, 'failed': int}
+        """
+        with self._transaction() as db:
+            self._expire(db, time.time())
+            counts = dict(db.execute('SELECT state, COUNT(*) FROM items GROUP BY state'))
+        return {state: counts.get(state, 0) for state in (PENDING, LEASED, DONE, FAILED)}
+
+    def finished(self):
+        """Whether every item is done or failed"""
+        counts = self.counts()
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def results(self):
+        """Iterate over (item, result) for every done item"""
+        db = sqlite3.connect(self.path, timeout=60)
+        try:
+            for item, result in db.execute(
+                    "SELECT item, result FROM items WHERE state = 'done' ORDER BY rowid"):
+                yield item, json.loads(result)
+        finally:
+            db.close()
+
+    def failures(self):
+        """Return {item: error} for every item that was given up on"""
+        db = sqlite3.connect(self.path, timeout=60)
+        try:
+            return dict(db.execute(
+                "SELECT item, error FROM items WHERE state = 'failed' ORDER BY rowid"))
+        finally:
+            db.close()
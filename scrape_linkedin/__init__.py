@@ -1,8 +1,55 @@
+import importlib
+import sys
+import types
+
+from .browser import capture_options, lean_options
 from .Company import Company
-from .CompanyScraper import CompanyScraper
-from .ConnectionScraper import ConnectionScraper
-from .MyConnectionScraper import MyConnectionScraper
-from .ParallelScraper import scrape_in_parallel
+from .HtmlArchive import HtmlArchive
 from .Profile import Profile
-from .ProfileScraper import ProfileScraper
+from .SnapshotStore import SnapshotStore
 from .utils import *
+
+# Names that need selenium or joblib are imported on first use, so that only
+# parsing html (eg. in ParallelParser worker processes) stays fast to import.
+_LAZY = {
+    'AsyncCompanyScraper': 'AsyncScraper',
+    'AsyncProfileScraper': 'AsyncScraper',
+    'AsyncScraper': 'AsyncScraper',
+    'async_scrape_many': 'AsyncScraper',
+    'CompanyScraper': 'CompanyScraper',
+    'ConnectionScraper': 'ConnectionScraper',
+    'DriverPool': 'DriverPool',
+    'MyConnectionScraper': 'MyConnectionScraper',
+    'ProfileScraper': 'ProfileScraper',
+    'scrape_from_queue': 'ParallelScraper',
+    'scrape_in_parallel': 'ParallelScraper',
+    'WorkQueue': 'WorkQueue',
+    'HEADLESS_OPTIONS': 'utils'
+}
+
+
+class _Package(types.ModuleType):
+    # Lazy names are looked up here rather than in a module level __getattr__,
+    # which needs python 3.7
+    def __getattr__(self, name):
+        if name not in _LAZY:
+            raise AttributeError(
+                "module '{}' has no attribute '{}'".format(self.__name__, name))
+        value = getattr(importlib.import_module(
+            '.' + _LAZY[name], self.__name__), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_LAZY))
+
+    def __setattr__(self, name, value):
+        # Importing a submodule sets the package attribute of the same name to
+        # the submodule, which would hide the class it's named after (eg.
+        # scrape_linkedin.ProfileScraper) once anything imports it
+        if _LAZY.get(name) == name and isinstance(value, types.ModuleType):
+            value = getattr(value, name)
+        super(_Package, self).__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
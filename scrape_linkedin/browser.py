@@ -0,0 +1,242 @@
+"""
+Driver options for lean browser sessions, which skip downloading everything the
+parsers never read: image and media bytes (only img[src] is parsed), fonts and
+third party tracking scripts.
+
+    from scrape_linkedin import ProfileScraper, lean_options
+
+    with ProfileScraper(driver_options=lean_options()) as scraper:
+        ...
+
+Also helpers to set up a logged in session in a running browser, and to make
+Chrome record the network responses Scraper(capture=True) reads.
+"""
+import copy
+import json
+import logging
+
+from . import scripts
+
+logger = logging.getLogger(__name__)
+
+LINKEDIN_URL = 'https://www.linkedin.com'
+# A quick to load page on the linkedin origin, for drivers that can only set
+# cookies and storage for the page they're on
+LINKEDIN_BLANK_URL = LINKEDIN_URL + '/robots.txt'
+
+# Resource categories lean_options can block, and the url patterns (as
+# accepted by Chrome's Network.setBlockedURLs, '*' is a wildcard) for each
+BLOCKED_URL_PATTERNS = {
+    'images': ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.svg', '*.ico',
+               '*media.licdn.com/dms/image/*', '*media-exp*.licdn.com/dms/image/*'],
+    'media': ['*.mp4', '*.webm', '*.m3u8', '*.ts', '*.mp3', '*dms.licdn.com/playlist/*'],
+    'fonts': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'third_party': ['*doubleclick.net/*', '*google-analytics.com/*', '*googletagmanager.com/*',
+                    '*googlesyndication.com/*', '*facebook.net/*', '*bat.bing.com/*',
+                    '*ads.linkedin.com/*', '*px.ads.linkedin.com/*', '*snap.licdn.com/*',
+                    '*platform.linkedin.com/litms/*', '*/li/track*']
+}
+BLOCKABLE = tuple(BLOCKED_URL_PATTERNS)
+
+# Flags that stop Chrome doing work unrelated to rendering the page
+LEAN_CHROME_ARGUMENTS = [
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-client-side-phishing-detection',
+    '--no-first-run',
+    '--mute-audio',
+    '--autoplay-policy=user-gesture-required'
+]
+
+LEAN_FIREFOX_PREFERENCES = {
+    'browser.safebrowsing.malware.enabled': False,
+    'browser.safebrowsing.phishing.enabled': False,
+    'app.update.enabled': False,
+    'extensions.update.enabled': False,
+    'datareporting.healthreport.uploadEnabled': False,
+    'toolkit.telemetry.enabled': False,
+    'network.prefetch-next': False,
+    'network.dns.disablePrefetch': True,
+    'layers.acceleration.disabled': True
+}
+
+
+def lean_options(browser='chrome', headless=True, block=BLOCKABLE):
+    """Return driver_options for a lean Chrome or Firefox session
+
+    Params:
+        - browser {str}: 'chrome' or 'firefox'
+        - headless {bool}: run without a window
+        - block {iterable}: resource categories to block, any of 'images',
+        'media', 'fonts' and 'third_party' (default: all)
+
+    Returns:
+        {dict}: driver_options for a Scraper, scrape_in_parallel or the driver
+        constructor. For Chrome, it includes a 'blocked_urls' entry that the
+        Scraper applies once the browser has started (see block_urls), so pass
+        it to a Scraper rather than straight to selenium.webdriver.Chrome.
+    """
+    block = list(block)
+    unknown = [b for b in block if b not in BLOCKED_URL_PATTERNS]
+    if unknown:
+        raise ValueError("Unknown resource categories {}. Must be any of: {}".format(
+            ', '.join(unknown), ', '.join(BLOCKABLE)))
+    browser = browser.lower()
+    if browser == 'chrome':
+        from selenium.webdriver.chrome.options import Options
+        options = Options()
+        if headless:
+            options.add_argument('--headless')
+        for argument in LEAN_CHROME_ARGUMENTS:
+            options.add_argument(argument)
+        if 'images' in block:
+            options.add_argument('--blink-settings=imagesEnabled=false')
+            options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.images': 2
+            })
+        return {
+            'options': options,
+            'blocked_urls': [p for b in block for p in BLOCKED_URL_PATTERNS[b]]
+        }
+    if browser == 'firefox':
+        from selenium.webdriver.firefox.options import Options
+        options = Options()
+        if headless:
+            options.add_argument('-headless')
+        for name, value in LEAN_FIREFOX_PREFERENCES.items():
+            options.set_preference(name, value)
+        # Firefox has no url blocklist, so only whole resource types can be
+        # switched off
+        if 'images' in block:
+            options.set_preference('permissions.default.image', 2)
+        if 'media' in block:
+            options.set_preference('media.autoplay.default', 5)
+            options.set_preference('media.mediasource.enabled', False)
+        if 'fonts' in block:
+            options.set_preference('gfx.downloadable_fonts.enabled', False)
+        if 'third_party' in block:
+            options.set_preference('privacy.trackingprotection.enabled', True)
+        return {'options': options}
+    raise ValueError("browser must be 'chrome' or 'firefox'")
+
+
+# Chrome logging preferences that record DevTools network events in the
+# 'performance' log
+PERFORMANCE_LOG = {'performance': 'ALL'}
+
+
+def capture_options(driver_options=None):
+    """Return a copy of Chrome driver_options (default: none) that also keeps
+    a performance log of network events, which capture mode reads the JSON
+    responses of linkedin's pages from (see voyager.read_responses)"""
+    driver_options = dict(driver_options or {})
+    key = 'chrome_options' if 'chrome_options' in driver_options else 'options'
+    options = copy.deepcopy(driver_options.get(key))
+    if options is None:
+        from selenium.webdriver.chrome.options import Options
+        options = Options()
+    if hasattr(options, 'set_capability'):
+        options.set_capability('goog:loggingPrefs', PERFORMANCE_LOG)
+    else:
+        # Selenium 3 takes logging preferences as a desired capability
+        from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
+        capabilities = dict(driver_options.get('desired_capabilities')
+                            or DesiredCapabilities.CHROME)
+        capabilities['loggingPrefs'] = PERFORMANCE_LOG
+        driver_options['desired_capabilities'] = capabilities
+    driver_options[key] = options
+    return driver_options
+
+
+def block_urls(driver, patterns):
+    """Stop a running browser from loading urls matching any of the patterns.
+    Only supported by Chromium based drivers, others are left unchanged.
+
+    Returns:
+        {bool}: whether the patterns could be applied
+    """
+    if not hasattr(driver, 'execute_cdp_cmd'):
+        logger.warning(
+            "%s can't block urls, loading every resource", type(driver).__name__)
+        return False
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+    return True
+
+
+def _on_linkedin(driver):
+    try:
+        return driver.current_url.startswith(LINKEDIN_URL + '/')
+    except Exception:
+        return False
+
+
+def _cdp_cookie(cookie):
+    """Convert a webdriver cookie dict into a CDP Network.CookieParam"""
+    param = {
+        'name': cookie['name'],
+        'value': cookie['value'],
+        'domain': cookie.get('domain', '.linkedin.com'),
+        'path': cookie.get('path', '/'),
+        'secure': cookie.get('secure', True),
+        'httpOnly': cookie.get('httpOnly', False)
+    }
+    if 'expiry' in cookie:
+        param['expires'] = cookie['expiry']
+    if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+        param['sameSite'] = cookie['sameSite']
+    return param
+
+
+def set_cookies(driver, cookies):
+    """Add linkedin cookies to a browser. Chromium based drivers set them
+    without loading a page, others load LINKEDIN_BLANK_URL first unless already
+    on linkedin."""
+    if hasattr(driver, 'execute_cdp_cmd'):
+        driver.execute_cdp_cmd('Network.setCookies', {
+            'cookies': [_cdp_cookie(c) for c in cookies]})
+        return
+    if not _on_linkedin(driver):
+        driver.get(LINKEDIN_BLANK_URL)
+    for cookie in cookies:
+        driver.add_cookie(cookie)
+
+
+def restore_local_storage(driver, items):
+    """Add items to linkedin's localStorage in a browser, keeping any keys it
+    already has. Chromium based drivers add them as the next linkedin page
+    loads, others load LINKEDIN_BLANK_URL first unless already on linkedin."""
+    if not items:
+        return
+    if hasattr(driver, 'execute_cdp_cmd'):
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+            'source': '({})({}, {});'.format(scripts.RESTORE_LOCAL_STORAGE,
+                                             json.dumps(LINKEDIN_URL), json.dumps(items))})
+        return
+    if not _on_linkedin(driver):
+        driver.get(LINKEDIN_BLANK_URL)
+    driver.execute_script('({})(arguments[0], arguments[1]);'.format(
+        scripts.RESTORE_LOCAL_STORAGE), LINKEDIN_URL, items)
+
+
+def export_session(driver):
+    """Return a browser's linkedin session (cookies and localStorage) as a JSON
+    serializable dict, see restore_session. Loads LINKEDIN_BLANK_URL first
+    unless already on linkedin."""
+    if not _on_linkedin(driver):
+        driver.get(LINKEDIN_BLANK_URL)
+    return {
+        'cookies': [c for c in driver.get_cookies()
+                    if c.get('domain', '').endswith('linkedin.com')],
+        'local_storage': driver.execute_script(scripts.READ_LOCAL_STORAGE) or {}
+    }
+
+
+def restore_session(driver, state):
+    """Log a browser in with a session from export_session"""
+    set_cookies(driver, state['cookies'])
+    restore_local_storage(driver, state.get('local_storage'))
@@ -1,30 +1,43 @@
 """
 Usage: scrapeli -u url
+       scrapeli parse SOURCE... [-w WORKERS]
+       scrapeli reparse ARCHIVE
+       scrapeli work QUEUE [-i ITEMS] [-w WORKERS]
 Options:
   --url : Url of the profile you want to scrape
   --user : username portion of the url (linkedin.com/in/USER)
   -a --attribute : Display only a specific attribute, display everything by default
   -i --input_file : Raw path to html of the profile you want to scrape
   -o --output_file : path of output file you want to write returned content to
+  --archive : directory to archive the raw html of scraped pages in
+  --scroll-mode : incremental (default) or async, see Scraper
+  --wait-strategy : fixed (default) or adaptive, see Scraper
+  --lean : don't download images, media, fonts or tracking scripts
+  --contact-info : click (default), overlay, tab or skip, see ProfileScraper
   -h --help : Show this screen.
 Examples:
 scrapeli -u https://www.linkedin.com/in/austinoboyle -a skills -o my_skills.json
+scrapeli parse saved_profiles/ -w 8 -o profiles.jsonl
+scrapeli reparse my_archive/ -o profiles.jsonl
+scrapeli work /shared/profiles.db -i usernames.txt -w 4 -o profiles.json
 """
 
 import datetime
 import json
 import logging
 import os
+import sys
 from pprint import pprint
 
 import click
 from click import ClickException
-from selenium.webdriver import Chrome, Firefox
 
-from .CompanyScraper import CompanyScraper
+from . import instrumentation, utils
+from .browser import lean_options
+from .Company import Company
+from .HtmlArchive import HtmlArchive
+from .ParallelParser import find_html_files, parse_in_parallel
 from .Profile import Profile
-from .ProfileScraper import ProfileScraper
-from .utils import HEADLESS_OPTIONS
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +46,7 @@ def _init_logging():
     now_time_str = datetime.datetime.now().strftime('%Y-%m-%d-%H-%M-%S')
     # Set the default logging level for all other modules to WARNING
     log_fname = 'scrapeli_{}.log'.format(now_time_str)
-    print("Logging debug information to", log_fname)
+    click.echo("Logging debug information to {}".format(log_fname), err=True)
     logging.basicConfig(level=logging.WARNING,
                         format='%(asctime)s %(levelname)-8s %(name)s [%(filename)s:%(lineno)d] %(message)s',
                         datefmt='%Y-%m-%d:%H:%M:%S',
@@ -43,7 +56,7 @@ def _init_logging():
     logging.getLogger('scrape_linkedin').setLevel(logging.DEBUG)
 
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option('--url', type=str, help='Url of the profile you want to scrape')
 @click.option('--user', type=str, help='Username portion of profile: (www.linkedin.com/in/<username>')
 @click.option('--company', type=str, help='ID of Company you want to scrape. (https://www.linkedin.com/company/id/)')
@@ -54,13 +67,39 @@ def _init_logging():
 @click.option('--output_file', '-o', type=click.Path(), default=None,
               help='Output file you want to write returned content to')
 @click.option('--driver', type=click.Choice(['Chrome', 'Firefox']), help='Webdriver to use: (Firefox/Chrome)', default='Chrome')
-def scrape(url, user, company, attribute, input_file, headless, output_file, driver):
+@click.option('--selector-report', is_flag=True,
+              help="Print the time and hit rate of every selector used while parsing to stderr")
+@click.option('--archive', type=click.Path(file_okay=False), default=None,
+              help='Directory to archive the raw html of scraped pages in, for re-parsing later')
+@click.option('--scroll-mode', type=click.Choice(['incremental', 'async']), default='incremental',
+              help='Scroll from python, or with a single script running in the page (async)')
+@click.option('--wait-strategy', type=click.Choice(['fixed', 'adaptive']), default='fixed',
+              help='Sleep a fixed time after each scroll, or until the page stops loading (adaptive)')
+@click.option('--lean', is_flag=True,
+              help="Don't download images, media, fonts or third party scripts, which are never parsed")
+@click.option('--session', type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Log in with a session saved by Scraper.export_session instead of LI_AT")
+@click.option('--contact-info', type=click.Choice(['click', 'overlay', 'tab', 'skip']), default='click',
+              help="How to load a profile's contact info overlay, or skip it, see ProfileScraper")
+@click.pass_context
+def scrape(ctx, url, user, company, attribute, input_file, headless, output_file, driver, selector_report, archive,
+           scroll_mode, wait_strategy, lean, session, contact_info):
+    if ctx.invoked_subcommand is not None:
+        return
     _init_logging()
+    if selector_report:
+        instrumentation.enable()
     logger.info("Starting scrapeli with: %s", locals())
     driver_options = {}
-    if headless:
+    if lean:
+        logger.debug("LEAN")
+        driver_options = lean_options(driver, headless=headless)
+    elif headless:
         logger.debug("HEADLESS")
-        driver_options = HEADLESS_OPTIONS
+        driver_options = utils.HEADLESS_OPTIONS
+    scraper_options = {'driver_options': driver_options, 'archive': archive,
+                       'scroll_mode': scroll_mode, 'wait_strategy': wait_strategy,
+                       'session': session, 'cookie': os.environ.get('LI_AT')}
     if company:
         url = 'https://www.linkedin.com/company/' + company
     if user:
@@ -69,22 +108,28 @@ def scrape(url, user, company, attribute, input_file, headless, output_file, dri
         raise ClickException(
             'Must pass either a url or file path, but not both.')
     elif url:
-        if 'LI_AT' not in os.environ:
+        if 'LI_AT' not in os.environ and not session:
             raise ClickException("Must set LI_AT environment variable")
+        # Selenium is slow to import, so only import it when scraping
+        from selenium.webdriver import Chrome, Firefox
+        from .CompanyScraper import CompanyScraper
+        from .ProfileScraper import ProfileScraper
         driver_type = Firefox if driver == 'Firefox' else Chrome
         if company:
-            with CompanyScraper(driver=driver_type, cookie=os.environ['LI_AT'], driver_options=driver_options) as scraper:
+            with CompanyScraper(driver=driver_type, **scraper_options) as scraper:
                 profile = scraper.scrape(company=company)
         else:
-            with ProfileScraper(driver=driver_type, cookie=os.environ['LI_AT'], driver_options=driver_options) as scraper:
-                profile = scraper.scrape(url=url)
+            with ProfileScraper(driver=driver_type, contact_info=contact_info,
+                                **scraper_options) as scraper:
+                profile = scraper.scrape(
+                    url=url, fields=[attribute] if attribute else None)
 
     else:
         with open(input_file, 'r') as html:
             profile = Profile(html)
 
     if attribute:
-        output = profile.__getattribute__(attribute)
+        output = profile.to_dict(fields=[attribute])[attribute]
     else:
         output = profile.to_dict()
 
@@ -93,6 +138,126 @@ def scrape(url, user, company, attribute, input_file, headless, output_file, dri
             json.dump(output, outfile)
     else:
         pprint(output)
+    if selector_report:
+        _print_selector_report()
+
+
+def _print_selector_report():
+    click.echo(instrumentation.format_report(), err=True)
+    dead = instrumentation.dead_selectors()
+    if dead:
+        click.echo("\nSelectors that never matched:\n  " +
+                   '\n  '.join(dead), err=True)
+
+
+@scrape.command()
+@click.argument('sources', nargs=-1, required=True)
+@click.option('--type', 'page_type', type=click.Choice(['profile', 'company']), default='profile',
+              help='Type of page stored in the html files')
+@click.option('--workers', '-w', type=click.IntRange(min=1), default=None,
+              help='Number of worker processes (default: number of cpus)')
+@click.option('--attribute', '-a', multiple=True,
+              type=click.Choice(sorted(set(Profile.attributes + Company.attributes))),
+              help='Only return this attribute. May be given more than once')
+@click.option('--partial', is_flag=True, help="Only parse the parts of each page needed for --attribute (profiles only)")
+@click.option('--unordered', is_flag=True, help="Write results as soon as they finish instead of in input order")
+@click.option('--output_file', '-o', type=click.Path(), default=None,
+              help='JSON lines file to write results to (default: stdout)')
+@click.option('--selector-report', is_flag=True,
+              help="Print the time and hit rate of every selector used, across all files, to stderr")
+def parse(sources, page_type, workers, attribute, partial, unordered, output_file, selector_report):
+    """Parse stored html files offline, one JSON line per file.
+
+    Each SOURCE is a directory, a glob, an html file or a manifest listing one
+    path per line.
+    """
+    _init_logging()
+    try:
+        paths = [p for source in sources for p in find_html_files(source)]
+        results = parse_in_parallel(paths, num_workers=workers, ordered=not unordered,
+                                    page_type=page_type, fields=list(attribute) or None,
+                                    partial=partial, collect_stats=selector_report)
+        out = open(output_file, 'w') if output_file else sys.stdout
+        try:
+            for result in results:
+                out.write(json.dumps(result) + '\n')
+                out.flush()
+        finally:
+            if output_file:
+                out.close()
+    except ValueError as e:
+        raise ClickException(str(e))
+    if selector_report:
+        _print_selector_report()
+
+
+@scrape.command()
+@click.argument('archive', type=click.Path(exists=True, file_okay=False))
+@click.option('--type', 'kind', type=click.Choice(['profile', 'company']), default=None,
+              help='Only re-parse pages of this type (default: all)')
+@click.option('--output_file', '-o', type=click.Path(), default=None,
+              help='JSON lines file to write results to (default: stdout)')
+def reparse(archive, kind, output_file):
+    """Re-parse every page stored in an --archive directory, one JSON line
+    per capture. Results of pages the current parser has already parsed are
+    read from the archive's parse cache.
+    """
+    _init_logging()
+    out = open(output_file, 'w') if output_file else sys.stdout
+    try:
+        for entry in HtmlArchive(archive).parse_all(kind=kind):
+            out.write(json.dumps(entry) + '\n')
+    finally:
+        if output_file:
+            out.close()
+
+
+@scrape.command()
+@click.argument('queue', type=click.Path(dir_okay=False))
+@click.option('--type', 'kind', type=click.Choice(['profile', 'company']), default='profile',
+              help='Type of the items in the queue')
+@click.option('--input_file', '-i', type=click.Path(exists=True, dir_okay=False), default=None,
+              help='File of items (usernames or company ids) to add to the queue, one per line')
+@click.option('--workers', '-w', type=click.IntRange(min=1), default=1,
+              help='Number of browsers to scrape with on this host')
+@click.option('--driver', type=click.Choice(['Chrome', 'Firefox']), default='Chrome',
+              help='Webdriver to use: (Firefox/Chrome)')
+@click.option('--headless', is_flag=True, help="Run in headless mode")
+@click.option('--lean', is_flag=True,
+              help="Don't download images, media, fonts or third party scripts, which are never parsed")
+@click.option('--lease', type=click.FloatRange(min=1), default=300,
+              help="Seconds before an item held by a worker that stopped responding is handed out again")
+@click.option('--output_file', '-o', type=click.Path(), default=None,
+              help='JSON file to write every result in the queue to once it is finished')
+def work(queue, kind, input_file, workers, driver, headless, lean, lease, output_file):
+    """Scrape items from a shared queue until it is finished.
+
+    QUEUE is a SQLite file, created if it doesn't exist. Run this on every
+    host that can reach it to scrape with all of them.
+    """
+    _init_logging()
+    if 'LI_AT' not in os.environ:
+        raise ClickException("Must set LI_AT environment variable")
+    from selenium.webdriver import Chrome, Firefox
+    from .CompanyScraper import CompanyScraper
+    from .ParallelScraper import scrape_in_parallel
+    from .ProfileScraper import ProfileScraper
+    from .WorkQueue import WorkQueue
+    items = None
+    if input_file:
+        with open(input_file, 'r') as f:
+            items = [line.strip() for line in f if line.strip()]
+    driver_options = {}
+    if lean:
+        driver_options = lean_options(driver, headless=headless)
+    elif headless:
+        driver_options = utils.HEADLESS_OPTIONS
+    scrape_in_parallel(CompanyScraper if kind == 'company' else ProfileScraper, items,
+                       output_file, num_instances=workers,
+                       driver=Firefox if driver == 'Firefox' else Chrome,
+                       driver_options=driver_options,
+                       queue=WorkQueue(queue, lease_seconds=lease),
+                       cookie=os.environ['LI_AT'])
 
 
 if __name__ == '__main__':
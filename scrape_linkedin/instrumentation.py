@@ -0,0 +1,222 @@
+"""
+Opt-in instrumentation for the parsing helpers in utils.
+
+When enabled, every call to one_or_default, text_or_default, all_or_default,
+get_info and get_record records its selector, the results attribute being
+computed at the time (eg. 'experiences'), the time taken (excluding the other
+helpers it called) and whether anything matched. Use it to find the costliest selectors, and dead ones whose markup is
+no longer on the page:
+
+    from scrape_linkedin import instrumentation
+
+    instrumentation.enable()
+    Profile(html).to_dict()
+    print(instrumentation.format_report())
+    print(instrumentation.dead_selectors())
+
+Instrumentation is per process and is off by default, when the helpers only pay
+for one extra function call.
+"""
+import functools
+import inspect
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+# (attribute, helper, selector) -> [calls, seconds, hits], None when disabled
+_stats = None
+_lock = threading.Lock()
+# Results objects may be extracted in several threads at once (eg. scraping
+# with a DriverPool), so each thread has its own stack of attributes
+_local = threading.local()
+
+
+def _attribute_stack():
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def enable():
+    """Start recording helper calls. Existing stats are kept."""
+    global _stats
+    if _stats is None:
+        _stats = defaultdict(lambda: [0, 0.0, 0])
+
+
+def disable():
+    """Stop recording helper calls and discard the stats"""
+    global _stats
+    _stats = None
+
+
+def is_enabled():
+    return _stats is not None
+
+
+def reset():
+    """Discard the stats recorded so far"""
+    if _stats is not None:
+        _stats.clear()
+
+
+@contextmanager
+def attribute(name):
+    """Attribute helper calls made within this block to the named attribute"""
+    stack = _attribute_stack()
+    stack.append(name)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+def _call_stack():
+    """This thread's instrumented calls in progress, innermost last, as
+    [seconds spent in the helpers they called, whether any of those matched]"""
+    try:
+        return _local.calls
+    except AttributeError:
+        _local.calls = []
+        return _local.calls
+
+
+# Passed to a helper in place of its default, to tell a miss apart from a
+# match whose value equals the default (eg. an element with no text)
+_MISSING = object()
+
+
+def instrumented(nested=False):
+    """Decorator recording calls to a helper with the signature
+    (element, selector, ..., default=...) while instrumentation is enabled.
+    A call's time excludes the time of the instrumented helpers it calls.
+
+    Params:
+        - nested {bool}: the helper only finds elements through other
+        instrumented helpers, and matched if any of them did. Otherwise it
+        matched if it returned something other than its default.
+    """
+    def decorator(fn):
+        name = fn.__name__
+        parameters = list(inspect.signature(fn).parameters.values())
+        default_index = [p.name for p in parameters].index('default') - 2
+        default_value = parameters[default_index + 2].default
+
+        @functools.wraps(fn)
+        def wrapper(element, selector, *args, **kwargs):
+            if _stats is None:
+                return fn(element, selector, *args, **kwargs)
+            if 'default' in kwargs:
+                default = kwargs['default']
+            elif len(args) > default_index:
+                default = args[default_index]
+            else:
+                default = default_value
+            if not nested:
+                if len(args) > default_index:
+                    args = args[:default_index] + (_MISSING,) + args[default_index + 1:]
+                else:
+                    kwargs['default'] = _MISSING
+
+            calls = _call_stack()
+            call = [0.0, False]
+            calls.append(call)
+            start = perf_counter()
+            try:
+                result = fn(element, selector, *args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                calls.pop()
+            if nested:
+                found = call[1]
+            else:
+                found = result is not _MISSING
+                if not found:
+                    result = default
+            if calls:
+                calls[-1][0] += elapsed
+                calls[-1][1] = calls[-1][1] or found
+
+            if isinstance(selector, dict):
+                selector = '{' + ', '.join(selector) + '}'
+            stack = _attribute_stack()
+            attr = stack[-1] if stack else None
+            with _lock:
+                stats = _stats[(attr, name, selector)]
+                stats[0] += 1
+                stats[1] += elapsed - call[0]
+                stats[2] += found
+            return result
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """Return a picklable copy of the raw stats, see merge()"""
+    return {key: list(value) for key, value in (_stats or {}).items()}
+
+
+def merge(other):
+    """Add stats from snapshot() (eg. taken in a worker process) to this
+    process's stats. Enables instrumentation if necessary."""
+    enable()
+    for key, (calls, seconds, hits) in other.items():
+        stats = _stats[key]
+        stats[0] += calls
+        stats[1] += seconds
+        stats[2] += hits
+
+
+def report(by=('attribute', 'helper', 'selector')):
+    """Return the recorded stats, costliest first.
+
+    Params:
+        - by {tuple}: fields to group by, any of 'attribute', 'helper' and
+        'selector'. eg. by=('selector',) totals each selector across every
+        attribute and helper.
+
+    Returns:
+        {list}: of dicts with the grouping fields, plus calls, time (s, not
+        counting nested helper calls), hits, misses and hit_rate
+    """
+    fields = ('attribute', 'helper', 'selector')
+    grouped = defaultdict(lambda: [0, 0.0, 0])
+    for key, (calls, seconds, hits) in (_stats or {}).items():
+        group = tuple(v for f, v in zip(fields, key) if f in by)
+        totals = grouped[group]
+        totals[0] += calls
+        totals[1] += seconds
+        totals[2] += hits
+
+    rows = []
+    for group, (calls, seconds, hits) in grouped.items():
+        row = dict(zip([f for f in fields if f in by], group))
+        row.update({
+            'calls': calls,
+            'time': seconds,
+            'hits': hits,
+            'misses': calls - hits,
+            'hit_rate': hits / calls if calls else 0.0
+        })
+        rows.append(row)
+    return sorted(rows, key=lambda r: r['time'], reverse=True)
+
+
+def dead_selectors():
+    """Return the selectors that never matched anything, sorted"""
+    return sorted(r['selector'] for r in report(by=('helper', 'selector'))
+                  if r['hits'] == 0 and not r['selector'].startswith('{'))
+
+
+def format_report(limit=None, by=('attribute', 'helper', 'selector')):
+    """Return report() as a printable table"""
+    rows = report(by)[:limit]
+    header = list(by) + ['calls', 'time (ms)', 'hit rate']
+    lines = [[str(r[f]) for f in by] + [str(r['calls']), '{:.2f}'.format(r['time'] * 1000),
+                                        '{:.0%}'.format(r['hit_rate'])] for r in rows]
+    widths = [max(len(x) for x in col) for col in zip(header, *lines)]
+    return '\n'.join('  '.join(cell.ljust(w) for cell, w in zip(line, widths))
+                     for line in [header] + lines)
@@ -0,0 +1,85 @@
+"""
+Compact record types returned by the profile extractors.
+
+Records store their fields in __slots__ rather than a per-entity dict, but
+behave like read-only mappings (rec['title'], rec.get('title'), dict(rec),
+rec == {...}), so code written against the old dicts keeps working. Use
+to_plain() to turn records (possibly nested in dicts and lists) back into the
+plain dicts returned by to_dict().
+"""
+from collections.abc import Mapping
+
+
+class Record(Mapping):
+    """Base class for records. Subclasses list their fields in __slots__, in the
+    order they should appear in dicts."""
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for field in self.__slots__:
+            setattr(self, field, values.pop(field, None))
+        if values:
+            raise TypeError("Unknown field(s) for {}: {}".format(
+                type(self).__name__, ', '.join(values)))
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join(
+            '{}={!r}'.format(f, getattr(self, f)) for f in self.__slots__))
+
+    def to_dict(self):
+        """Return the record as a dict. Values are not copied."""
+        return {f: to_plain(getattr(self, f)) for f in self.__slots__}
+
+
+class Job(Record):
+    __slots__ = ('title', 'company', 'date_range', 'location',
+                 'description', 'li_company_url')
+
+
+class School(Record):
+    __slots__ = ('name', 'degree', 'grades', 'field_of_study',
+                 'date_range', 'activities')
+
+
+class Volunteering(Record):
+    __slots__ = ('title', 'company', 'date_range', 'location',
+                 'cause', 'description')
+
+
+class Skill(Record):
+    __slots__ = ('name', 'endorsements')
+
+
+class Connection(Record):
+    __slots__ = ('relationship', 'name', 'li_id')
+
+
+class Recommendation(Record):
+    __slots__ = ('text', 'date', 'connection')
+
+
+def to_plain(value):
+    """Convert records anywhere within dicts/lists into plain dicts"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {k: to_plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [to_plain(v) for v in value]
+    return value
@@ -0,0 +1,213 @@
+"""
+JavaScript run in the browser by the scrapers.
+"""
+
+# Defines activityMonitor(), which (once per page) starts tracking in-flight
+# XMLHttpRequest/fetch requests and recording the time of the last request or
+# added element, and whenQuiet(quietMs, maxMs, callback), which calls back with
+# the time waited once no request is in flight and nothing has happened for
+# quietMs, or after maxMs.
+#
+# Requests that never settle would keep a page from ever being quiet: those
+# to linkedin's realtime (long-poll) and tracking endpoints are ignored, and
+# any other request stops counting once it has been in flight for
+# STALE_REQUEST_MS. Only added elements count as DOM activity, so text and
+# attribute changes that never stop (eg. timers, animations) don't either.
+ACTIVITY_MONITOR = """
+var IGNORED_REQUESTS = /\\/realtime\\/|\\/li\\/track|\\/sensorCollect|\\/litms\\//;
+var STALE_REQUEST_MS = 1000;
+
+function activityMonitor() {
+    if (window.__scrapeliMonitor) {
+        return window.__scrapeliMonitor;
+    }
+    var requests = {}, nextId = 0;
+    var monitor = {lastActivity: Date.now()};
+    monitor.inflight = function (now) {
+        var count = 0;
+        Object.keys(requests).forEach(function (id) {
+            if (now - requests[id] < STALE_REQUEST_MS) {
+                count++;
+            }
+        });
+        return count;
+    };
+    function begin(url) {
+        if (IGNORED_REQUESTS.test(String(url || ''))) {
+            return null;
+        }
+        var id = nextId++;
+        requests[id] = monitor.lastActivity = Date.now();
+        return id;
+    }
+    function end(id) {
+        if (id === null || !(id in requests)) {
+            return;
+        }
+        var now = Date.now();
+        // A stale request finishing isn't the page loading
+        if (now - requests[id] < STALE_REQUEST_MS) {
+            monitor.lastActivity = now;
+        }
+        delete requests[id];
+    }
+    var open = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        this.__scrapeliUrl = url;
+        return open.apply(this, arguments);
+    };
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        var id = begin(this.__scrapeliUrl);
+        this.addEventListener('loadend', function () { end(id); });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function (input) {
+            var id = begin(input && input.url ? input.url : input);
+            var request = fetch.apply(this, arguments);
+            request.then(function () { end(id); }, function () { end(id); });
+            return request;
+        };
+    }
+    new MutationObserver(function (mutations) {
+        for (var i = 0; i < mutations.length; i++) {
+            var added = mutations[i].addedNodes;
+            for (var j = 0; j < added.length; j++) {
+                if (added[j].nodeType === 1) {
+                    monitor.lastActivity = Date.now();
+                    return;
+                }
+            }
+        }
+    }).observe(document, {childList: true, subtree: true});
+    window.__scrapeliMonitor = monitor;
+    return monitor;
+}
+
+function whenQuiet(quietMs, maxMs, callback) {
+    var monitor = activityMonitor(), start = Date.now();
+    // Whatever was just done (eg. a scroll) may not have caused any activity yet
+    monitor.lastActivity = Math.max(monitor.lastActivity, start);
+    (function check() {
+        var now = Date.now();
+        if (now - start >= maxMs ||
+                (monitor.inflight(now) === 0 && now - monitor.lastActivity >= quietMs)) {
+            callback(now - start);
+        } else {
+            setTimeout(check, Math.min(quietMs, 50));
+        }
+    })();
+}
+"""
+
+# Calls back with the time waited (ms) once the page is quiet, see whenQuiet.
+#
+# Arguments: quiet_ms {int}, max_ms {int}, callback
+WAIT_FOR_QUIET = ACTIVITY_MONITOR + """
+whenQuiet(arguments[0], arguments[1], arguments[arguments.length - 1]);
+"""
+
+# Scrolls to the bottom of the page in increments, clicking every element
+# matching one of the given selectors after each increment, and calls back
+# with the final scroll position once the page has stopped growing, or after
+# max_ms. After each increment it waits pause_ms, or if quiet_ms is not null,
+# until the page is quiet for quiet_ms (see whenQuiet) for at most pause_ms.
+#
+# Arguments: selectors {string[]}, increment {int} (px), max_ms {int},
+# quiet_ms {int|null}, pause_ms {int}, callback
+SCROLL_AND_EXPAND = ACTIVITY_MONITOR + """
+var selectors = arguments[0], increment = arguments[1], maxMs = arguments[2],
+    quietMs = arguments[3], pauseMs = arguments[4],
+    done = arguments[arguments.length - 1];
+var deadline = Date.now() + maxMs;
+// Track the position ourselves: scrollTop stops a viewport short of scrollHeight
+var current = document.documentElement.scrollTop;
+
+function expand() {
+    selectors.forEach(function (selector) {
+        document.querySelectorAll(selector).forEach(function (el) {
+            try { el.click(); } catch (e) {}
+        });
+    });
+}
+
+function pause(callback) {
+    if (quietMs === null) {
+        setTimeout(callback, pauseMs);
+    } else {
+        whenQuiet(quietMs, pauseMs, callback);
+    }
+}
+
+function step() {
+    expand();
+    var next = Math.min(current + increment, document.body.scrollHeight);
+    if (Date.now() > deadline) {
+        done(current);
+    } else if (next === current) {
+        // At the bottom: give lazy-loaded content one more pause to arrive
+        var height = document.body.scrollHeight;
+        pause(function () {
+            if (document.body.scrollHeight > height) {
+                step();
+            } else {
+                expand();
+                done(current);
+            }
+        });
+    } else {
+        window.scrollTo(0, next);
+        current = next;
+        pause(step);
+    }
+}
+
+step();
+"""
+
+# Returns the page's localStorage as an object
+READ_LOCAL_STORAGE = """
+return Object.assign({}, window.localStorage);
+"""
+
+# Function expression, called with (origin, items), that copies items into
+# localStorage when run on a page of origin, without overwriting keys the
+# page already has
+RESTORE_LOCAL_STORAGE = """
+function (origin, items) {
+    if (window.location.origin !== origin) {
+        return;
+    }
+    Object.keys(items).forEach(function (key) {
+        if (window.localStorage.getItem(key) === null) {
+            window.localStorage.setItem(key, items[key]);
+        }
+    });
+}
+"""
+
+# Starts loading a url without waiting for it, marking the page being left so
+# that PAGE_READY can't mistake it for the new one
+#
+# Arguments: url {str}
+START_NAVIGATION = """
+window.__scrapeliLeaving = true;
+window.location.href = arguments[0];
+"""
+
+# Returns whether a page started by START_NAVIGATION has loaded: it has
+# replaced the previous page, and has an element matching the given selector
+# (or, with a null selector, has finished loading)
+#
+# Arguments: selector {string|null}
+PAGE_READY = """
+if (window.__scrapeliLeaving) {
+    return false;
+}
+if (arguments[0] === null) {
+    return document.readyState === 'complete';
+}
+return document.readyState !== 'loading' && document.querySelector(arguments[0]) !== null;
+"""
@@ -1,18 +1,133 @@
 import logging
 import re
+import sys
+import types
+from bisect import bisect_right
+from collections import defaultdict
 from datetime import datetime
 from typing import List, Optional
 
 import bs4
-from selenium.webdriver.chrome.options import Options
+from bs4.builder import builder_registry
 
-options = Options()
-options.add_argument('--headless')
-HEADLESS_OPTIONS = {'chrome_options': options}
+from .instrumentation import instrumented
+from .records import Connection, Job, Recommendation, School, Skill, Volunteering
 
 logger = logging.getLogger(__name__)
 
 
+class _Module(types.ModuleType):
+    # A module subclass rather than a module level __getattr__, which needs
+    # python 3.7
+    def __getattr__(self, name):
+        # HEADLESS_OPTIONS (and the chrome `options` it holds) are built on
+        # first use, so that parsing html doesn't import selenium
+        if name in ('options', 'HEADLESS_OPTIONS'):
+            from selenium.webdriver.chrome.options import Options
+            options = Options()
+            options.add_argument('--headless')
+            self.options = options
+            self.HEADLESS_OPTIONS = {'chrome_options': options}
+            return getattr(self, name)
+        raise AttributeError(
+            "module '{}' has no attribute '{}'".format(self.__name__, name))
+
+
+sys.modules[__name__].__class__ = _Module
+
+
+# Tree builders to try, fastest first. lxml is C-backed and is used whenever it
+# is installed; html.parser ships with python and is always available.
+PREFERRED_PARSERS = ['lxml', 'html.parser']
+
+
+def _default_parser():
+    for parser in PREFERRED_PARSERS:
+        if builder_registry.lookup(parser) is not None:
+            return parser
+    return 'html.parser'
+
+
+DEFAULT_PARSER = _default_parser()
+
+
+# Matches selectors made of an optional tag name and one or more classes,
+# eg. '.pv-top-card' or 'section.pv-recommendations-section'
+RE_CLASS_SELECTOR = re.compile(r'^([a-zA-Z][\w-]*)?((?:\.[\w-]+)+)$')
+# Matches a single compound selector of tag name, id and classes, eg.
+# 'h1', '#experience-section', 'li.pv-recommendation-entity' or '.a.b'
+RE_SIMPLE_SELECTOR = re.compile(
+    r'^([a-zA-Z][\w-]*)?((?:[.#]-?[_a-zA-Z][\w-]*)*)$')
+RE_SELECTOR_PART = re.compile(r'[.#]-?[_a-zA-Z][\w-]*')
+
+
+def make_soup(markup, parser=None, parse_only=None, index=True) -> bs4.BeautifulSoup:
+    """Build a BeautifulSoup tree from markup
+
+    Params:
+        - markup {str|file}: html to parse
+        - parser {str}: tree builder to use (eg. 'lxml', 'html.parser').
+        Defaults to DEFAULT_PARSER
+        - parse_only {SoupStrainer}: only build the parts of the tree matching
+        this strainer
+        - index {bool}: build a DomIndex for the tree, used by the
+        one_or_default/text_or_default/all_or_default helpers
+
+    Returns:
+        BeautifulSoup object for the markup
+    """
+    soup = bs4.BeautifulSoup(
+        markup, parser or DEFAULT_PARSER, parse_only=parse_only)
+    if index:
+        DomIndex(soup)
+    return soup
+
+
+def release_soup(soup: Optional[bs4.BeautifulSoup]):
+    """Destroy a soup so its memory is freed right away, rather than whenever the
+    garbage collector gets to the tree's reference cycles.
+
+    BeautifulSoup.decompose() only clears the root object, so each top level
+    element is decomposed separately.
+    """
+    if soup is None:
+        return
+    soup.__dict__.pop('_dom_index', None)
+    for child in list(soup.contents):
+        child.decompose()
+    soup.decompose()
+
+
+def class_strainer(selectors: List[str]) -> bs4.SoupStrainer:
+    """Build a SoupStrainer that keeps every element matching any of the given
+    class selectors, along with all of their descendants.
+
+    Only the first class of each selector is used, so the strainer may keep
+    slightly more of the tree than the selectors match, but never less.
+
+    Raises:
+        ValueError: if a selector is not of the form [tag].class[.class...]
+    """
+    classes = []
+    for selector in selectors:
+        match = RE_CLASS_SELECTOR.match(selector.strip())
+        if not match:
+            raise ValueError(
+                "Cannot build a strainer for selector '{}'".format(selector))
+        classes.append(match.group(2).split('.')[1])
+    classes = set(classes)
+
+    def has_class(value):
+        # Depending on the bs4 version and builder, the class attribute is
+        # either the raw attribute string or a list of classes
+        if not value:
+            return False
+        if isinstance(value, str):
+            value = value.split()
+        return any(c in classes for c in value)
+    return bs4.SoupStrainer(class_=has_class)
+
+
 def _find_element(driver, by):
     """Looks up an element using a Locator"""
     return driver.find_element(*by)
@@ -27,6 +142,149 @@ def split_lists(lst, num):
     return [lst[i * k + min(i, m): (i+1) * k + min(i + 1, m)] for i in range(num)]
 
 
+def _is_decomposed(tag):
+    # decompose() clears the tag's __dict__ (newer bs4 versions then set a
+    # _decomposed flag), so a live tag always has its attrs
+    return 'attrs' not in vars(tag)
+
+
+def _parse_simple_selector(selector):
+    """Split a simple selector into (tag name, id, [classes]), or return None if
+    the selector has combinators, attributes, pseudo classes, etc."""
+    match = RE_SIMPLE_SELECTOR.match(selector.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    tag_id = None
+    classes = []
+    for part in RE_SELECTOR_PART.findall(match.group(2)):
+        if part[0] == '#':
+            if tag_id is not None:
+                return None
+            tag_id = part[1:]
+        else:
+            classes.append(part[1:])
+    return (match.group(1) or '').lower() or None, tag_id, classes
+
+
+class DomIndex(object):
+    """One-pass index of a soup's tags by class, id and tag name.
+
+    Lets the parsing helpers answer simple selectors ('.a', '#b', 'h3', 'li.c')
+    within any element of the soup with a lookup and a binary search instead of
+    walking the subtree. The index is stored on the soup it was built from.
+
+    The index assumes the tree's structure doesn't change after it is built,
+    apart from decompose()'d tags, which are skipped.
+    """
+
+    def __init__(self, soup: bs4.BeautifulSoup):
+        tags = soup.find_all(True)
+        self.start = {id(soup): -1}
+        self.end = list(range(len(tags)))
+        self.root_end = len(tags) - 1
+        self.by_class = defaultdict(lambda: ([], []))
+        self.by_id = defaultdict(lambda: ([], []))
+        self.by_name = defaultdict(lambda: ([], []))
+
+        for i, tag in enumerate(tags):
+            self.start[id(tag)] = i
+            self._add(self.by_name, tag.name, i, tag)
+            tag_id = tag.get('id')
+            if tag_id:
+                self._add(self.by_id, tag_id, i, tag)
+            classes = tag.get('class') or []
+            if isinstance(classes, str):
+                classes = classes.split()
+            for cls in classes:
+                self._add(self.by_class, cls, i, tag)
+
+        # Tags are in document order, so every descendant of a tag comes after
+        # it. Walking backwards, each tag's span is final before its parent's.
+        for i in range(len(tags) - 1, -1, -1):
+            parent_start = self.start.get(id(tags[i].parent), -1)
+            if parent_start >= 0 and self.end[i] > self.end[parent_start]:
+                self.end[parent_start] = self.end[i]
+
+        soup.__dict__['_dom_index'] = self
+
+    @staticmethod
+    def _add(table, key, position, tag):
+        positions, tags = table[key]
+        positions.append(position)
+        tags.append(tag)
+
+    @staticmethod
+    def of(element) -> Optional['DomIndex']:
+        """Return the index of the soup containing element, if there is one"""
+        root = element
+        while root.parent is not None:
+            root = root.parent
+        return root.__dict__.get('_dom_index')
+
+    def span(self, element):
+        """(start, end) positions of element's descendants, or None if element
+        isn't part of the index"""
+        start = self.start.get(id(element))
+        if start is None:
+            return None
+        if start == -1:
+            return -1, self.root_end
+        return start, self.end[start]
+
+    def select(self, element, selector, limit=None) -> Optional[list]:
+        """Return the tags within element that match selector, in document
+        order, or None if the selector is too complex for the index"""
+        parsed = _parse_simple_selector(selector)
+        span = self.span(element)
+        if parsed is None or span is None:
+            return None
+        name, tag_id, classes = parsed
+
+        if tag_id is not None:
+            table, key = self.by_id, tag_id
+        elif classes:
+            table, key = self.by_class, classes[0]
+        else:
+            table, key = self.by_name, name
+        if key not in table:
+            return []
+        positions, tags = table[key]
+
+        start, end = span
+        results = []
+        i = bisect_right(positions, start)
+        while i < len(positions) and positions[i] <= end:
+            tag = tags[i]
+            i += 1
+            if _is_decomposed(tag):
+                continue
+            if name is not None and tag.name != name:
+                continue
+            if tag_id is not None and tag.get('id') != tag_id:
+                continue
+            if classes:
+                tag_classes = tag.get('class') or []
+                if not all(c in tag_classes for c in classes):
+                    continue
+            results.append(tag)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+
+def _select(element, selector, limit=None):
+    """element.select(selector) that uses the soup's DomIndex when it can"""
+    index = DomIndex.of(element)
+    if index is not None:
+        results = index.select(element, selector, limit)
+        if results is not None:
+            return results
+    if limit == 1:
+        el = element.select_one(selector)
+        return [] if el is None else [el]
+    return element.select(selector)
+
+
 class TextChanged(object):
     def __init__(self, locator, text):
         self.locator = locator
@@ -51,6 +309,7 @@ class AnyEC(object):
         return False
 
 
+@instrumented()
 def one_or_default(element: Optional[bs4.Tag], selector: str, default=None) -> Optional[bs4.Tag]:
     """Return the first found element with a given css selector
 
@@ -63,23 +322,23 @@ def one_or_default(element: Optional[bs4.Tag], selector: str, default=None) -> O
         beautifulsoup element if match is found, otherwise return the default
     """
     try:
-        el = element.select_one(selector)
-        if not el:
-            return default
-        return element.select_one(selector)
+        found = _select(element, selector, limit=1)
+        return found[0] if found else default
     except Exception as e:
         return default
 
 
+@instrumented()
 def text_or_default(element, selector, default=None):
     """Same as one_or_default, except it returns stripped text contents of the found element
     """
     try:
-        return element.select_one(selector).get_text().strip()
+        return _select(element, selector, limit=1)[0].get_text().strip()
     except Exception as e:
         return default
 
 
+@instrumented()
 def all_or_default(element, selector, default=[]):
     """Get all matching elements for a css selector within an element
 
@@ -93,14 +352,15 @@ def all_or_default(element, selector, default=[]):
         the default value
     """
     try:
-        elements = element.select(selector)
+        elements = _select(element, selector)
         if len(elements) == 0:
             return default
-        return element.select(selector)
+        return elements
     except Exception as e:
         return default
 
 
+@instrumented(nested=True)
 def get_info(element, mapping, default=None):
     """Turn beautifulsoup element and key->selector dict into a key->value dict
 
@@ -118,10 +378,22 @@ def get_info(element, mapping, default=None):
     return {key: text_or_default(element, mapping[key], default=default) for key in mapping}
 
 
-def get_job_info(job: Optional[bs4.Tag]) -> List[dict]:
+@instrumented(nested=True)
+def get_record(element, mapping, record_type, default=None):
+    """Same as get_info, except the values are stored in a new record_type
+    record (see records.py). Fields missing from mapping are None.
+    """
+    record = record_type()
+    for key in mapping:
+        setattr(record, key, text_or_default(
+            element, mapping[key], default=default))
+    return record
+
+
+def get_job_info(job: Optional[bs4.Tag]) -> List[Job]:
     """
     Returns:
-        list of dicts, each element containing the details of a job for some company:
+        list of Job records, each containing the details of a job for some company:
            - job title
            - company
            - date_range
@@ -156,12 +428,12 @@ def get_job_info(job: Optional[bs4.Tag]) -> List[dict]:
     if (position_elements):
         company = text_or_default(job,
                                   '.pv-entity__company-summary-info > h3 > span:nth-of-type(2)')
-        positions = list(map(lambda pos: get_info(pos, {
+        positions = list(map(lambda pos: get_record(pos, {
             'title': '.pv-entity__summary-info-v2 > h3 > span:nth-of-type(2)',
             'date_range': '.pv-entity__date-range span:nth-of-type(2)',
             'location': '.pv-entity__location > span:nth-of-type(2)',
             'description': '.pv-entity__description'
-        }), position_elements))
+        }, Job), position_elements))
         for pos in positions:
             pos['company'] = company
             pos['li_company_url'] = company_url
@@ -172,13 +444,13 @@ def get_job_info(job: Optional[bs4.Tag]) -> List[dict]:
             all_positions.append(pos)
 
     else:
-        job_info = get_info(job, {
+        job_info = get_record(job, {
             'title': '.pv-entity__summary-info h3:nth-of-type(1)',
             'company': '.pv-entity__secondary-title',
             'date_range': '.pv-entity__date-range span:nth-of-type(2)',
             'location': '.pv-entity__location span:nth-of-type(2)',
             'description': '.pv-entity__description',
-        })
+        }, Job)
         if job_info['description'] is not None:
             job_info['description'] = job_info['description'].replace(
                 'See less\n', '').replace('... See more', '').strip()
@@ -201,60 +473,53 @@ def get_job_info(job: Optional[bs4.Tag]) -> List[dict]:
 def get_school_info(school):
     """
     Returns:
-        dict of school name, degree, grades, field_of_study, date_range, &
+        School record of name, degree, grades, field_of_study, date_range, &
         extra-curricular activities
     """
-    return get_info(school, {
+    return get_record(school, {
         'name': '.pv-entity__school-name',
         'degree': '.pv-entity__degree-name span:nth-of-type(2)',
         'grades': '.pv-entity__grade span:nth-of-type(2)',
         'field_of_study': '.pv-entity__fos span:nth-of-type(2)',
         'date_range': '.pv-entity__dates span:nth-of-type(2)',
         'activities': '.activities-societies'
-    })
+    }, School)
 
 
 def get_volunteer_info(exp):
     """
     Returns:
-        dict of title, company, date_range, location, cause, & description
+        Volunteering record of title, company, date_range, location, cause, &
+        description
     """
-    return get_info(exp, {
+    return get_record(exp, {
         'title': '.pv-entity__summary-info h3:nth-of-type(1)',
         'company': '.pv-entity__secondary-title',
         'date_range': '.pv-entity__date-range span:nth-of-type(2)',
         'location': '.pv-entity__location span:nth-of-type(2)',
         'cause': '.pv-entity__cause span:nth-of-type(2)',
         'description': '.pv-entity__description'
-    })
+    }, Volunteering)
 
 
 def get_skill_info(skill):
     """
     Returns:
-        dict of skill name and # of endorsements
+        Skill record of skill name and # of endorsements
     """
-    return get_info(skill, {
+    return get_record(skill, {
         'name': '.pv-skill-category-entity__name',
         'endorsements': '.pv-skill-category-entity__endorsement-count'
-    }, default=0)
+    }, Skill, default=0)
 
 
-# Takes a recommendation element and return a dict of relevant information.
+# Takes a recommendation element and return a Recommendation record of relevant information.
 def get_recommendation_details(rec):
     li_id_expr = re.compile(
         r'((?<=in\/).+(?=\/)|(?<=in\/).+)')  # re to get li id
     # re to get date of recommendation
     date_expr = re.compile(r'\w+ \d{1,2}, \d{4}, ')
-    rec_dict = {
-        'text': None,
-        'date': None,
-        'connection': {
-            'relationship': None,
-            'name': None,
-            'li_id': None
-        }
-    }
+    rec_dict = Recommendation(connection=Connection())
 
     # remove See more and See less
     for text_link in all_or_default(rec, 'a[role="button"]'):
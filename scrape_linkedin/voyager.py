@@ -0,0 +1,364 @@
+"""
+Reads the JSON that linkedin's pages fetch their data from (its 'voyager' API)
+out of a Chrome browser's network log, and maps it into the shapes returned by
+Profile.to_dict and Company.to_dict, see Scraper(capture=True).
+
+Voyager responses are normalized: {'data': ..., 'included': [entities]}, where
+every entity has a '$type', and refers to others by their 'entityUrn'.
+"""
+import base64
+import calendar
+import json
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+VOYAGER_URL_PATTERN = '/voyager/api/'
+
+# Profile attributes the responses of a profile page don't hold
+UNCAPTURED_PROFILE_FIELDS = ['interests']
+
+# Profile.accomplishments key -> voyager entity type and the field naming it
+ACCOMPLISHMENT_TYPES = {
+    'publications': ('Publication', 'name'),
+    'certifications': ('Certification', 'name'),
+    'patents': ('Patent', 'title'),
+    'courses': ('Course', 'name'),
+    'projects': ('Project', 'title'),
+    'honors': ('Honor', 'title'),
+    'test_scores': ('TestScore', 'name'),
+    'languages': ('Language', 'name'),
+    'organizations': ('Organization', 'name')
+}
+
+
+def read_responses(driver, pattern=VOYAGER_URL_PATTERN):
+    """Return the JSON responses to requests for urls containing pattern that
+    a browser has received since this was last called. The browser must keep
+    a performance log, see browser.capture_options.
+
+    Returns:
+        {list}: (url, data) tuples, in the order they were received
+    """
+    responses = []
+    for entry in driver.get_log('performance'):
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        if message.get('method') != 'Network.responseReceived':
+            continue
+        response = message['params']['response']
+        if pattern not in response['url'] or 'json' not in response.get('mimeType', ''):
+            continue
+        try:
+            body = driver.execute_cdp_cmd('Network.getResponseBody', {
+                'requestId': message['params']['requestId']})
+            text = body['body']
+            if body.get('base64Encoded'):
+                text = base64.b64decode(text).decode('utf-8')
+            responses.append((response['url'], json.loads(text)))
+        except Exception as e:
+            # Bodies of redirects and cancelled requests aren't kept
+            logger.debug("Could not read the response from %s: %s",
+                         response['url'], e)
+    return responses
+
+
+def entities(responses):
+    """Return every entity in voyager responses ((url, data) tuples or just
+    data), keeping the last copy of entities seen more than once"""
+    found = {}
+    for response in responses:
+        if isinstance(response, tuple):
+            response = response[1]
+        if not isinstance(response, dict):
+            continue
+        for entity in [response.get('data')] + list(response.get('included') or []):
+            if isinstance(entity, dict) and '$type' in entity:
+                found[entity.get('entityUrn') or id(entity)] = entity
+    return list(found.values())
+
+
+def _of_type(all_entities, name):
+    return [e for e in all_entities if e['$type'].rsplit('.', 1)[-1] == name]
+
+
+def _ref(entity, key, index):
+    """Follow a reference from entity to another, inline or by urn"""
+    value = entity.get(key) or entity.get('*' + key)
+    if isinstance(value, str):
+        return index.get(value)
+    return value if isinstance(value, dict) else None
+
+
+def _date(date):
+    """{'month': 1, 'year': 2015} -> 'Jan 2015'"""
+    if not date or not date.get('year'):
+        return None
+    if date.get('month'):
+        return '{} {}'.format(calendar.month_abbr[date['month']], date['year'])
+    return str(date['year'])
+
+
+def date_range(entity):
+    """Format an entity's date range the way profiles display it, eg.
+    'Jan 2015 – Present'"""
+    period = entity.get('dateRange') or entity.get('timePeriod')
+    if not period:
+        return None
+    start = _date(period.get('start') or period.get('startDate'))
+    if not start:
+        return None
+    end = _date(period.get('end') or period.get('endDate')) or 'Present'
+    return '{} – {}'.format(start, end)
+
+
+def _datetime(ms):
+    return datetime.fromtimestamp(ms / 1000, timezone.utc)
+
+
+def _timestamp(ms, fmt):
+    if not ms:
+        return None
+    return _datetime(ms).strftime(fmt)
+
+
+def image_url(value):
+    """Return the url of the largest version of the first image in value (any
+    voyager image structure), or '' if it has none"""
+    if isinstance(value, dict):
+        if value.get('rootUrl') is not None and value.get('artifacts'):
+            largest = max(value['artifacts'], key=lambda a: a.get('width', 0))
+            return value['rootUrl'] + largest.get('fileIdentifyingUrlPathSegment', '')
+        values = value.values()
+    elif isinstance(value, list):
+        values = value
+    else:
+        return ''
+    for child in values:
+        url = image_url(child)
+        if url:
+            return url
+    return ''
+
+
+def _name(profile):
+    if not profile:
+        return None
+    name = ' '.join(filter(None, [profile.get('firstName'), profile.get('lastName')]))
+    return name or None
+
+
+def _main_profile(all_entities, public_id=None):
+    profiles = [p for p in _of_type(all_entities, 'Profile') if p.get('firstName')]
+    # Urls may hold a member id rather than the username
+    profiles = [p for p in profiles if p.get('publicIdentifier') == public_id] or profiles
+    # Other members (eg. recommenders) are included without a headline
+    profiles.sort(key=lambda p: 'headline' not in p)
+    return profiles[0] if profiles else None
+
+
+def _company_url(urn):
+    if not urn:
+        return None
+    return 'https://www.linkedin.com/company/{}/'.format(urn.rsplit(':', 1)[-1])
+
+
+def _job(position):
+    return {
+        'title': position.get('title'),
+        'company': position.get('companyName'),
+        'date_range': date_range(position),
+        'location': position.get('locationName') or position.get('geoLocationName'),
+        'description': position.get('description'),
+        'li_company_url': _company_url(position.get('companyUrn') or position.get('*company'))
+    }
+
+
+def _school(education):
+    return {
+        'name': education.get('schoolName'),
+        'degree': education.get('degreeName'),
+        'grades': education.get('grade'),
+        'field_of_study': education.get('fieldOfStudy'),
+        'date_range': date_range(education),
+        'activities': education.get('activities')
+    }
+
+
+def _volunteering(experience):
+    cause = experience.get('cause')
+    return {
+        'title': experience.get('role') or experience.get('title'),
+        'company': experience.get('companyName'),
+        'date_range': date_range(experience),
+        'location': experience.get('locationName'),
+        'cause': cause.replace('_', ' ').capitalize() if cause else None,
+        'description': experience.get('description')
+    }
+
+
+def _skill(skill):
+    count = skill.get('endorsementCount')
+    return {'name': skill.get('name'),
+            'endorsements': str(count) if count else None}
+
+
+def _recommendation(recommendation, other):
+    return {
+        'text': recommendation.get('recommendationText'),
+        'date': _timestamp(recommendation.get('created'), '%Y-%m-%d'),
+        'connection': {
+            'relationship': recommendation.get('relationship'),
+            'name': _name(other),
+            'li_id': other.get('publicIdentifier') if other else None
+        }
+    }
+
+
+def _contact_info(profile, all_entities):
+    info = {'email': None, 'phone': None, 'connected': None, 'websites': []}
+    for source in [profile] + [e for e in all_entities
+                               if e['$type'].endswith('ContactInfo')]:
+        email = source.get('emailAddress')
+        if isinstance(email, dict):
+            email = email.get('emailAddress')
+        info['email'] = email or info['email']
+        for phone in source.get('phoneNumbers') or []:
+            number = phone.get('number') or (phone.get('phoneNumber') or {}).get('number')
+            info['phone'] = info['phone'] or number
+        if source.get('connectedAt'):
+            connected = _datetime(source['connectedAt'])
+            info['connected'] = '{} {}, {}'.format(
+                connected.strftime('%b'), connected.day, connected.year)
+        websites = [w.get('url') for w in source.get('websites') or [] if w.get('url')]
+        info['websites'] = websites or info['websites']
+    return info
+
+
+def profile_from_voyager(responses, public_id=None):
+    """Map voyager responses from a profile page into Profile.to_dict() output
+
+    Params:
+        - responses {list}: see read_responses
+        - public_id {str}: the profile's username, to tell it apart from other
+        members in the responses (default: the only one with a headline)
+
+    Returns:
+        {dict}: to_dict() output, or None if responses hold no profile. It has
+        no 'interests', which the profile page doesn't load (see
+        UNCAPTURED_PROFILE_FIELDS).
+    """
+    all_entities = entities(responses)
+    profile = _main_profile(all_entities, public_id)
+    if not profile:
+        return None
+    index = {e['entityUrn']: e for e in all_entities if 'entityUrn' in e}
+
+    jobs = [_job(p) for p in _of_type(all_entities, 'Position')]
+    schools = [_school(e) for e in _of_type(all_entities, 'Education')]
+    current = [p for p in _of_type(all_entities, 'Position')
+               if not (p.get('dateRange') or p.get('timePeriod') or {}).get('end')]
+    followers = [f.get('followerCount') or f.get('followersCount')
+                 for f in _of_type(all_entities, 'FollowingInfo')]
+
+    personal_info = {
+        'name': _name(profile),
+        'headline': profile.get('headline'),
+        'company': current[0].get('companyName') if current else None,
+        'school': schools[0]['name'] if schools else None,
+        'location': profile.get('locationName') or profile.get('geoLocationName'),
+        'summary': profile.get('summary') or '',
+        'image': image_url(profile.get('profilePicture') or profile.get('picture')),
+        'followers': '{:,}'.format(followers[0]) if followers and followers[0] else ''
+    }
+    personal_info.update(_contact_info(profile, all_entities))
+
+    skills = [_skill(s) for s in _of_type(all_entities, 'Skill')]
+    skills.sort(key=lambda s: int(s['endorsements'] or 0), reverse=True)
+
+    recommendations = {'received': [], 'given': []}
+    for recommendation in _of_type(all_entities, 'Recommendation'):
+        recommender = _ref(recommendation, 'recommender', index)
+        if recommender is profile or (recommender or {}).get('publicIdentifier') == profile.get('publicIdentifier'):
+            recommendations['given'].append(_recommendation(
+                recommendation, _ref(recommendation, 'recommendee', index)))
+        else:
+            recommendations['received'].append(
+                _recommendation(recommendation, recommender))
+
+    return {
+        'personal_info': personal_info,
+        'experiences': {
+            'jobs': jobs,
+            'education': schools,
+            'volunteering': [_volunteering(v) for v in _of_type(all_entities, 'VolunteerExperience')]
+        },
+        'skills': skills,
+        'accomplishments': {
+            key: [e.get(field) for e in _of_type(all_entities, entity_type)]
+            for key, (entity_type, field) in ACCOMPLISHMENT_TYPES.items()
+        },
+        'recommendations': recommendations
+    }
+
+
+def _company_size(company):
+    size = company.get('staffCountRange') or {}
+    lines = []
+    if size.get('start'):
+        if size.get('end'):
+            lines.append('{:,}-{:,} employees'.format(size['start'], size['end']))
+        else:
+            lines.append('{:,}+ employees'.format(size['start']))
+    if company.get('staffCount'):
+        lines.append('{:,} on LinkedIn'.format(company['staffCount']))
+    return '\n'.join(lines) or None
+
+
+def _localized(value):
+    if isinstance(value, dict):
+        return value.get('localizedName') or value.get('name')
+    return value
+
+
+def company_from_voyager(responses, universal_name=None):
+    """Map voyager responses from a company page into the overview of
+    Company.to_dict() output
+
+    Params:
+        - responses {list}: see read_responses
+        - universal_name {str}: the company id in its url, to tell it apart
+        from other companies in the responses (default: the first company)
+
+    Returns:
+        {dict}: overview, or None if responses hold no company
+    """
+    companies = [c for c in _of_type(entities(responses), 'Company') if c.get('name')]
+    # Urls may hold a numeric id rather than the universal name
+    companies = [c for c in companies
+                 if c.get('universalName') == universal_name] or companies
+    if not companies:
+        return None
+    company = companies[0]
+    headquarters = company.get('headquarter') or {}
+    industries = company.get('companyIndustries') or company.get('industries') or []
+    metadata = {
+        'website': company.get('companyPageUrl') or company.get('websiteUrl'),
+        'industry': ', '.join(filter(None, map(_localized, industries))) or None,
+        'company_size': _company_size(company),
+        'headquarters': ', '.join(filter(None, [headquarters.get('city'),
+                                                headquarters.get('geographicArea')])) or None,
+        'type': _localized(company.get('companyType')),
+        'founded': str(company['foundedOn']['year']) if (company.get('foundedOn') or {}).get('year') else None,
+        'specialties': ', '.join(company.get('specialities') or []) or None
+    }
+    return {
+        'description': company.get('description'),
+        'image': image_url(company.get('logo')),
+        'name': company.get('name'),
+        'num_employees': company.get('staffCount'),
+        'metadata': {key: value for key, value in metadata.items() if value}
+    }
@@ -34,5 +34,8 @@ setup(name='scrape_linkedin',
           'selenium',
           'click',
           'joblib'
-      ]
+      ],
+      extras_require={
+          'lxml': ['lxml']
+      }
       )
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scrape_linkedin import (AsyncCompanyScraper, AsyncProfileScraper,
+                             ProfileScraper, async_scrape_many)
+
+from fakes import FakeDriver
+
+
+class QuittableDriver(FakeDriver):
+    """A browser that stops responding once quit"""
+    started = 0
+
+    def __init__(self, **kwargs):
+        super(QuittableDriver, self).__init__(**kwargs)
+        QuittableDriver.started += 1
+        self.quit_event = threading.Event()
+
+    def quit(self):
+        self.calls.append(('quit',))
+        self.quit_event.set()
+
+    def execute_script(self, *args):
+        if self.quit_event.is_set():
+            raise Exception('browser is gone')
+        return 0
+
+
+class Result(object):
+    def __init__(self, user, fields):
+        self.user = user
+        self.fields = fields
+        self.released_in = None
+
+    def release(self):
+        self.released_in = threading.current_thread()
+
+
+@pytest.fixture
+def scrapes(monkeypatch):
+    """Replaces ProfileScraper.scrape, recording how many run at once. Users
+    named 'slow' block until their browser is quit, 'bad' ones fail."""
+    state = {'running': 0, 'most': 0, 'users': [], 'lock': threading.Lock()}
+
+    def scrape(self, user=None, fields=None):
+        with state['lock']:
+            state['users'].append(user)
+            state['running'] += 1
+            state['most'] = max(state['most'], state['running'])
+        try:
+            if user == 'slow':
+                self.driver.quit_event.wait(5)
+                raise Exception('browser is gone')
+            time.sleep(0.02)
+            if user == 'bad':
+                raise ValueError('no such profile')
+            return Result(user, fields)
+        finally:
+            with state['lock']:
+                state['running'] -= 1
+    QuittableDriver.started = 0
+    monkeypatch.setattr(ProfileScraper, 'scrape', scrape)
+    return state
+
+
+def _run(awaitable):
+    # asyncio.run needs python 3.7
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(awaitable)
+    finally:
+        loop.close()
+
+
+def _scraper(**kwargs):
+    return AsyncProfileScraper(cookie='li_at', driver=QuittableDriver, **kwargs)
+
+
+def test_scrape_extracts_off_the_event_loop(scrapes):
+    async def main():
+        async with _scraper(size=2) as scraper:
+            return await scraper.scrape(user='austinoboyle', fields=['skills'])
+    result = _run(main())
+    assert (result.user, result.fields) == ('austinoboyle', ['skills'])
+    assert result.released_in not in (None, threading.main_thread())
+
+
+def test_scrape_many_streams_with_bounded_browsers(scrapes):
+    users = ['a', 'bad', 'c', 'd', 'e', 'f']
+
+    async def main():
+        async with _scraper(size=2) as scraper:
+            return [pair async for pair in scraper.scrape_many(users)]
+    results = dict(_run(main()))
+    assert sorted(results) == sorted(users)
+    assert isinstance(results['bad'], ValueError)
+    assert all(results[user].user == user for user in users if user != 'bad')
+    assert scrapes['most'] <= 2
+    assert QuittableDriver.started == 2
+
+
+def test_timeout_quits_the_browser(scrapes):
+    async def main():
+        async with _scraper(size=1) as scraper:
+            with pytest.raises(asyncio.TimeoutError):
+                await scraper.scrape(user='slow', timeout=0.1)
+            # The browser is replaced, so the next item isn't held up
+            return await scraper.scrape(user='austinoboyle', timeout=5)
+    assert _run(main()).user == 'austinoboyle'
+    assert QuittableDriver.started == 2
+
+
+def test_cancelled_item_never_starts(scrapes):
+    async def main():
+        async with _scraper(size=1, warm=True) as scraper:
+            slow = asyncio.ensure_future(scraper.scrape(user='slow'))
+            queued = asyncio.ensure_future(scraper.scrape(user='queued'))
+            await asyncio.sleep(0.05)
+            queued.cancel()
+            slow.cancel()
+            await asyncio.gather(slow, queued, return_exceptions=True)
+            return await scraper.scrape(user='austinoboyle', timeout=5)
+    assert _run(main()).user == 'austinoboyle'
+    assert scrapes['users'] == ['slow', 'austinoboyle']
+
+
+def test_cancelled_lease_doesnt_start_a_browser(scrapes):
+    from scrape_linkedin.AsyncScraper import _Lease
+    scraper = _scraper(size=1)
+    lease = _Lease()
+    lease.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        scraper._scrape(lease, {'user': 'a'})
+    assert QuittableDriver.started == 0
+    assert scrapes['users'] == []
+
+
+def test_async_scrape_many(scrapes):
+    async def main():
+        return [pair async for pair in async_scrape_many(
+            ProfileScraper, ['a', 'b'], size=2, fields=['skills'],
+            cookie='li_at', driver=QuittableDriver)]
+    results = dict(_run(main()))
+    assert results['a'].fields == ['skills']
+    with pytest.raises(ValueError):
+        _run(async_scrape_many(object, []).__anext__())
+
+
+def test_scraper_options(scrapes, monkeypatch):
+    options = []
+    monkeypatch.setattr(ProfileScraper, 'scrape', lambda self, user=None, fields=None:
+                        options.append(self.contact_info))
+
+    async def main():
+        async with _scraper(size=1, scraper_options={'contact_info': 'skip'}) as scraper:
+            await scraper.scrape(user='a')
+    _run(main())
+    assert options == ['skip']
+
+
+def test_item_argument():
+    assert AsyncProfileScraper.item_argument == 'user'
+    assert AsyncCompanyScraper.item_argument == 'company'
@@ -0,0 +1,256 @@
+import importlib
+import json
+import threading
+import time
+from os import path
+
+import pytest
+
+from scrape_linkedin import DriverPool, Profile, ProfileScraper, scrape_in_parallel
+
+from fakes import FakeDriver
+
+ParallelScraper = importlib.import_module('scrape_linkedin.ParallelScraper')
+
+DIR = path.dirname(path.abspath(__file__))
+
+
+class StartCounter(FakeDriver):
+    started = 0
+
+    def __init__(self, **kwargs):
+        super(StartCounter, self).__init__(**kwargs)
+        StartCounter.started += 1
+
+
+@pytest.fixture
+def pool():
+    StartCounter.started = 0
+    pool = DriverPool(size=2, cookie='li_at', driver=StartCounter)
+    yield pool
+    pool.close()
+
+
+def test_warm_browsers_are_reused(pool):
+    assert StartCounter.started == 2
+    with pool.lease(ProfileScraper) as scraper:
+        driver = scraper.driver
+        assert isinstance(scraper, ProfileScraper)
+    for _ in range(3):
+        with pool.lease() as session:
+            assert session.driver is driver
+    assert StartCounter.started == 2
+    # Scrapers built on a leased browser don't quit it
+    assert ('quit',) not in driver.calls
+
+
+def test_lease_passes_scraper_arguments(pool):
+    with pool.lease(ProfileScraper, contact_info='skip', contact_info_timeout=1) as scraper:
+        assert scraper.contact_info == 'skip' and scraper.contact_info_timeout == 1
+
+
+def test_session_cant_scrape(pool):
+    with pool.lease() as session:
+        with pytest.raises(NotImplementedError, match='lease a scraper'):
+            session.scrape()
+
+
+def test_lazy_start():
+    StartCounter.started = 0
+    with DriverPool(size=2, warm=False, cookie='li_at', driver=StartCounter) as pool:
+        assert StartCounter.started == 0
+        with pool.lease():
+            with pool.lease():
+                pass
+        assert StartCounter.started == 2
+
+
+def test_unhealthy_browser_is_replaced(pool):
+    with pool.lease() as session:
+        session.driver.execute_script = None
+    assert ('quit',) in session.driver.calls
+    leased = [pool.acquire(), pool.acquire()]
+    assert session not in leased
+    assert StartCounter.started == 3
+
+
+@pytest.mark.parametrize('attributes', [{'window_handles': []},
+                                        {'current_url': 'chrome-error://chromewebdata/'}])
+def test_browser_without_a_usable_window_is_replaced(pool, attributes):
+    with pool.lease() as session:
+        session.driver.__dict__.update(attributes)
+    assert ('quit',) in session.driver.calls
+
+
+def test_extra_windows_are_closed(pool):
+    with pool.lease() as session:
+        session.driver.window_handles = ['main', 'tab']
+    assert session.driver.calls[-4:] == [('switch_to.window', 'tab'), ('close',),
+                                         ('switch_to.window', 'main'),
+                                         ('execute_script', 'return 1')]
+
+
+def test_max_leases():
+    with DriverPool(size=1, max_leases=2, cookie='li_at', driver=FakeDriver) as pool:
+        with pool.lease() as first:
+            pass
+        with pool.lease() as second:
+            pass
+        with pool.lease() as third:
+            pass
+    assert first is second and third is not first
+
+
+def test_acquire_timeout(pool):
+    leased = [pool.acquire(), pool.acquire()]
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.01)
+    # A waiting thread gets the next returned browser
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=5)))
+    waiter.start()
+    pool.release(leased[0])
+    waiter.join()
+    assert got == [leased[0]]
+
+
+def test_acquire_timeout_is_not_restarted(pool):
+    pool.acquire(), pool.acquire()
+    stop = threading.Event()
+
+    def steal():
+        # Discarded browsers whose replacement another acquirer started
+        while not stop.wait(0.02):
+            pool._idle.put(None)
+    thief = threading.Thread(target=steal)
+    thief.start()
+    start = time.monotonic()
+    try:
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.2)
+    finally:
+        stop.set()
+        thief.join()
+    assert time.monotonic() - start < 1
+
+
+def test_closed_pool(pool):
+    session = pool.acquire()
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    pool.release(session)
+    assert ('quit',) in session.driver.calls
+
+
+def test_scrape_in_parallel_with_pool(pool, tmp_path, monkeypatch):
+    with open(path.join(DIR, 'html_files', 'profile.html'), 'r') as f:
+        html = f.read()
+    drivers = set()
+
+    def scrape(self, user=None, fields=None):
+        drivers.add(self.driver)
+        return Profile(html, fields=['skills'])
+    monkeypatch.setattr(ProfileScraper, 'scrape', scrape)
+
+    output_file = str(tmp_path / 'out.json')
+    data = scrape_in_parallel(ProfileScraper, ['a', 'b', 'c', 'd'], output_file,
+                              pool=pool, temp_dir=str(tmp_path / 'tmp'))
+    assert sorted(data) == ['a', 'b', 'c', 'd']
+    assert len(data['a']['skills']) > 0
+    with open(output_file, 'r') as f:
+        assert json.load(f) == data
+    assert len(drivers) == 2 and StartCounter.started == 2
+
+
+def test_scrape_in_parallel_without_returning_data(pool, tmp_path, monkeypatch):
+    monkeypatch.setattr(ProfileScraper, 'scrape', lambda self, user=None, fields=None:
+                        Profile.from_dict({'skills': [{'name': str(user), 'endorsements': None}]}))
+    output_file = str(tmp_path / 'out.json')
+    assert scrape_in_parallel(ProfileScraper, ['a', 'b', 'a'], output_file, pool=pool,
+                              temp_dir=str(tmp_path / 'tmp'), return_data=False) is None
+    with open(output_file, 'r') as f:
+        data = json.load(f)
+    assert sorted(data) == ['a', 'b']
+    assert data['b'] == {'skills': [{'name': 'b', 'endorsements': None}]}
+
+
+def test_scrape_in_parallel_resumes_from_stale_results(pool, tmp_path, monkeypatch):
+    scraped = []
+
+    def scrape(self, user=None, fields=None):
+        scraped.append(user)
+        return Profile.from_dict({'skills': []})
+    monkeypatch.setattr(ProfileScraper, 'scrape', scrape)
+    # Left by a run that crashed after its snapshots were committed
+    temp_dir = tmp_path / 'tmp'
+    temp_dir.mkdir()
+    (temp_dir / '0.jsonl').write_text(
+        '{"item": "a", "data": {"skills": null}}\n'
+        '{"item": "z", "data": {"skills": null}}\n{"item": "b", "da')
+
+    data = scrape_in_parallel(ProfileScraper, ['a', 'b'], None, pool=pool,
+                              temp_dir=str(temp_dir))
+    assert scraped == ['b']
+    assert data == {'a': {'skills': None}, 'b': {'skills': []}}
+    assert not temp_dir.exists()
+
+
+def test_merged_results_have_unique_string_keys(tmp_path):
+    output_file = str(tmp_path / 'out.json')
+    results = [(1, {'n': 1}), ('a', {'n': 2}), ('a', {'n': 3}), (('x', 2), {'n': 4})]
+    data = ParallelScraper._merge_results(lambda: iter(results), output_file)
+    # The last result of an item wins, like a dict update
+    with open(output_file, 'r') as f:
+        assert json.load(f) == data == {'1': {'n': 1}, 'a': {'n': 3}, '["x", 2]': {'n': 4}}
+
+
+def test_scrape_job_appends_json_lines(tmp_path, monkeypatch):
+    from scrape_linkedin.ParallelScraper import read_results, scrape_job
+
+    def scrape(self, user=None, fields=None):
+        if user == 'bad':
+            raise ValueError('no such profile')
+        return Profile.from_dict({'skills': [{'name': user, 'endorsements': None}]})
+    monkeypatch.setattr(ProfileScraper, 'scrape', scrape)
+
+    output_file = str(tmp_path / '0.jsonl')
+    scrape_job(ProfileScraper, ['a', 'bad'], output_file, cookie='li_at', driver=StartCounter)
+    scrape_job(ProfileScraper, ['b'], output_file, cookie='li_at', driver=StartCounter)
+    with open(output_file, 'r') as f:
+        lines = [json.loads(line) for line in f]
+    assert [line['item'] for line in lines] == ['a', 'b']
+    assert lines[1]['data'] == {'skills': [{'name': 'b', 'endorsements': None}]}
+
+    # A line cut short by a crash is skipped
+    with open(output_file, 'a') as f:
+        f.write('{"item": "c", "da')
+    assert [item for item, data in read_results([output_file])] == ['a', 'b']
+
+
+def test_scrape_job_commits_snapshots_once_written(tmp_path, monkeypatch):
+    import importlib
+    from scrape_linkedin import SnapshotStore
+    from scrape_linkedin.ParallelScraper import scrape_job
+    parallel_scraper = importlib.import_module('scrape_linkedin.ParallelScraper')
+
+    monkeypatch.setattr(ProfileScraper, 'scrape', lambda self, user=None, fields=None:
+                        Profile.from_dict({'skills': [{'name': user, 'endorsements': None}]}))
+    store = SnapshotStore(str(tmp_path / 'snapshots'))
+    output_file = str(tmp_path / '0.jsonl')
+
+    def crash(fd):
+        raise OSError('disk full')
+    monkeypatch.setattr(parallel_scraper.os, 'fsync', crash)
+    with pytest.raises(OSError):
+        scrape_job(ProfileScraper, ['a'], output_file, snapshots=store,
+                   cookie='li_at', driver=StartCounter)
+    # The delta may not have reached the disk, so it isn't committed
+    assert store.get('profile/a') is None
+
+    monkeypatch.undo()
+    monkeypatch.setattr(ProfileScraper, 'scrape', lambda self, user=None, fields=None:
+                        Profile.from_dict({'skills': [{'name': user, 'endorsements': None}]}))
+    scrape_job(ProfileScraper, ['a'], output_file, snapshots=store,
+               cookie='li_at', driver=StartCounter)
+    assert store.get('profile/a') is not None
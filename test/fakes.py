@@ -0,0 +1,21 @@
+from types import SimpleNamespace
+
+
+class FakeDriver(object):
+    """Stands in for a webdriver, recording every call made on it"""
+    current_url = 'data:,'
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.calls = []
+        self.window_handles = ['main']
+        self.switch_to = SimpleNamespace(
+            window=lambda handle: self.calls.append(('switch_to.window', handle)))
+
+    def __getattr__(self, name):
+        def method(*args):
+            self.calls.append((name,) + args)
+            if name.startswith('find_element'):
+                raise Exception('not found')
+            return 0
+        return method
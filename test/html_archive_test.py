@@ -0,0 +1,113 @@
+import importlib
+import json
+import os
+from os import path
+
+from click.testing import CliRunner
+
+from scrape_linkedin import Company, HtmlArchive, Profile
+from scrape_linkedin.cli import scrape
+
+DIR = path.dirname(path.abspath(__file__))
+HTML_DIR = path.join(DIR, 'html_files')
+
+
+def _read(fname):
+    with open(path.join(HTML_DIR, fname), 'r') as f:
+        return f.read()
+
+
+def _files(directory):
+    return [f for _, _, files in os.walk(directory) for f in files]
+
+
+def test_put_deduplicates(tmp_path):
+    archive = HtmlArchive(str(tmp_path))
+    html = _read('profile.html')
+    digest = archive.put(html)
+    assert archive.put(html) == digest
+    assert digest in archive
+    assert archive.get(digest) == html
+    assert len(_files(str(tmp_path / 'objects'))) == 1
+    assert path.getsize(archive._object_path(digest)) < len(html) / 2
+
+
+def test_add_and_entries(tmp_path):
+    archive = HtmlArchive(str(tmp_path))
+    archive.add('profile', {'profile': _read('profile.html')}, url='a')
+    archive.add('company', {'overview': _read('facebook_overview.html')}, url='b')
+    archive.add('profile', {'profile': _read('profile.html')}, url='a')
+    assert [e['url'] for e in archive.entries()] == ['a', 'b', 'a']
+    assert [e['url'] for e in archive.entries('company')] == ['b']
+    assert len(_files(str(tmp_path / 'objects'))) == 2
+
+
+def test_parse_cache(tmp_path):
+    archive = HtmlArchive(str(tmp_path), parser_version='v1')
+    entry = archive.add('profile', {'profile': _read('profile.html')})
+    expected = json.loads(json.dumps(Profile(_read('profile.html')).to_dict()))
+    assert archive.parse(entry) == expected
+
+    # A second parse is read straight from the cache
+    [cached] = _files(str(tmp_path / 'cache' / 'v1'))
+    cache_file = next(path.join(root, cached) for root, _, files in
+                      os.walk(str(tmp_path / 'cache')) if cached in files)
+    with open(cache_file, 'w') as f:
+        json.dump({'from': 'cache'}, f)
+    assert archive.parse(entry) == {'from': 'cache'}
+
+    # but not by a different parser version
+    assert HtmlArchive(str(tmp_path), parser_version='v2').parse(entry) == expected
+
+
+def test_parse_cache_key_resolves_the_default_parser(tmp_path, monkeypatch):
+    from scrape_linkedin import utils
+    archive = HtmlArchive(str(tmp_path), parser_version='v1')
+    entry = archive.add('profile', {'profile': _read('profile.html')})
+    archive.parse(entry, parser='html.parser')
+    archive.parse(entry)
+    # The default is cached under its actual name, and other hosts' defaults
+    # get their own entries
+    monkeypatch.setattr(utils, 'DEFAULT_PARSER', 'html.parser')
+    archive.parse(entry)
+    monkeypatch.setattr(utils, 'DEFAULT_PARSER', 'lxml')
+    archive.parse(entry)
+    assert len(_files(str(tmp_path / 'cache' / 'v1'))) == 2
+
+
+def test_parser_version_includes_libraries(monkeypatch):
+    archive_module = importlib.import_module('scrape_linkedin.HtmlArchive')
+    version = archive_module.parser_version()
+    monkeypatch.setattr(archive_module, '_library_version', lambda name: 'other')
+    assert archive_module.parser_version() != version
+
+
+def test_parse_all(tmp_path):
+    archive = HtmlArchive(str(tmp_path))
+    archive.add('company', {'overview': _read('facebook_overview.html')})
+    archive.add('company', {'overview': 'x', 'bogus': 'y'})
+    ok, failed = archive.parse_all()
+    assert ok['data'] == json.loads(json.dumps(
+        Company(_read('facebook_overview.html')).to_dict()))
+    assert 'TypeError' in failed['error']
+
+
+def test_parse_company_without_overview(tmp_path):
+    archive = HtmlArchive(str(tmp_path))
+    entry = archive.add('company', {'jobs': _read('facebook_overview.html')})
+    assert archive.parse(entry) == json.loads(json.dumps(
+        Company('', jobs=_read('facebook_overview.html')).to_dict()))
+
+
+def test_reparse_cli(tmp_path, monkeypatch):
+    archive = HtmlArchive(str(tmp_path / 'archive'))
+    archive.add('profile', {'profile': _read('profile.html')}, url='a')
+    archive.add('company', {'overview': _read('facebook_overview.html')}, url='b')
+    monkeypatch.chdir(tmp_path)
+    result = CliRunner().invoke(
+        scrape, ['reparse', 'archive', '--type', 'profile', '-o', 'out.jsonl'])
+    assert result.exit_code == 0, result.output
+    with open('out.jsonl') as f:
+        [line] = f.read().strip().split('\n')
+    assert json.loads(line)['url'] == 'a'
+    assert 'skills' in json.loads(line)['data']
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+
+def _imported_after(statement):
+    output = subprocess.check_output([sys.executable, '-c', statement + (
+        "\nimport sys; print(' '.join(sys.modules))")], universal_newlines=True)
+    return set(output.split())
+
+
+def test_parse_only_import_skips_selenium_and_joblib():
+    modules = _imported_after(
+        'from scrape_linkedin import Profile, Company, HtmlArchive, SnapshotStore\n'
+        'import scrape_linkedin.ParallelParser')
+    assert 'selenium' not in modules
+    assert 'joblib' not in modules
+
+
+def test_lazy_names_resolve():
+    modules = _imported_after(
+        'import scrape_linkedin.CompanyScraper\n'
+        'from scrape_linkedin import CompanyScraper, ProfileScraper, DriverPool, '
+        'HEADLESS_OPTIONS, scrape_in_parallel\n'
+        'import scrape_linkedin\n'
+        'assert isinstance(scrape_linkedin.CompanyScraper, type)\n'
+        'assert isinstance(ProfileScraper, type) and callable(scrape_in_parallel)\n'
+        "assert 'chrome_options' in HEADLESS_OPTIONS")
+    assert 'selenium' in modules
+
+
+def test_lazy_names_dont_need_module_getattr():
+    # A module level __getattr__ needs python 3.7
+    import scrape_linkedin
+    from scrape_linkedin import utils
+    assert '__getattr__' not in vars(scrape_linkedin)
+    assert '__getattr__' not in vars(utils)
+    assert 'ProfileScraper' in dir(scrape_linkedin)
@@ -0,0 +1,103 @@
+import threading
+from os import path
+
+import pytest
+
+from scrape_linkedin import Profile, instrumentation
+from scrape_linkedin.ParallelParser import parse_in_parallel
+from scrape_linkedin.utils import get_info, text_or_default
+
+DIR = path.dirname(path.abspath(__file__))
+PROFILE = path.join(DIR, 'html_files', 'profile.html')
+
+
+@pytest.fixture
+def enabled():
+    instrumentation.enable()
+    instrumentation.reset()
+    yield
+    instrumentation.disable()
+
+
+def test_disabled_by_default():
+    assert not instrumentation.is_enabled()
+    text_or_default(Profile('<p>hi</p>').soup, 'p')
+    assert instrumentation.report() == []
+
+
+def test_report(enabled):
+    with open(PROFILE, 'r') as f:
+        profile = Profile(f.read())
+    profile.skills
+    rows = {(r['attribute'], r['helper'], r['selector']): r
+            for r in instrumentation.report()}
+    skills = rows[('skills', 'all_or_default',
+                   '.pv-skill-category-entity__skill-wrapper')]
+    assert skills['calls'] == 1 and skills['hit_rate'] == 1.0
+    assert all(r['attribute'] == 'skills' for r in rows.values())
+
+
+def test_dead_selectors(enabled):
+    soup = Profile('<p>hi</p>').soup
+    text_or_default(soup, 'p')
+    text_or_default(soup, '.gone')
+    text_or_default(soup, '.gone', default='')
+    assert instrumentation.dead_selectors() == ['.gone']
+    by_selector = {r['selector']: r for r in instrumentation.report(by=('selector',))}
+    assert by_selector['.gone']['misses'] == 2
+
+
+def test_empty_text_is_a_hit(enabled):
+    soup = Profile('<p> </p>').soup
+    assert text_or_default(soup, 'p', default='') == ''
+    assert text_or_default(soup, '.gone', default='') == ''
+    hits = {r['selector']: r['hits'] for r in instrumentation.report()}
+    assert hits == {'p': 1, '.gone': 0}
+
+
+def test_nested_time_is_counted_once(enabled, monkeypatch):
+    ticks = iter(range(100))
+    monkeypatch.setattr(instrumentation, 'perf_counter', lambda: next(ticks))
+    soup = Profile('<p>hi</p>').soup
+    info = get_info(soup, {'text': 'p', 'missing': '.gone'}, default='')
+    assert info == {'text': 'hi', 'missing': ''}
+    rows = {r['helper']: r for r in instrumentation.report(by=('helper',))}
+    # get_info's 5 ticks include 2 of text_or_default calls
+    assert rows['get_info']['time'] == 3 and rows['text_or_default']['time'] == 2
+    assert rows['get_info']['hits'] == 1 and rows['text_or_default']['hits'] == 1
+
+
+def test_attributes_are_per_thread(enabled):
+    soup = Profile('<p>hi</p>').soup
+    entered, checked = threading.Event(), threading.Event()
+
+    def extract():
+        with instrumentation.attribute('skills'):
+            entered.set()
+            checked.wait(5)
+            text_or_default(soup, 'p')
+    thread = threading.Thread(target=extract)
+    thread.start()
+    entered.wait(5)
+    # Made while the other thread is extracting skills
+    text_or_default(soup, '.gone')
+    checked.set()
+    thread.join()
+    attributes = {r['selector']: r['attribute'] for r in instrumentation.report()}
+    assert attributes == {'p': 'skills', '.gone': None}
+
+
+def test_merge(enabled):
+    text_or_default(Profile('<p>hi</p>').soup, 'p')
+    snapshot = instrumentation.snapshot()
+    instrumentation.merge(snapshot)
+    [row] = instrumentation.report()
+    assert row['calls'] == 2 and row['hits'] == 2
+
+
+def test_parse_in_parallel_collects_worker_stats(enabled):
+    list(parse_in_parallel([PROFILE] * 2, num_workers=2,
+                           fields=['skills'], collect_stats=True))
+    [row] = [r for r in instrumentation.report(by=('helper',))
+             if r['helper'] == 'all_or_default']
+    assert row['calls'] == 2
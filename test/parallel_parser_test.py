@@ -0,0 +1,57 @@
+import json
+from os import path
+
+from click.testing import CliRunner
+
+from scrape_linkedin import Profile
+from scrape_linkedin.cli import scrape
+from scrape_linkedin.ParallelParser import find_html_files, parse_in_parallel
+
+DIR = path.dirname(path.abspath(__file__))
+HTML_DIR = path.join(DIR, 'html_files')
+PROFILES = [path.join(HTML_DIR, f) for f in ['profile.html', 'otherProfile.html']]
+
+
+def _expected(html_file, **kwargs):
+    with open(html_file, 'r') as f:
+        return json.loads(json.dumps(Profile(f.read(), **kwargs).to_dict()))
+
+
+def test_find_html_files(tmp_path):
+    assert len(find_html_files(HTML_DIR)) == 3
+    assert find_html_files(path.join(HTML_DIR, '*Profile.html')) == [PROFILES[1]]
+    manifest = tmp_path / 'manifest.txt'
+    manifest.write_text('# saved profiles\n{}\n\n{}\n'.format(*PROFILES))
+    assert find_html_files(str(manifest)) == PROFILES
+
+
+def test_parse_in_parallel_ordered():
+    results = list(parse_in_parallel(PROFILES * 2, num_workers=2,
+                                     max_pending=2, fields=['skills']))
+    assert [r['file'] for r in results] == PROFILES * 2
+    for r in results:
+        assert r['data'] == _expected(r['file'], fields=['skills'])
+
+
+def test_parse_in_parallel_unordered():
+    results = list(parse_in_parallel(PROFILES, num_workers=2, ordered=False))
+    assert sorted(r['file'] for r in results) == sorted(PROFILES)
+    for r in results:
+        assert json.loads(json.dumps(r['data'])) == _expected(r['file'])
+
+
+def test_parse_reports_errors():
+    missing = path.join(HTML_DIR, 'missing.html')
+    result, = parse_in_parallel([missing], num_workers=1)
+    assert result['file'] == missing and 'error' in result
+
+
+def test_parse_command(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = CliRunner().invoke(
+        scrape, ['parse', PROFILES[0], PROFILES[1], '-w', '2', '-a', 'skills', '-o', 'out.jsonl'])
+    assert result.exit_code == 0, result.output
+    with open('out.jsonl') as f:
+        lines = [json.loads(line) for line in f]
+    assert [l['file'] for l in lines] == PROFILES
+    assert lines[0]['data'] == _expected(PROFILES[0], fields=['skills'])
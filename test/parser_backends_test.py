@@ -0,0 +1,36 @@
+"""Ensure every available tree builder produces identical results"""
+from glob import glob
+from os import path
+
+import pytest
+from bs4.builder import builder_registry
+
+from scrape_linkedin import Company, Profile
+from scrape_linkedin.utils import DEFAULT_PARSER, PREFERRED_PARSERS
+
+DIR = path.dirname(path.abspath(__file__))
+HTML_FILES = sorted(glob(path.join(DIR, 'html_files', '*.html')))
+AVAILABLE_PARSERS = [
+    p for p in PREFERRED_PARSERS if builder_registry.lookup(p) is not None]
+
+
+def _parse(html_file, parser):
+    with open(html_file, 'r') as f:
+        html = f.read()
+    if path.basename(html_file).startswith('facebook'):
+        return Company(html, parser=parser).to_dict()
+    return Profile(html, parser=parser).to_dict()
+
+
+def test_default_parser_is_available():
+    assert DEFAULT_PARSER in AVAILABLE_PARSERS
+    assert DEFAULT_PARSER == AVAILABLE_PARSERS[0]
+
+
+@pytest.mark.parametrize('html_file', HTML_FILES, ids=path.basename)
+def test_to_dict_identical_across_parsers(html_file):
+    if len(AVAILABLE_PARSERS) < 2:
+        pytest.skip('Only one tree builder is installed')
+    baseline = _parse(html_file, 'html.parser')
+    for parser in AVAILABLE_PARSERS:
+        assert _parse(html_file, parser) == baseline, parser
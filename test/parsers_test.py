@@ -1,6 +1,7 @@
-from scrape_linkedin import Company, Profile
+from scrape_linkedin import Company, Profile, records
 from os import path
 import bs4
+import pytest
 from bs4 import BeautifulSoup as BS
 DIR = path.dirname(path.abspath(__file__))
 
@@ -46,3 +47,108 @@ def test_image_url():
     other_info = Profile(other_profile_html).to_dict()
     assert my_info['personal_info']['image'] and other_info['personal_info']['image']
     assert my_info['experiences']['jobs'][0]['li_company_url']
+
+
+def test_attributes_are_memoized():
+    with open(path.join(DIR, 'html_files/profile.html'), 'r') as f:
+        profile = Profile(f.read())
+    assert profile.experiences is profile.experiences
+    assert profile.to_dict()['experiences'] == profile.experiences
+    # Plain dicts are built on demand, not held on the object
+    assert profile.to_dict()['experiences'] is not profile.to_dict()['experiences']
+    assert profile == profile
+
+
+def test_to_dict_fields():
+    with open(path.join(DIR, 'html_files/profile.html'), 'r') as f:
+        html = f.read()
+    profile = Profile(html)
+    assert list(profile.to_dict(fields=['skills'])) == ['skills']
+    assert set(profile._cache) == {'skills'}
+
+    profile = Profile(html, fields=['experiences', 'skills'])
+    assert list(profile.to_dict()) == ['experiences', 'skills']
+    assert set(profile._cache) == {'experiences', 'skills'}
+    assert profile.to_dict() == Profile(html).to_dict(
+        fields=['experiences', 'skills'])
+
+    # An empty list is no fields, not every field
+    assert profile.to_dict(fields=[]) == {}
+    assert Profile(html, fields=[]).to_dict() == {}
+    assert Profile.from_dict({'skills': []}, fields=[]).to_dict() == {}
+
+
+def test_unknown_fields():
+    with pytest.raises(ValueError):
+        Profile('', fields=['not_a_field'])
+    with pytest.raises(ValueError):
+        Company('').to_dict(fields=['skills'])
+
+
+def test_partial_parse_matches_full_parse():
+    for fname in ['profile.html', 'otherProfile.html']:
+        with open(path.join(DIR, 'html_files', fname), 'r') as f:
+            html = f.read()
+        full = Profile(html).to_dict()
+        assert Profile(html, partial=True).to_dict() == full
+        for attribute in Profile.attributes:
+            partial = Profile(html, fields=[attribute], partial=True)
+            assert partial.to_dict() == {attribute: full[attribute]}
+
+
+def test_partial_parse_rejects_unparsed_fields():
+    with open(path.join(DIR, 'html_files/profile.html'), 'r') as f:
+        profile = Profile(f.read(), fields=['skills'], partial=True)
+    assert profile.skills
+    with pytest.raises(ValueError):
+        profile.experiences
+
+
+def test_release_keeps_extracted_data():
+    with open(path.join(DIR, 'html_files/profile.html'), 'r') as f:
+        html = f.read()
+    expected = Profile(html).to_dict()
+
+    profile = Profile(html)
+    profile.release()
+    assert profile.soup is None
+    assert profile.to_dict() == expected
+    assert Profile(html, release=True) == profile
+
+    profile = Profile(html, fields=['skills'], release=True)
+    assert profile.skills == expected['skills']
+    with pytest.raises(ValueError):
+        profile.interests
+
+    with open(path.join(DIR, 'html_files/facebook_overview.html'), 'r') as f:
+        html = f.read()
+    company = Company(html, release=True)
+    assert company.overview_soup is None and company.insights_soup is None
+    assert company.overview == Company(html).overview
+
+
+def test_extractors_return_records():
+    with open(path.join(DIR, 'html_files/profile.html'), 'r') as f:
+        profile = Profile(f.read())
+    job = profile.experiences['jobs'][0]
+    assert isinstance(job, records.Job)
+    assert not hasattr(job, '__dict__')
+    assert job['title'] == job.title and job.get('missing') is None
+    as_dict = profile.to_dict()['experiences']['jobs'][0]
+    assert type(as_dict) is dict and as_dict == job
+    assert list(as_dict) == list(records.Job.__slots__)
+    assert isinstance(profile.skills[0], records.Skill)
+
+
+def test_recommendation_tabs_are_separate():
+    rec = ('<li class="pv-recommendation-entity">'
+           '<a class="pv-recommendation-entity__member" href="/in/jane/">'
+           '<div class="pv-recommendation-entity__detail"><h3>Jane</h3><p>Title</p>'
+           '<p>January 5, 2019, Jane managed Austin directly</p></div></a>'
+           '<div class="pv-recommendation-entity__highlights">Text</div></li>')
+    profile = Profile('<section class="pv-recommendations-section">'
+                      '<div class="artdeco-tabpanel"><ul>{}</ul></div>'
+                      '<div class="artdeco-tabpanel"><ul>{}</ul></div>'
+                      '</section>'.format(rec, rec * 2))
+    assert len(profile.recommendations['received']) == 1
+    assert len(profile.recommendations['given']) == 2
@@ -0,0 +1,473 @@
+import importlib
+from types import SimpleNamespace
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+from scrape_linkedin import CompanyScraper, ProfileScraper, lean_options
+from scrape_linkedin import scripts
+from scrape_linkedin.browser import BLOCKED_URL_PATTERNS
+
+from fakes import FakeDriver
+
+
+def _scraper(scraper_type=ProfileScraper, **options):
+    scraper = scraper_type(cookie='li_at', driver=FakeDriver, **options)
+    scraper.driver.calls = []
+    return scraper
+
+
+def test_async_scroll_is_one_round_trip():
+    scraper = _scraper(scroll_mode='async')
+    scraper.scroll_to_bottom()
+    calls = scraper.driver.calls
+    assert [c[0] for c in calls] == ['set_script_timeout', 'execute_async_script']
+    name, script, selectors, increment, max_ms, quiet_ms, pause_ms = calls[1]
+    assert script == scripts.SCROLL_AND_EXPAND
+    assert selectors == ProfileScraper.EXPANDABLE_BUTTON_SELECTORS + \
+        [ProfileScraper.LINE_CLAMP_SELECTOR]
+    assert (increment, quiet_ms, pause_ms) == (300, None, 100)
+
+
+def test_async_scroll_adaptive_wait():
+    scraper = _scraper(scroll_mode='async', wait_strategy='adaptive')
+    scraper.scroll_to_bottom()
+    name, script, selectors, increment, max_ms, quiet_ms, pause_ms = scraper.driver.calls[1]
+    assert (quiet_ms, pause_ms) == (ProfileScraper.QUIET_PERIOD * 1000, 2000)
+
+
+def test_incremental_scroll():
+    scraper = _scraper()
+    scraper.scroll_to_bottom()
+    names = [c[0] for c in scraper.driver.calls]
+    assert names.count('find_element_by_css_selector') == len(
+        ProfileScraper.EXPANDABLE_BUTTON_SELECTORS)
+    assert 'execute_async_script' not in names
+
+
+def test_adaptive_pause_waits_in_page():
+    scraper = _scraper(wait_strategy='adaptive', max_wait=3)
+    scraper.pause()
+    scraper.pause()
+    calls = scraper.driver.calls
+    # The script timeout only needs setting once
+    assert [c[0] for c in calls] == ['set_script_timeout',
+                                     'execute_async_script', 'execute_async_script']
+    assert calls[1][1:] == (scripts.WAIT_FOR_QUIET,
+                            ProfileScraper.QUIET_PERIOD * 1000, 3000)
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        ProfileScraper(scroll_mode='sideways')
+    with pytest.raises(ValueError):
+        ProfileScraper(wait_strategy='eventually')
+
+
+def test_lean_chrome_options():
+    driver_options = lean_options()
+    arguments = driver_options['options'].arguments
+    assert '--headless' in arguments and '--disable-gpu' in arguments
+    assert set(BLOCKED_URL_PATTERNS['fonts']) <= set(driver_options['blocked_urls'])
+
+    driver_options = lean_options(headless=False, block=['third_party'])
+    assert '--headless' not in driver_options['options'].arguments
+    assert driver_options['blocked_urls'] == BLOCKED_URL_PATTERNS['third_party']
+
+
+def test_lean_firefox_options():
+    driver_options = lean_options('firefox', block=['images'])
+    assert 'blocked_urls' not in driver_options
+    assert driver_options['options'].preferences['permissions.default.image'] == 2
+    assert 'gfx.downloadable_fonts.enabled' not in driver_options['options'].preferences
+
+
+def test_lean_options_invalid():
+    with pytest.raises(ValueError):
+        lean_options(block=['css'])
+    with pytest.raises(ValueError):
+        lean_options('netscape')
+
+
+def test_scraper_blocks_urls():
+    driver_options = lean_options()
+    scraper = ProfileScraper(
+        cookie='li_at', driver=FakeDriver, driver_options=driver_options)
+    assert set(scraper.driver.kwargs) == {'options'}
+    assert 'blocked_urls' in driver_options
+    calls = scraper.driver.calls
+    assert calls[1] == ('execute_cdp_cmd', 'Network.setBlockedURLs',
+                        {'urls': driver_options['blocked_urls']})
+
+
+class FakeFirefox(FakeDriver):
+    """A driver without the Chrome DevTools protocol"""
+    current_url = 'about:blank'
+
+    def __getattr__(self, name):
+        if name == 'execute_cdp_cmd':
+            raise AttributeError(name)
+        return super(FakeFirefox, self).__getattr__(name)
+
+    def get(self, url):
+        self.calls.append(('get', url))
+        self.current_url = url
+
+    def get_cookies(self):
+        return [{'name': 'li_at', 'value': 'li_at', 'domain': '.linkedin.com'},
+                {'name': 'other', 'value': '1', 'domain': '.example.com'}]
+
+    def execute_script(self, script, *args):
+        self.calls.append(('execute_script', script) + args)
+        return {'voyager': '1'}
+
+
+def test_session_set_without_loading_linkedin():
+    scraper = ProfileScraper(cookie='li_at', driver=FakeDriver)
+    names = [c[:2] for c in scraper.driver.calls]
+    assert ('execute_cdp_cmd', 'Network.setCookies') in names
+    assert 'get' not in [c[0] for c in scraper.driver.calls]
+
+
+def test_lazy_session_starts_on_first_get():
+    scraper = ProfileScraper(cookie='li_at', driver=FakeDriver, lazy_session=True)
+    assert not [c for c in scraper.driver.calls if c[0] == 'execute_cdp_cmd']
+    scraper.get('https://www.linkedin.com/in/austinoboyle')
+    scraper.get('https://www.linkedin.com/in/someone-else')
+    calls = [c for c in scraper.driver.calls if c[0] in ('execute_cdp_cmd', 'get')]
+    assert [c[:2] for c in calls] == [
+        ('execute_cdp_cmd', 'Network.setCookies'),
+        ('get', 'https://www.linkedin.com/in/austinoboyle'),
+        ('get', 'https://www.linkedin.com/in/someone-else')]
+    assert calls[0][2]['cookies'][0]['value'] == 'li_at'
+
+
+class FlakyLoginDriver(FakeDriver):
+    def execute_cdp_cmd(self, cmd, params):
+        self.calls.append(('execute_cdp_cmd', cmd, params))
+        if len([c for c in self.calls if c[0] == 'execute_cdp_cmd']) == 1:
+            raise Exception('connection reset')
+
+
+def test_failed_session_start_is_retried():
+    scraper = ProfileScraper(cookie='li_at', driver=FlakyLoginDriver, lazy_session=True)
+    with pytest.raises(Exception):
+        scraper.get('https://www.linkedin.com/in/austinoboyle')
+    scraper.get('https://www.linkedin.com/in/austinoboyle')
+    calls = [c[:2] for c in scraper.driver.calls if c[0] in ('execute_cdp_cmd', 'get')]
+    assert calls == [
+        ('execute_cdp_cmd', 'Network.setCookies'),
+        ('execute_cdp_cmd', 'Network.setCookies'),
+        ('get', 'https://www.linkedin.com/in/austinoboyle')]
+
+
+def test_session_shared_with_scraper_instance():
+    first = ProfileScraper(cookie='li_at', driver=FakeDriver, lazy_session=True)
+    second = ProfileScraper(scraperInstance=first)
+    second.get('https://www.linkedin.com/in/austinoboyle')
+    first.get('https://www.linkedin.com/in/someone-else')
+    assert len([c for c in first.driver.calls if c[0] == 'execute_cdp_cmd']) == 1
+
+
+def test_session_without_cdp_uses_blank_page():
+    scraper = ProfileScraper(cookie='li_at', driver=FakeFirefox)
+    assert scraper.driver.calls[1:] == [
+        ('get', 'https://www.linkedin.com/robots.txt'),
+        ('add_cookie', {'name': 'li_at', 'value': 'li_at', 'domain': '.linkedin.com'})]
+
+
+def test_export_and_restore_session(tmp_path):
+    scraper = ProfileScraper(cookie='li_at', driver=FakeFirefox)
+    path = str(tmp_path / 'session.json')
+    state = scraper.export_session(path)
+    assert state == {
+        'cookies': [{'name': 'li_at', 'value': 'li_at', 'domain': '.linkedin.com'}],
+        'local_storage': {'voyager': '1'}}
+
+    restored = ProfileScraper(driver=FakeDriver, session=path)
+    calls = [c for c in restored.driver.calls if c[0] == 'execute_cdp_cmd']
+    assert calls[0][1] == 'Network.setCookies'
+    assert calls[0][2]['cookies'][0]['value'] == 'li_at'
+    assert calls[1][1] == 'Page.addScriptToEvaluateOnNewDocument'
+    assert '"voyager": "1"' in calls[1][2]['source']
+
+    restored = ProfileScraper(driver=FakeFirefox, session=state)
+    assert [c[0] for c in restored.driver.calls] == [
+        'set_window_size', 'get', 'add_cookie', 'execute_script']
+
+
+class FakeTabs(FakeDriver):
+    """A driver with several tabs, where each page becomes ready after the
+    number of PAGE_READY checks given in load_checks"""
+    load_checks = {}
+
+    def __init__(self, **kwargs):
+        super(FakeTabs, self).__init__(**kwargs)
+        self.current_window_handle = 'main'
+        self.urls = {'main': 'about:blank'}
+        self.checks = {}
+        self.switch_to = SimpleNamespace(window=self._switch)
+
+    def _switch(self, handle):
+        self.current_window_handle = handle
+
+    def execute_script(self, script, *args):
+        tab = self.current_window_handle
+        if script == scripts.START_NAVIGATION:
+            self.calls.append(('navigate', tab, args[0]))
+            self.urls[tab] = args[0]
+            self.checks[tab] = 0
+        elif script == scripts.PAGE_READY:
+            self.checks[tab] += 1
+            user = self.urls[tab].rsplit('/', 1)[1]
+            return self.checks[tab] > self.load_checks.get(user, 0)
+        elif 'window.open' in script:
+            handle = 'tab{}'.format(len(self.window_handles))
+            self.window_handles.append(handle)
+            self.urls[handle] = 'about:blank'
+        else:
+            self.calls.append(('execute_script', script) + args)
+
+    def close(self):
+        self.calls.append(('close', self.current_window_handle))
+        self.window_handles.remove(self.current_window_handle)
+
+
+class TabScraper(ProfileScraper):
+    TAB_POLL_INTERVAL = 0
+
+    def finish_item(self, user, fields=None):
+        self.driver.calls.append(('finish', self.driver.current_window_handle, user))
+        return self.driver.current_window_handle
+
+
+def test_scrape_many_overlaps_page_loads():
+    FakeTabs.load_checks = {'slow': 5}
+    scraper = TabScraper(cookie='li_at', driver=FakeTabs, tabs=3)
+    scraper.driver.calls = []
+    results = list(scraper.scrape_many(['slow', 'a', 'b', 'c']))
+
+    # The slow page doesn't hold up the others, and c reuses a finished tab
+    assert results == [('a', 'tab1'), ('b', 'tab2'), ('c', 'tab1'), ('slow', 'main')]
+    events = [c for c in scraper.driver.calls if c[0] in ('navigate', 'finish')]
+    assert events[:4] == [
+        ('navigate', 'main', 'https://www.linkedin.com/in/slow'),
+        ('navigate', 'tab1', 'https://www.linkedin.com/in/a'),
+        ('navigate', 'tab2', 'https://www.linkedin.com/in/b'),
+        ('finish', 'tab1', 'a')]
+    # Extra tabs are closed when done
+    assert scraper.driver.window_handles == ['main']
+    assert scraper.driver.current_window_handle == 'main'
+
+
+def test_scrape_many_reports_failures():
+    FakeTabs.load_checks = {}
+    scraper = TabScraper(cookie='li_at', driver=FakeTabs, tabs=2)
+    results = dict(scraper.scrape_many(['a', '', 'b']))
+    assert isinstance(results.pop(''), ValueError)
+    assert sorted(results) == ['a', 'b']
+
+
+def test_invalid_tabs():
+    with pytest.raises(ValueError):
+        _scraper(tabs=0)
+
+
+class FakeCompanyTabs(FakeTabs):
+    """Tabs showing company pages. Companies in missing don't exist, and pages
+    in broken never load."""
+    missing = set()
+    broken = set()
+
+    def get(self, url):
+        self.calls.append(('get', self.current_window_handle, url))
+        self.urls[self.current_window_handle] = url
+
+    def find_element(self, by, selector):
+        return self.find_element_by_css_selector(selector)
+
+    def find_element_by_css_selector(self, selector):
+        url = self.urls[self.current_window_handle]
+        company, _, page = url.split('/company/')[1].partition('/')
+        if page in self.broken:
+            raise NoSuchElementException(selector)
+        if (selector == '.error-container') != (company in self.missing):
+            raise NoSuchElementException(selector)
+        return SimpleNamespace(get_attribute=lambda name: url)
+
+
+@pytest.fixture
+def company_scraper(monkeypatch):
+    module = importlib.import_module('scrape_linkedin.CompanyScraper')
+    monkeypatch.setattr(module, 'Company', lambda *pages, fields=None: pages)
+    FakeCompanyTabs.load_checks = {'about': 3}
+    FakeCompanyTabs.missing = set()
+    FakeCompanyTabs.broken = set()
+    scraper = CompanyScraper(cookie='li_at', driver=FakeCompanyTabs, timeout=0.1)
+    scraper.TAB_POLL_INTERVAL = 0
+    scraper.driver.calls = []
+    return scraper
+
+
+def test_company_subpages_load_at_once(company_scraper):
+    pages = company_scraper.scrape('acme', jobs=True, life=True, insights=True)
+    url = 'https://www.linkedin.com/company/acme/'
+    assert pages == (url + 'about', url + 'jobs', url + 'life', url + 'insights')
+    calls = company_scraper.driver.calls
+    # No root page, and every subpage starts loading before any is read
+    assert not [c for c in calls if c[0] == 'get']
+    navigations = [c[2] for c in calls if c[0] == 'navigate']
+    assert navigations == [url + 'about', url + 'life', url + 'jobs', url + 'insights']
+    assert company_scraper.driver.window_handles == ['main']
+
+
+def test_company_unavailable(company_scraper):
+    FakeCompanyTabs.missing = {'nobody'}
+    with pytest.raises(ValueError, match='Company Unavailable'):
+        company_scraper.scrape('nobody', jobs=True)
+    assert company_scraper.driver.window_handles == ['main']
+
+
+def test_company_broken_subpage_is_empty(company_scraper):
+    FakeCompanyTabs.broken = {'jobs'}
+    overview, jobs, life, insights = company_scraper.scrape('acme', jobs=True)
+    assert overview.endswith('/about')
+    assert jobs == life == insights == ''
+
+
+class FakeProfileTabs(FakeTabs):
+    """Tabs showing profiles, which have a contact info overlay at its url"""
+
+    @property
+    def current_url(self):
+        return self.urls[self.current_window_handle]
+
+    def get(self, url):
+        self.calls.append(('get', self.current_window_handle, url))
+        self.urls[self.current_window_handle] = url
+
+    def find_element(self, by, selector):
+        return self.find_element_by_css_selector(selector)
+
+    def find_element_by_css_selector(self, selector):
+        url = self.current_url
+        found = {ProfileScraper.MAIN_SELECTOR: '/in/' in url,
+                 ProfileScraper.CONTACT_INFO_SELECTOR: '/overlay/contact-info/' in url}
+        if not found.get(selector):
+            raise NoSuchElementException(selector)
+        read = ('read', self.current_window_handle, selector)
+        return SimpleNamespace(get_attribute=lambda name: self.calls.append(read)
+                               or '<{}>'.format(url))
+
+    def find_element_by_partial_link_text(self, text):
+        raise NoSuchElementException(text)
+
+
+@pytest.fixture
+def profile_scraper(monkeypatch):
+    module = importlib.import_module('scrape_linkedin.ProfileScraper')
+    monkeypatch.setattr(module, 'Profile', lambda html, fields=None: html)
+    monkeypatch.setattr(ProfileScraper, 'scroll_to_bottom',
+                        lambda self: self.driver.calls.append(('scroll',)))
+    FakeProfileTabs.load_checks = {}
+
+    def create(**options):
+        scraper = ProfileScraper(cookie='li_at', driver=FakeProfileTabs,
+                                 contact_info_timeout=0.1, **options)
+        scraper.driver.calls = []
+        return scraper
+    return create
+
+
+PROFILE_URL = 'https://www.linkedin.com/in/austinoboyle'
+CONTACT_INFO_URL = PROFILE_URL + '/overlay/contact-info/'
+
+
+def test_contact_info_in_background_tab(profile_scraper):
+    scraper = profile_scraper(contact_info='tab')
+    html = scraper.scrape(user='austinoboyle')
+    assert html == '<{}><{}>'.format(PROFILE_URL, CONTACT_INFO_URL)
+    calls = [c for c in scraper.driver.calls
+             if c[0] in ('get', 'navigate', 'scroll', 'read', 'close')]
+    assert calls == [
+        ('get', 'main', PROFILE_URL),
+        ('navigate', 'tab1', CONTACT_INFO_URL),
+        ('scroll',),
+        ('read', 'main', ProfileScraper.MAIN_SELECTOR),
+        ('read', 'tab1', ProfileScraper.CONTACT_INFO_SELECTOR),
+        ('close', 'tab1')]
+    assert scraper.driver.window_handles == ['main']
+    assert scraper.driver.current_window_handle == 'main'
+
+
+def test_contact_info_overlay_url(profile_scraper):
+    scraper = profile_scraper(contact_info='overlay')
+    html = scraper.scrape(user='austinoboyle')
+    assert html == '<{}><{}>'.format(PROFILE_URL, CONTACT_INFO_URL)
+    gets = [c[2] for c in scraper.driver.calls if c[0] == 'get']
+    assert gets == [PROFILE_URL, CONTACT_INFO_URL]
+
+
+def test_contact_info_link_missing(profile_scraper, caplog):
+    scraper = profile_scraper()
+    assert scraper.scrape(user='austinoboyle') == '<{}>'.format(PROFILE_URL)
+    assert 'Contact info' in caplog.text
+
+
+def test_contact_info_click_waits_for_timeout(profile_scraper, monkeypatch):
+    waits = []
+    monkeypatch.setattr(ProfileScraper, '_read_contact_info',
+                        lambda self, timeout: waits.append(timeout) or '')
+    scraper = profile_scraper(timeout=7)
+    button = SimpleNamespace(click=lambda: None)
+    scraper.driver.find_element_by_partial_link_text = lambda text: button
+    scraper.scrape(user='austinoboyle')
+    profile_scraper(contact_info='overlay').scrape(user='austinoboyle')
+    assert waits == [7, 0.1]
+
+
+def test_invalid_contact_info_strategy():
+    with pytest.raises(ValueError):
+        ProfileScraper(cookie='li_at', driver=FakeDriver, contact_info='modal')
+
+
+def test_fields_skip_scrolling(profile_scraper):
+    scraper = profile_scraper(contact_info='overlay')
+    html = scraper.scrape(user='austinoboyle', fields=['personal_info'])
+    assert html == '<{}><{}>'.format(PROFILE_URL, CONTACT_INFO_URL)
+    names = [c[0] for c in scraper.driver.calls]
+    assert 'scroll' not in names
+    # Sections in view are still expanded, eg. the summary
+    clicks = [c for c in scraper.driver.calls
+              if c[0] == 'execute_script' and c[-1] == ProfileScraper.LINE_CLAMP_SELECTOR]
+    assert len(clicks) == 1
+
+
+def test_fields_skip_contact_info(profile_scraper):
+    scraper = profile_scraper(contact_info='tab')
+    html = scraper.scrape(user='austinoboyle', fields=['skills'])
+    assert html == '<{}>'.format(PROFILE_URL)
+    assert [c[0] for c in scraper.driver.calls if c[0] in ('scroll', 'navigate')] == ['scroll']
+
+
+def test_skip_contact_info(profile_scraper):
+    scraper = profile_scraper(contact_info='skip')
+    html = scraper.scrape(user='austinoboyle', fields=['personal_info'])
+    assert html == '<{}>'.format(PROFILE_URL)
+    # The top card is read from the profile page alone
+    calls = [c for c in scraper.driver.calls if c[0] in ('get', 'navigate', 'scroll', 'read')]
+    assert calls == [('get', 'main', PROFILE_URL),
+                     ('read', 'main', ProfileScraper.MAIN_SELECTOR)]
+    assert not any(CONTACT_INFO_URL in map(str, c) for c in scraper.driver.calls)
+
+
+def test_unknown_fields(profile_scraper):
+    with pytest.raises(ValueError):
+        profile_scraper().scrape(user='austinoboyle', fields=['hobbies'])
+
+
+def test_company_fields_choose_subpages(company_scraper):
+    pages = company_scraper.scrape('acme', fields=['jobs'])
+    assert pages == ('', 'https://www.linkedin.com/company/acme/jobs', '', '')
+    navigations = [c[2] for c in company_scraper.driver.calls if c[0] == 'navigate']
+    assert navigations == ['https://www.linkedin.com/company/acme/jobs']
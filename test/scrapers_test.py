@@ -71,3 +71,11 @@ def test_company_scraper():
                        'num_employees', 'industry', 'type', 'company_size', 'headquarters', 'image']
     for a in overview_fields:
         assert overview[a]
+
+
+def test_profile_scraper_async_scroll():
+    with ProfileScraper(driver_options=HEADLESS_OPTIONS) as ps:
+        expected = ps.scrape(user='austinoboyle').to_dict()
+    with ProfileScraper(driver_options=HEADLESS_OPTIONS, scroll_mode='async') as ps:
+        profile = ps.scrape(user='austinoboyle')
+    assert profile.to_dict() == expected
@@ -0,0 +1,90 @@
+import copy
+import json
+from os import path
+
+import pytest
+
+from scrape_linkedin import Company, Profile, SnapshotStore
+from scrape_linkedin.SnapshotStore import apply_delta, section_hashes
+
+DIR = path.dirname(path.abspath(__file__))
+HTML_DIR = path.join(DIR, 'html_files')
+
+
+def _data(fname, results_type):
+    with open(path.join(HTML_DIR, fname), 'r') as f:
+        return json.loads(json.dumps(results_type(f.read()).to_dict()))
+
+
+@pytest.fixture(scope='module')
+def profile():
+    return _data('profile.html', Profile)
+
+
+def test_first_snapshot_returns_everything(tmp_path, profile):
+    store = SnapshotStore(str(tmp_path))
+    delta = store.update('profile/a', profile, Profile.snapshot_sections)
+    assert sorted(delta) == sorted(Profile.snapshot_sections)
+    assert store.update('profile/a', profile, Profile.snapshot_sections) == {}
+
+
+def test_only_changed_sections(tmp_path, profile):
+    store = SnapshotStore(str(tmp_path))
+    store.update('profile/a', profile, Profile.snapshot_sections)
+    changed = copy.deepcopy(profile)
+    changed['skills'].append({'name': 'Knitting', 'endorsements': 0})
+    changed['experiences']['jobs'][0]['title'] = 'CEO'
+    delta = store.update('profile/a', changed, Profile.snapshot_sections)
+    assert delta == {'skills': changed['skills'],
+                     'experiences.jobs': changed['experiences']['jobs']}
+    # Other entities are tracked separately
+    assert len(store.update('profile/b', changed, Profile.snapshot_sections)) > 2
+
+
+def test_results_objects_and_fields(tmp_path):
+    with open(path.join(HTML_DIR, 'profile.html'), 'r') as f:
+        html = f.read()
+    store = SnapshotStore(str(tmp_path))
+    assert list(store.update('p', Profile(html, fields=['skills']))) == ['skills']
+    # Sections that weren't extracted are neither reported nor forgotten
+    assert list(store.update('p', Profile(html))) == [
+        s for s in Profile.snapshot_sections if s != 'skills']
+    assert store.update('p', Profile(html, fields=['skills'])) == {}
+
+
+def test_nested_sections(tmp_path):
+    company = _data('facebook_overview.html', Company)
+    hashes = section_hashes(company, Company.snapshot_sections)
+    changed = copy.deepcopy(company)
+    changed['overview']['metadata']['industry'] = ['Internet']
+    new_hashes = section_hashes(changed, Company.snapshot_sections)
+    assert [s for s in hashes if hashes[s] != new_hashes[s]] == ['overview.metadata']
+
+
+def test_apply_delta(tmp_path):
+    company = _data('facebook_overview.html', Company)
+    store = SnapshotStore(str(tmp_path))
+    store.update('c', company, Company.snapshot_sections)
+    changed = copy.deepcopy(company)
+    changed['overview']['name'] = 'Meta'
+    changed['overview']['metadata']['industry'] = ['Internet']
+    delta = store.update('c', changed, Company.snapshot_sections)
+    assert sorted(delta) == ['overview', 'overview.metadata']
+    assert 'metadata' not in delta['overview']
+    assert apply_delta(copy.deepcopy(company), delta,
+                       Company.snapshot_sections) == changed
+
+
+def test_dict_needs_sections(tmp_path, profile):
+    with pytest.raises(ValueError):
+        SnapshotStore(str(tmp_path)).update('p', profile)
+
+
+def test_diff_stores_nothing_until_commit(tmp_path, profile):
+    store = SnapshotStore(str(tmp_path))
+    delta, hashes = store.diff('profile/a', profile, Profile.snapshot_sections)
+    assert sorted(delta) == sorted(Profile.snapshot_sections)
+    # Not committed, eg. the delta was never written: it's reported again
+    assert store.diff('profile/a', profile, Profile.snapshot_sections)[0] == delta
+    store.commit('profile/a', hashes)
+    assert store.diff('profile/a', profile, Profile.snapshot_sections) == ({}, None)
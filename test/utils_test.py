@@ -49,3 +49,34 @@ def test_get_info():
         expected_output[key] = u.text_or_default(
             basic_soup, selector, default=default)
     assert output == expected_output
+
+
+def test_dom_index_matches_soupsieve():
+    soup = u.make_soup(open(path.join(DIR, 'html_files/profile.html')).read())
+    assert u.DomIndex.of(soup) is not None
+    selectors = ['h1', '.pv-entity__summary-info', '#experience-section',
+                 'li.pv-recommendation-entity', 'section.pv-profile-section',
+                 '.pv-profile-section.background-section', 'span', '.missing']
+    containers = [soup, soup.select_one('.background-section'),
+                  soup.select_one('.pv-skill-category-entity__skill-wrapper')]
+    for container in containers:
+        for selector in selectors:
+            assert u.all_or_default(container, selector) == container.select(
+                selector)
+            assert u.one_or_default(
+                container, selector) is container.select_one(selector)
+
+
+def test_dom_index_falls_back_for_complex_selectors():
+    soup = u.make_soup(open(path.join(DIR, 'test.html')).read())
+    index = u.DomIndex.of(soup)
+    assert index.select(soup, 'div > .test1') is None
+    assert index.select(soup, '.1') is None
+    assert u.all_or_default(soup, 'div .test1') == soup.select('div .test1')
+
+
+def test_dom_index_skips_decomposed_elements():
+    soup = u.make_soup('<div><p class="a">1</p><p class="a">2</p></div>')
+    u.one_or_default(soup, '.a').decompose()
+    assert u.text_or_default(soup, '.a') == '2'
+    assert len(u.all_or_default(soup, 'p')) == 1
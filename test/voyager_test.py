@@ -0,0 +1,286 @@
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+from urllib.request import urlopen
+
+import pytest
+import selenium.webdriver
+from selenium.common.exceptions import NoSuchElementException
+
+from scrape_linkedin import (Company, CompanyScraper, Profile, ProfileScraper,
+                             voyager)
+from scrape_linkedin.browser import capture_options
+
+from fakes import FakeDriver
+
+DIR = path.dirname(path.abspath(__file__))
+VOYAGER_MIME_TYPE = 'application/vnd.linkedin.normalized+json+2.1'
+
+
+def _recording(name):
+    with open(path.join(DIR, 'json_files', name), 'r') as f:
+        return json.load(f)
+
+
+RECORDINGS = [_recording('profile_page.json'), _recording('company_page.json')]
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Stands in for linkedin, answering with recorded responses"""
+    responses = {r['path']: r['body'] for rec in RECORDINGS for r in rec['responses']}
+
+    def do_GET(self):
+        if self.path not in self.responses:
+            self.send_error(404)
+            return
+        body = json.dumps(self.responses[self.path]).encode('utf-8')
+        self.send_response(200)
+        mime_type = VOYAGER_MIME_TYPE if '/voyager/' in self.path else 'application/json'
+        self.send_header('Content-Type', mime_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), ReplayHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{}'.format(httpd.server_address[1])
+    httpd.shutdown()
+
+
+class ReplayDriver(FakeDriver):
+    """A Chrome stand in that loads a recorded page's requests from the
+    replay server, and reports them in its performance log"""
+    server = None
+
+    def __init__(self, **kwargs):
+        super(ReplayDriver, self).__init__(**kwargs)
+        self.current_url = 'data:,'
+        self.log = []
+        self.bodies = {}
+
+    def get(self, url):
+        self.calls.append(('get', url))
+        self.current_url = url
+        for recording in RECORDINGS:
+            if not url.startswith(recording['page']):
+                continue
+            for response in recording['responses']:
+                if response.get('on', '') not in url:
+                    continue
+                with urlopen(self.server + response['path']) as r:
+                    request_id = str(len(self.bodies))
+                    self.bodies[request_id] = r.read().decode('utf-8')
+                    mime_type = r.headers['Content-Type']
+                self.log.append({'message': json.dumps({'message': {
+                    'method': 'Network.responseReceived',
+                    'params': {'requestId': request_id, 'response': {
+                        'url': 'https://www.linkedin.com' + response['path'],
+                        'mimeType': mime_type}}}})})
+
+    def get_log(self, name):
+        assert name == 'performance'
+        log, self.log = self.log, []
+        return log
+
+    def execute_cdp_cmd(self, command, params):
+        self.calls.append(('execute_cdp_cmd', command))
+        if command == 'Network.getResponseBody':
+            # Chrome encodes some bodies, eg. compressed ones
+            body = self.bodies[params['requestId']]
+            if int(params['requestId']) % 2:
+                return {'body': base64.b64encode(body.encode('utf-8')).decode('ascii'),
+                        'base64Encoded': True}
+            return {'body': body, 'base64Encoded': False}
+        return {}
+
+    def find_element(self, by, selector):
+        return self.find_element_by_css_selector(selector)
+
+    def find_element_by_css_selector(self, selector):
+        if selector in (ProfileScraper.MAIN_SELECTOR, '.organization-outlet'):
+            return object()
+        raise NoSuchElementException(selector)
+
+
+@pytest.fixture
+def replay(server):
+    ReplayDriver.server = server
+    return ReplayDriver
+
+
+def test_capture_options_keep_performance_log():
+    options = capture_options({'blocked_urls': ['*.png']})
+    assert options['blocked_urls'] == ['*.png']
+    assert options['options'].to_capabilities()['goog:loggingPrefs'] == {'performance': 'ALL'}
+
+
+def test_capture_profile(replay):
+    with ProfileScraper(cookie='li_at', driver=replay, capture=True, scroll_pause=0) as scraper:
+        assert 'goog:loggingPrefs' in scraper.driver.kwargs['options'].to_capabilities()
+        profile = scraper.scrape(user='austinoboyle').to_dict()
+        gets = [c for c in scraper.driver.calls if c[0] == 'get']
+        scripts = [c for c in scraper.driver.calls if c[0] == 'execute_script']
+
+    # Loaded once, straight to the contact info overlay, with no scrolling
+    assert gets == [('get', 'https://www.linkedin.com/in/austinoboyle/overlay/contact-info/')]
+    assert scripts == []
+
+    assert profile['personal_info'] == {
+        'name': "Austin O'Boyle",
+        'headline': 'Software Engineer at Shopify',
+        'company': 'Shopify',
+        'school': "Queen's University",
+        'location': 'Toronto, Ontario, Canada',
+        'summary': 'I build scrapers.',
+        'image': 'https://media.licdn.com/dms/image/C4E03AQF/profile-displayphoto-shrink_800_800/0',
+        'followers': '1,234',
+        'email': 'austin@example.com',
+        'phone': '555-0100',
+        'connected': 'Jan 1, 2018',
+        'websites': ['https://github.com/austinoboyle']
+    }
+    jobs = profile['experiences']['jobs']
+    assert jobs[0] == {
+        'title': 'Software Engineer',
+        'company': 'Shopify',
+        'date_range': 'Sep 2019 – Present',
+        'location': 'Ottawa, Ontario, Canada',
+        'description': 'Checkout',
+        'li_company_url': 'https://www.linkedin.com/company/784652/'
+    }
+    assert jobs[1]['date_range'] == 'May 2018 – Aug 2018'
+    assert profile['experiences']['education'][0]['date_range'] == '2015 – 2019'
+    assert profile['experiences']['volunteering'][0]['cause'] == 'Education'
+    assert profile['skills'] == [{'name': 'Selenium', 'endorsements': '40'},
+                                 {'name': 'Python', 'endorsements': '12'},
+                                 {'name': 'Go', 'endorsements': None}]
+    assert profile['accomplishments']['languages'] == ['French']
+    assert profile['accomplishments']['honors'] == ["Dean's List"]
+    assert profile['accomplishments']['patents'] == []
+    received, = profile['recommendations']['received']
+    given, = profile['recommendations']['given']
+    assert received == {'text': 'Austin writes great code.', 'date': '2019-01-01',
+                        'connection': {'relationship': 'Jane managed Austin directly',
+                                       'name': 'Jane Doe', 'li_id': 'janedoe'}}
+    assert given['connection']['name'] == 'Jane Doe'
+
+
+def test_capture_profile_fields(replay):
+    with ProfileScraper(cookie='li_at', driver=replay, capture=True, scroll_pause=0) as scraper:
+        profile = scraper.scrape(user='austinoboyle', fields=['skills'])
+        gets = [c for c in scraper.driver.calls if c[0] == 'get']
+    assert gets == [('get', 'https://www.linkedin.com/in/austinoboyle')]
+    assert list(profile.to_dict()) == ['skills']
+    with pytest.raises(ValueError):
+        profile.personal_info
+
+
+def test_capture_profile_leaves_out_interests(replay):
+    with ProfileScraper(cookie='li_at', driver=replay, capture=True, scroll_pause=0) as scraper:
+        assert 'interests' not in scraper.scrape(user='austinoboyle').to_dict()
+        with pytest.raises(ValueError, match='interests'):
+            scraper.scrape(user='austinoboyle', fields=['skills', 'interests'])
+
+
+def test_capture_needs_chrome():
+    with pytest.raises(ValueError, match='Chrome'):
+        ProfileScraper(cookie='li_at', driver=selenium.webdriver.Firefox, capture=True)
+
+
+def test_capture_company(replay):
+    with CompanyScraper(cookie='li_at', driver=replay, capture=True, scroll_pause=0) as scraper:
+        company = scraper.scrape(company='facebook').to_dict()
+    assert company['overview'] == {
+        'name': 'Facebook',
+        'description': 'The Facebook company is now Meta.',
+        'image': 'https://media.licdn.com/dms/image/C4E0BAQHl6azR037YeA/company-logo_400_400/0',
+        'num_employees': 44632,
+        'metadata': {
+            'website': 'http://www.facebook.com/careers',
+            'industry': 'Internet',
+            'company_size': '10,001+ employees\n44,632 on LinkedIn',
+            'headquarters': 'Menlo Park, CA',
+            'type': 'Public Company',
+            'founded': '2004',
+            'specialties': 'Connectivity, Artificial Intelligence, Virtual Reality'
+        }
+    }
+    assert company['jobs'] is None
+
+
+class SlowSectionsDriver(ReplayDriver):
+    """Answers the skills request some time after the rest of the page"""
+    delay = 0.3
+
+    def __init__(self, **kwargs):
+        super(SlowSectionsDriver, self).__init__(**kwargs)
+        self.held = []
+        self.release_at = 0
+
+    def get(self, url):
+        super(SlowSectionsDriver, self).get(url)
+        self.held = [e for e in self.log if 'profileSkills' in e['message']]
+        self.log = [e for e in self.log if e not in self.held]
+        self.release_at = time.time() + self.delay
+
+    def get_log(self, name):
+        if self.held and time.time() >= self.release_at:
+            self.log += self.held
+            self.held = []
+        return super(SlowSectionsDriver, self).get_log(name)
+
+
+def test_capture_waits_for_later_sections(server):
+    SlowSectionsDriver.server = server
+    with ProfileScraper(cookie='li_at', driver=SlowSectionsDriver, capture=True,
+                        scroll_pause=0) as scraper:
+        profile = scraper.scrape(user='austinoboyle').to_dict()
+    assert [s['name'] for s in profile['skills']] == ['Selenium', 'Python', 'Go']
+    assert profile['personal_info']['name'] == "Austin O'Boyle"
+
+
+def test_capture_times_out(replay):
+    with ProfileScraper(cookie='li_at', driver=replay, capture=True, timeout=0.1) as scraper:
+        with pytest.raises(ValueError, match='No data was captured'):
+            scraper.scrape(user='nobody')
+
+
+def test_read_responses_filters_voyager_json(server):
+    driver = ReplayDriver()
+    driver.server = server
+    driver.get('https://www.linkedin.com/in/austinoboyle')
+    urls = [url for url, data in voyager.read_responses(driver)]
+    assert len(urls) == 2
+    assert all('/voyager/api/' in url for url in urls)
+    # The log is drained
+    assert voyager.read_responses(driver) == []
+
+
+def test_from_dict():
+    data = {'skills': [{'name': 'Python', 'endorsements': '12'}]}
+    profile = Profile.from_dict(data)
+    assert profile.to_dict() == data
+    assert profile.skills == data['skills']
+    with pytest.raises(ValueError):
+        profile.experiences
+    company = Company.from_dict({'overview': {'name': 'Facebook'}, 'jobs': None})
+    assert company.to_dict() == {'overview': {'name': 'Facebook'}, 'jobs': None}
+    company.release()
+    assert company.overview == {'name': 'Facebook'}
+
+
+def test_date_range():
+    assert voyager.date_range({'dateRange': {'start': {'year': 2015, 'month': 1}}}) == 'Jan 2015 – Present'
+    assert voyager.date_range({'timePeriod': {'startDate': {'year': 2015},
+                                              'endDate': {'year': 2016, 'month': 12}}}) == '2015 – Dec 2016'
+    assert voyager.date_range({}) is None
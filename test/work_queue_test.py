@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+
+import pytest
+
+from scrape_linkedin import (DriverPool, Profile, ProfileScraper, WorkQueue,
+                             scrape_from_queue, scrape_in_parallel)
+
+from fakes import FakeDriver
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / 'queue.db'), lease_seconds=60, max_attempts=2)
+
+
+def test_claim_leases_each_item_once(queue):
+    assert queue.put(['a', 'b', 'c']) == 3
+    assert queue.put(['a', 'd']) == 1
+    assert queue.claim('w1', 2) == ['a', 'b']
+    assert queue.claim('w2', 5) == ['c', 'd']
+    assert queue.claim('w3') == []
+    assert queue.counts() == {'pending': 0, 'leased': 4, 'done': 0, 'failed': 0}
+
+
+def test_complete_and_results(queue):
+    queue.put(['a', 'b'])
+    queue.claim('w1', 2)
+    assert queue.complete('w1', 'a', {'skills': []})
+    # Only the first result is kept
+    assert not queue.complete('w2', 'a', {'skills': ['other']})
+    assert not queue.finished()
+    queue.complete('w1', 'b', {'skills': ['Python']})
+    assert queue.finished()
+    assert dict(queue.results()) == {'a': {'skills': []}, 'b': {'skills': ['Python']}}
+
+
+def test_expired_leases_return_to_the_queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.db'), lease_seconds=0.2, max_attempts=2)
+    queue.put(['a', 'b'])
+    queue.claim('dead', 1)
+    queue.claim('alive', 1)
+    time.sleep(0.1)
+    assert queue.heartbeat('alive') == 1
+    time.sleep(0.15)
+    # The live worker's lease was renewed, the dead one's item is handed out
+    assert queue.claim('other', 2) == ['a']
+    time.sleep(0.25)
+    # 'a' is out of attempts, 'b' has one left
+    assert queue.counts() == {'pending': 1, 'leased': 0, 'done': 0, 'failed': 1}
+    assert queue.failures() == {'a': 'lease expired'}
+
+
+def test_fail_retries_until_out_of_attempts(queue):
+    queue.put(['a'])
+    queue.claim('w1')
+    queue.fail('w1', 'a', ValueError('no profile'))
+    assert queue.claim('w1') == ['a']
+    queue.fail('w1', 'a', ValueError('no profile'))
+    assert queue.claim('w1') == []
+    assert queue.failures() == {'a': 'no profile'}
+    assert queue.finished()
+
+
+def test_release_doesnt_count_an_attempt(queue):
+    queue.put(['a'])
+    queue.claim('w1')
+    queue.release('w1')
+    queue.claim('w2')
+    queue.fail('w2', 'a', 'error')
+    # Only one of the two attempts was used
+    assert queue.claim('w3') == ['a']
+
+
+@pytest.fixture
+def scraped(monkeypatch):
+    """Replaces ProfileScraper.scrape, recording the thread each user is
+    scraped in. 'bad' users can't be scraped."""
+    scraped = {}
+
+    def scrape(self, user=None, fields=None):
+        if user == 'bad':
+            raise ValueError('no such profile')
+        scraped.setdefault(user, []).append(threading.current_thread().name)
+        time.sleep(0.01)
+        return Profile.from_dict({'skills': [{'name': user, 'endorsements': None}]})
+    monkeypatch.setattr(ProfileScraper, 'scrape', scrape)
+    return scraped
+
+
+def test_workers_share_a_queue(queue, scraped):
+    users = ['u{}'.format(i) for i in range(12)] + ['bad']
+    queue.put(users)
+    counts = []
+
+    def work(name):
+        counts.append(scrape_from_queue(ProfileScraper, queue.path, worker=name, poll_interval=0.01,
+                                        cookie='li_at', driver=FakeDriver))
+    threads = [threading.Thread(target=work, args=(n,), name=n) for n in ('w1', 'w2', 'w3')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(counts) == 12
+    assert all(len(names) == 1 for names in scraped.values())
+    assert len({names[0] for names in scraped.values()}) > 1
+    results = dict(queue.results())
+    assert sorted(results) == sorted(users[:-1])
+    assert results['u3'] == {'skills': [{'name': 'u3', 'endorsements': None}]}
+    assert list(queue.failures()) == ['bad']
+
+
+def test_worker_picks_up_expired_leases(tmp_path, scraped):
+    queue = WorkQueue(str(tmp_path / 'queue.db'), lease_seconds=0.2)
+    queue.put(['a', 'b'])
+    # A worker that died holding 'a'
+    queue.claim('dead')
+    assert scrape_from_queue(ProfileScraper, queue, poll_interval=0.05,
+                             cookie='li_at', driver=FakeDriver) == 2
+    assert sorted(dict(queue.results())) == ['a', 'b']
+
+
+def test_scrape_in_parallel_with_queue(tmp_path, scraped):
+    output_file = str(tmp_path / 'out.json')
+    queue_file = str(tmp_path / 'queue.db')
+    with DriverPool(size=2, cookie='li_at', driver=FakeDriver) as pool:
+        data = scrape_in_parallel(ProfileScraper, ['a', 'b', 'c'], output_file,
+                                  pool=pool, queue=queue_file, poll_interval=0.05)
+        # Items already done aren't scraped again
+        scrape_in_parallel(ProfileScraper, ['a', 'd'], None, pool=pool, queue=queue_file,
+                           poll_interval=0.05)
+    assert sorted(data) == ['a', 'b', 'c']
+    with open(output_file, 'r') as f:
+        assert json.load(f) == data
+    assert sorted(scraped) == ['a', 'b', 'c', 'd']
+    assert all(len(names) == 1 for names in scraped.values())